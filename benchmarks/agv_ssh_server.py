@@ -0,0 +1,375 @@
+"""本機的AGV SSH替身伺服器：在同一個行程中以paramiko提供exec與SFTP，供掃描效能測試使用
+
+遠端命令交給本機的 sh 執行，日誌樹以合成的agvapp日誌建立在暫存目錄中，
+目錄結構與設備相同（<root>/run/media/mmcblk1p1/log/agvapp/）。
+可在客戶端與伺服器之間加上模擬的網路延遲與頻寬限制。
+
+用法（單獨啟動，供GUI或scan_cli手動測試）:
+    python benchmarks/agv_ssh_server.py [--files 500] [--file-size-kb 64] [--latency-ms 20] [--bandwidth-mbit 10]
+"""
+import argparse
+import os
+import queue
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import paramiko
+
+DEVICE_LOG_DIRECTORY = "run/media/mmcblk1p1/log/agvapp"
+DEFAULT_BUILD = "2.0.11-pre.202507030550"
+STARTED = datetime(2025, 7, 1, 8, 0, 0)
+
+CHUNK_SIZE = 32768
+
+HEADER_LINES = (
+    "{time}\tSTART\tSuccessfully added \"agvapp\" log.\n",
+    "{time}\tINFO\t[AgvApp] Agv build version :{build}\0\t[/home/arm64/mmr_agv_dev/src/AGV/Ethercat/Garmin/app/AgvApp/AgvApp.cpp,12]\n",
+    "{time}\tINFO\t[AgvApp] construct \"shared\"... ConfigProvider\t[/home/arm64/mmr_agv_dev/src/AGV/Ethercat/Garmin/app/AgvApp/AgvApp.cpp,32]\n",
+    "{time}\tINFO\t[AgvApp] construct \"shared\"... SignalProvider\t[/home/arm64/mmr_agv_dev/src/AGV/Ethercat/Garmin/app/AgvApp/AgvApp.cpp,38]\n",
+    "{time}\tINFO\t[AgvApp] construct \"component\"... MapService\t[/home/arm64/mmr_agv_dev/src/AGV/Ethercat/Garmin/app/AgvApp/AgvApp.cpp,41]\n",
+    "{time}\tINFO\t[AgvApp] starting \"shared\"...\t[/home/arm64/mmr_agv_dev/src/AGV/Ethercat/Garmin/app/AgvApp/AgvApp.cpp,50]\n",
+)
+FILLER_LINE = "{time}\tINFO\t[MmrAgv] motion controller cycle {cycle} position=({x:.3f}, {y:.3f}) speed={speed:.3f}\t[/home/arm64/mmr_agv_dev/src/AGV/Ethercat/Garmin/app/MmrAgv/MmrAgv.cpp,{line}]\n"
+
+
+def _filler(size, boot, rng):
+    """產生約size位元組的一般日誌內容"""
+    lines = []
+    total = 0
+    cycle = 0
+    while total < size:
+        when = boot + timedelta(milliseconds=cycle * 20)
+        line = FILLER_LINE.format(time=when.strftime("%H:%M:%S.%f")[:12], cycle=cycle, x=rng.uniform(0, 50),
+                                  y=rng.uniform(0, 50), speed=rng.uniform(0, 1.5), line=rng.randint(100, 900))
+        lines.append(line)
+        total += len(line)
+        cycle += 1
+    return "".join(lines).encode()
+
+
+def generate_log_tree(root, files=500, file_size=64 * 1024, missing_ratio=0.0, seed=1):
+    """在root下建立合成的agvapp日誌樹，回傳日誌目錄路徑
+
+    每個檔案代表一次開機，檔名為 agvapp_YY_MM_DD_HH_MM_SS，最新的一個為仍在寫入的 .tmp 檔；
+    missing_ratio比例的檔案沒有build version行（例如開機中途斷電），掃描時會讀取整個檔案。
+    """
+    rng = random.Random(seed)
+    directory = os.path.join(root, DEVICE_LOG_DIRECTORY)
+    os.makedirs(directory, exist_ok=True)
+
+    # 一般日誌內容只產生一次，各檔案共用，只有檔頭不同
+    filler = _filler(file_size, STARTED, rng)
+    boot = STARTED
+    for index in range(files):
+        boot += timedelta(seconds=rng.randint(600, 6 * 3600))
+        clock = boot.strftime("%H:%M:%S.") + "{:03d}".format(rng.randint(0, 999))
+        header_lines = HEADER_LINES if rng.random() >= missing_ratio else HEADER_LINES[:1] + HEADER_LINES[2:]
+        header = "".join(line.format(time=clock, build=DEFAULT_BUILD) for line in header_lines).encode()
+        name = boot.strftime("agvapp_%y_%m_%d_%H_%M_%S")
+        if index == files - 1:
+            name += ".tmp"
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(header)
+            f.write(filler[:max(0, file_size - len(header))])
+        mtime = time.mktime(boot.timetuple())
+        os.utime(path, (mtime, mtime))
+    return directory
+
+
+class _SFTPHandle(paramiko.SFTPHandle):
+    """唯讀的本機檔案代理"""
+
+    def stat(self):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.fstat(self.readfile.fileno()))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+
+class _SFTPInterface(paramiko.SFTPServerInterface):
+    """唯讀的SFTP子系統，直接使用本機路徑"""
+
+    def open(self, path, flags, attr):
+        if flags & (os.O_WRONLY | os.O_RDWR):
+            return paramiko.SFTP_PERMISSION_DENIED
+        try:
+            readfile = open(path, 'rb')
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        handle = _SFTPHandle(flags)
+        handle.filename = path
+        handle.readfile = readfile
+        return handle
+
+    def stat(self, path):
+        try:
+            return paramiko.SFTPAttributes.from_stat(os.stat(path))
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+
+    lstat = stat
+
+    def list_folder(self, path):
+        try:
+            names = os.listdir(path)
+        except OSError as e:
+            return paramiko.SFTPServer.convert_errno(e.errno)
+        entries = []
+        for name in names:
+            attributes = paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(path, name)))
+            attributes.filename = name
+            entries.append(attributes)
+        return entries
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    """以固定帳號密碼登入，每個exec請求在本機的 sh 中執行"""
+
+    def __init__(self, server):
+        self.server = server
+
+    def check_auth_password(self, username, password):
+        if username == self.server.username and password == self.server.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        threading.Thread(target=self.server.run_command, args=(channel, command.decode()), daemon=True).start()
+        return True
+
+
+class LinkEmulator:
+    """在客戶端與伺服器之間轉送TCP資料，每個方向加上一半的往返延遲並限制頻寬
+
+    延遲以時間戳記排程，多個封包可以同時在途，與實際網路一樣不會因延遲而阻塞管線化的請求。
+    """
+
+    def __init__(self, target_port, latency_ms=0.0, bandwidth_mbit=None):
+        self.target_port = target_port
+        self.one_way_delay = latency_ms / 2000.0
+        self.bytes_per_second = bandwidth_mbit * 125000.0 if bandwidth_mbit else None
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(("127.0.0.1", 0))
+        self._listener.listen(16)
+        self.port = self._listener.getsockname()[1]
+        self._closed = False
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                client, _ = self._listener.accept()
+            except OSError:
+                return
+            upstream = socket.create_connection(("127.0.0.1", self.target_port))
+            for sock in (client, upstream):
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._pipe(client, upstream)
+            self._pipe(upstream, client)
+
+    def _pipe(self, source, target):
+        """啟動單一方向的轉送：讀取執行緒記錄抵達時間，寫入執行緒依延遲與頻寬送出"""
+        pending = queue.Queue()
+
+        def read():
+            while True:
+                try:
+                    data = source.recv(CHUNK_SIZE)
+                except OSError:
+                    data = b""
+                pending.put((time.monotonic(), data))
+                if not data:
+                    return
+
+        def write():
+            link_free = 0.0
+            while True:
+                arrived, data = pending.get()
+                send_at = arrived + self.one_way_delay
+                if self.bytes_per_second and data:
+                    # 頻寬限制：資料依序佔用連結，前一筆傳完才開始傳下一筆
+                    link_free = max(link_free, arrived) + len(data) / self.bytes_per_second
+                    send_at = max(send_at, link_free + self.one_way_delay)
+                delay = send_at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                try:
+                    if not data:
+                        target.shutdown(socket.SHUT_WR)
+                        return
+                    target.sendall(data)
+                except OSError:
+                    return
+
+        threading.Thread(target=read, daemon=True).start()
+        threading.Thread(target=write, daemon=True).start()
+
+    def close(self):
+        self._closed = True
+        self._listener.close()
+
+
+class AGVSSHServer:
+    """在背景執行緒中執行的SSH伺服器，連線到 127.0.0.1:port 使用username/password登入"""
+
+    def __init__(self, username="root", password="agv", latency_ms=0.0, bandwidth_mbit=None):
+        self.username = username
+        self.password = password
+        self.latency_ms = latency_ms
+        self.bandwidth_mbit = bandwidth_mbit
+        self.host_key = None
+        self.port = None
+        self.commands = 0
+        self._listener = None
+        self._link = None
+        self._transports = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self):
+        """開始接受連線，回傳客戶端要連線的埠號"""
+        self.host_key = paramiko.RSAKey.generate(2048)
+        self._listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._listener.bind(("127.0.0.1", 0))
+        self._listener.listen(16)
+        self.port = self._listener.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+        if self.latency_ms or self.bandwidth_mbit:
+            self._link = LinkEmulator(self.port, self.latency_ms, self.bandwidth_mbit)
+            self.port = self._link.port
+        return self.port
+
+    def _accept(self):
+        while not self._closed:
+            try:
+                sock, _ = self._listener.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(sock,), daemon=True).start()
+
+    def _serve(self, sock):
+        """為一個連線建立Transport，執行緒由paramiko管理"""
+        transport = paramiko.Transport(sock)
+        transport.add_server_key(self.host_key)
+        transport.set_subsystem_handler("sftp", paramiko.SFTPServer, _SFTPInterface)
+        with self._lock:
+            self._transports.append(transport)
+        try:
+            transport.start_server(server=_ServerInterface(self))
+        except (paramiko.SSHException, EOFError, OSError):
+            transport.close()
+
+    def run_command(self, channel, command):
+        """在本機的 sh 中執行命令，轉送stdin、stdout、stderr與結束代碼"""
+        with self._lock:
+            self.commands += 1
+        process = subprocess.Popen(["sh", "-c", command], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                   stderr=subprocess.PIPE)
+
+        def forward_stdin():
+            try:
+                while True:
+                    data = channel.recv(CHUNK_SIZE)
+                    if not data:
+                        break
+                    process.stdin.write(data)
+                    process.stdin.flush()
+            except (OSError, EOFError):
+                pass
+            finally:
+                try:
+                    process.stdin.close()
+                except OSError:
+                    pass
+
+        def forward_stderr():
+            for data in iter(lambda: process.stderr.read1(CHUNK_SIZE), b""):
+                try:
+                    channel.sendall_stderr(data)
+                except OSError:
+                    return
+
+        threading.Thread(target=forward_stdin, daemon=True).start()
+        stderr_thread = threading.Thread(target=forward_stderr, daemon=True)
+        stderr_thread.start()
+        try:
+            for data in iter(lambda: process.stdout.read1(CHUNK_SIZE), b""):
+                channel.sendall(data)
+            stderr_thread.join()
+            channel.send_exit_status(process.wait())
+        except OSError:
+            # 客戶端已關閉通道（例如取消掃描）
+            process.kill()
+            process.wait()
+        finally:
+            channel.close()
+
+    def stop(self):
+        """關閉所有連線"""
+        self._closed = True
+        if self._link:
+            self._link.close()
+        if self._listener:
+            self._listener.close()
+        with self._lock:
+            transports = self._transports
+            self._transports = []
+        for transport in transports:
+            transport.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in AGV SSH server with a synthetic log tree")
+    parser.add_argument("--files", type=int, default=500, help="number of log files")
+    parser.add_argument("--file-size-kb", type=int, default=64, help="size of each log file in KiB")
+    parser.add_argument("--missing-ratio", type=float, default=0.0, help="fraction of files without a build version")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="emulated round-trip latency")
+    parser.add_argument("--bandwidth-mbit", type=float, default=None, help="emulated bandwidth limit")
+    parser.add_argument("--username", default="root")
+    parser.add_argument("--password", default="agv")
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix="agv_tree_")
+    try:
+        directory = generate_log_tree(root, args.files, args.file_size_kb * 1024, args.missing_ratio)
+        with AGVSSHServer(args.username, args.password, args.latency_ms, args.bandwidth_mbit) as server:
+            print("Listening on 127.0.0.1:{} as {} / {}".format(server.port, args.username, args.password))
+            print("Log directory: {}".format(directory))
+            print("Press Ctrl+C to stop")
+            while True:
+                time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
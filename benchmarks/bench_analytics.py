@@ -0,0 +1,78 @@
+"""重啟統計效能測試：比較NumPy向量化與純Python實作計算整個車隊統計的耗時
+
+用法:
+    python benchmarks/bench_analytics.py [--hosts 500] [--boots 2000] [--repeat 3] [--json 結果檔]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from scan.analytics import analyze_reboots, load_numpy  # noqa: E402
+
+STARTED = 1735689600  # 2025-01-01 00:00:00 UTC
+
+
+def generate_fleet(hosts, boots, seed=1):
+    """每台設備的開機時間：大多間隔數小時，偶爾出現數分鐘內連續重開"""
+    rng = random.Random(seed)
+    fleet = []
+    for host in range(hosts):
+        epoch = STARTED
+        epochs = []
+        for _ in range(boots):
+            epoch += rng.randint(60, 300) if rng.random() < 0.05 else rng.randint(3600, 3 * 86400)
+            epochs.append(epoch)
+        fleet.append(("agv-{:03d}".format(host), epochs))
+    return fleet
+
+
+def measure(fleet, use_numpy, repeat):
+    """回傳最短耗時秒數與統計結果"""
+    best = None
+    analysis = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        analysis = analyze_reboots(fleet, use_numpy=use_numpy)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, analysis
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reboot analytics benchmark")
+    parser.add_argument("--hosts", type=int, default=500, help="number of hosts")
+    parser.add_argument("--boots", type=int, default=2000, help="boots per host")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions, the fastest run is reported")
+    parser.add_argument("--json", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    fleet = generate_fleet(args.hosts, args.boots)
+    cases = []
+    python_seconds, expected = measure(fleet, False, args.repeat)
+    cases.append({'implementation': "pure Python", 'seconds': round(python_seconds, 4)})
+    if load_numpy() is not None:
+        numpy_seconds, analysis = measure(fleet, True, args.repeat)
+        assert analysis == expected, "NumPy and pure Python results differ"
+        cases.append({'implementation': "NumPy", 'seconds': round(numpy_seconds, 4)})
+    else:
+        print("NumPy is not installed, only the pure Python implementation was measured")
+
+    boots = args.hosts * args.boots
+    for case in cases:
+        print("{:<12} {:>8.4f} s {:>12.0f} boots/s".format(case['implementation'], case['seconds'],
+                                                           boots / case['seconds']))
+    print("crash loops found: {}".format(expected['fleet']['crash_loops']))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'analytics', 'python': sys.version.split()[0], 'hosts': args.hosts,
+                       'boots_per_host': args.boots, 'results': cases}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""連線設定效能測試：量測JSON（快取）與SQLite兩種儲存方式在大量profile時的讀寫耗時
+
+json (cold) 每次操作都建立新的ConfigManager，相當於沒有快取時重新讀取並解析整個檔案。
+
+用法:
+    python benchmarks/bench_config.py [--profiles 5000] [--operations 200] [--json 結果檔]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config.config_manager import ConfigManager, SQLiteConfigManager  # noqa: E402
+
+
+def per_operation(callable_, arguments):
+    """回傳每次操作的平均毫秒數"""
+    started = time.perf_counter()
+    for argument in arguments:
+        callable_(*argument)
+    return (time.perf_counter() - started) * 1000 / len(arguments)
+
+
+def fill(path, profiles):
+    """以JSON格式寫入profiles筆連線設定，回傳profile名稱清單"""
+    names = ["root@10.{}.{}.{}:22".format(index // 65536, index // 256 % 256, index % 256) for index in range(profiles)]
+    password = ConfigManager()._encode_password("agv")
+    raw = {"connections": dict((name, {"ip": name[5:-3], "port": 22, "username": "root", "password": password,
+                                       "allow_no_password": False, "timestamp": "2025-07-01 08:00:00"})
+                               for name in names),
+           "last_connection": names[-1]}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(raw, f, indent=4)
+    return names
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Connection profile store benchmark")
+    parser.add_argument("--profiles", type=int, default=5000, help="number of saved profiles")
+    parser.add_argument("--operations", type=int, default=200, help="operations per operation type")
+    parser.add_argument("--json", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    directory = tempfile.mkdtemp()
+    cases = []
+    try:
+        json_path = os.path.join(directory, "ssh_config.json")
+        db_path = os.path.join(directory, "ssh_config.db")
+        names = fill(json_path, args.profiles)
+        lookups = [(rng.choice(names),) for _ in range(args.operations)]
+        saves = [("10.200.{}.{}".format(index // 256, index % 256), 22, "root", "agv")
+                 for index in range(args.operations)]
+
+        cached = ConfigManager(json_path)
+        started = time.perf_counter()
+        sqlite = SQLiteConfigManager(db_path, json_path)
+        sqlite.get_profile_names()
+        import_seconds = time.perf_counter() - started
+
+        stores = [
+            ("json (cold)", lambda: ConfigManager(json_path)),
+            ("json", lambda: cached),
+            ("sqlite", lambda: sqlite),
+        ]
+        for store, manager in stores:
+            case = {'store': store}
+            case['load_connection_by_name_ms'] = round(per_operation(
+                lambda name: manager().load_connection_by_name(name), lookups), 4)
+            case['get_profile_names_ms'] = round(per_operation(
+                lambda: manager().get_profile_names(), [()] * max(1, args.operations // 10)), 4)
+            case['get_all_connections_ms'] = round(per_operation(
+                lambda: manager().get_all_connections(), [()] * max(1, args.operations // 10)), 4)
+            if store != "json (cold)":
+                case['save_config_ms'] = round(per_operation(
+                    lambda *save: manager().save_config(*save), saves), 4)
+            cases.append(case)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    print("{} profiles, JSON import into SQLite {:.3f} s".format(args.profiles, import_seconds))
+    print("{:<12} {:>12} {:>12} {:>12} {:>12}  (ms per call)".format(
+        "store", "by_name", "names", "all", "save"))
+    for case in cases:
+        print("{:<12} {:>12.4f} {:>12.4f} {:>12.4f} {:>12}".format(
+            case['store'], case['load_connection_by_name_ms'], case['get_profile_names_ms'],
+            case['get_all_connections_ms'],
+            "{:.4f}".format(case['save_config_ms']) if 'save_config_ms' in case else "-"))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'config', 'python': sys.version.split()[0], 'profiles': args.profiles,
+                       'import_seconds': round(import_seconds, 4), 'results': cases}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
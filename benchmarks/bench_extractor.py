@@ -0,0 +1,111 @@
+"""日誌擷取效能測試：比較舊版逐行擷取與單次掃描擷取器的處理速度 (MB/s)
+
+用法:
+    python benchmarks/bench_extractor.py [--size-mb 8] [--repeat 5] [--json 結果檔]
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from scan.extractor import LogExtractor, extract_build_version  # noqa: E402
+
+SAMPLE_LOG = os.path.join(os.path.dirname(__file__), '..', 'log', 'agvapp_25_07_04_09_55_31')
+
+FILLER_LINE = "{}\tINFO\t[MmrAgv] motion controller cycle {} position=({:.3f}, {:.3f}) speed={:.3f}\t[/home/arm64/mmr_agv_dev/src/AGV/Ethercat/Garmin/app/MmrAgv/MmrAgv.cpp,{}]\n"
+
+
+def legacy_extract_build_version(content):
+    """舊版實作：整份內容轉小寫並逐行比對，每行重新編譯正規表示式"""
+    lines = content.split('\n')
+    for line in lines:
+        if 'build version' in line.lower():
+            time_match = re.search(r'(\d{2}:\d{2}:\d{2}\.\d{3})', line)
+            version_match = re.search(r'build version :(\d+\.\d+\.\d+)', line)
+            version_time_match = re.search(r'(\d{12})', line)
+            return {
+                'time': time_match.group(1) if time_match else "Unknown",
+                'version': version_match.group(1) if version_match else "Unknown",
+                'version_time': version_time_match.group(1) if version_time_match else "Unknown",
+                'full_line': line.strip()
+            }
+    return None
+
+
+def build_synthetic_log(size_mb, marker_at_end=False):
+    """依範例日誌格式產生指定大小的合成日誌"""
+    with open(SAMPLE_LOG, 'rb') as f:
+        header = f.read().decode(errors="replace")
+    header_lines = header.splitlines(True)
+    marker_lines = [line for line in header_lines if 'build version' in line]
+    body_header = [line for line in header_lines if 'build version' not in line] if marker_at_end else header_lines
+
+    parts = list(body_header)
+    size = sum(len(line) for line in parts)
+    target = int(size_mb * 1024 * 1024)
+    i = 0
+    while size < target:
+        seconds = 36000 + i // 100
+        stamp = "{:02d}:{:02d}:{:02d}.{:03d}".format(seconds // 3600 % 24, seconds // 60 % 60, seconds % 60, i % 1000)
+        line = FILLER_LINE.format(stamp, i, i * 0.001, i * 0.002, 0.5, 100 + i % 400)
+        parts.append(line)
+        size += len(line)
+        i += 1
+    if marker_at_end:
+        parts.extend(marker_lines)
+    return "".join(parts)
+
+
+def measure(func, content, repeat):
+    """回傳最佳執行時間（秒）"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(content)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Log extractor throughput benchmark")
+    parser.add_argument("--size-mb", type=float, default=8.0, help="synthetic log size in MB")
+    parser.add_argument("--repeat", type=int, default=5, help="repetitions per case (best time is reported)")
+    parser.add_argument("--json", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    extractor = LogExtractor()
+    cases = []
+    for label, marker_at_end in (("marker in header", False), ("marker at end", True)):
+        content = build_synthetic_log(args.size_mb, marker_at_end)
+        size_mb = len(content.encode()) / (1024 * 1024)
+        assert legacy_extract_build_version(content) == extract_build_version(content)
+
+        for name, func in (
+                ("legacy build version", legacy_extract_build_version),
+                ("extractor build version", extract_build_version),
+                ("extractor all events", extractor.extract)):
+            elapsed = measure(func, content, args.repeat)
+            cases.append({
+                'case': label,
+                'implementation': name,
+                'size_mb': round(size_mb, 3),
+                'seconds': elapsed,
+                'mb_per_s': round(size_mb / elapsed, 1) if elapsed > 0 else None
+            })
+
+    for case in cases:
+        print("{:<18} {:<26} {:>8.2f} MB {:>10.4f} s {:>10} MB/s".format(
+            case['case'], case['implementation'], case['size_mb'], case['seconds'], case['mb_per_s']))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'extractor', 'python': sys.version.split()[0], 'results': cases}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
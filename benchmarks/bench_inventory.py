@@ -0,0 +1,105 @@
+"""版本清冊效能測試：量測寫入、載入索引與兩種查詢的耗時
+
+用法:
+    python benchmarks/bench_inventory.py [--hosts 500] [--boots 1000] [--queries 2000] [--json 結果檔]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from config.version_inventory import VersionInventory  # noqa: E402
+from scan import BootRecord  # noqa: E402
+
+STARTED = datetime(2025, 1, 1)
+BUILDS = ["2.0.{}-pre.2025{:02d}01{:04d}".format(minor, minor % 12 + 1, minor * 7) for minor in range(40)]
+
+
+def generate_host(rng, boots):
+    """一台設備的開機紀錄：每隔數小時開機一次，偶爾升級到下一個建構"""
+    when = STARTED
+    build = rng.randrange(len(BUILDS) // 2)
+    records = []
+    for _ in range(boots):
+        when += timedelta(seconds=rng.randint(3600, 2 * 86400))
+        if rng.random() < 0.02 and build < len(BUILDS) - 1:
+            build += 1
+        filename = when.strftime("agvapp_%y_%m_%d_%H_%M_%S.tmp")
+        records.append(BootRecord(filename, "/log/" + filename, None, None, BUILDS[build].split('-')[0], None,
+                                  "[INFO] build version :{}".format(BUILDS[build])))
+    return records
+
+
+def per_query(callable_, arguments):
+    """回傳每次查詢的平均毫秒數"""
+    started = time.perf_counter()
+    for argument in arguments:
+        callable_(*argument)
+    return (time.perf_counter() - started) * 1000 / len(arguments)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Version inventory benchmark")
+    parser.add_argument("--hosts", type=int, default=500, help="number of hosts")
+    parser.add_argument("--boots", type=int, default=1000, help="boots per host")
+    parser.add_argument("--queries", type=int, default=2000, help="queries per query type")
+    parser.add_argument("--json", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    directory = tempfile.mkdtemp()
+    try:
+        path = os.path.join(directory, "version_inventory.db")
+        hosts = ["root@10.0.{}.{}:22".format(host // 250, host % 250) for host in range(args.hosts)]
+        fleet = [(host, generate_host(rng, args.boots)) for host in hosts]
+
+        started = time.perf_counter()
+        inventory = VersionInventory(path)
+        for host, records in fleet:
+            inventory.add_records(host, records)
+        write_seconds = time.perf_counter() - started
+
+        # 新的實例模擬重新啟動程式，第一次查詢時由資料庫載入索引
+        inventory = VersionInventory(path)
+        started = time.perf_counter()
+        inventory.get_hosts()
+        load_seconds = time.perf_counter() - started
+
+        span = args.boots * 86400
+        version_at = [(rng.choice(hosts), STARTED + timedelta(seconds=rng.randint(0, span)))
+                      for _ in range(args.queries)]
+        hosts_running = []
+        for _ in range(args.queries):
+            start = STARTED + timedelta(seconds=rng.randint(0, span))
+            hosts_running.append((rng.choice(BUILDS), start, start + timedelta(days=7)))
+
+        cases = [
+            {'operation': "write", 'seconds': round(write_seconds, 3)},
+            {'operation': "load index", 'seconds': round(load_seconds, 3)},
+            {'operation': "version_at", 'ms_per_query': round(per_query(inventory.version_at, version_at), 4)},
+            {'operation': "hosts_running", 'ms_per_query': round(per_query(inventory.hosts_running, hosts_running), 4)},
+        ]
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    for case in cases:
+        if 'seconds' in case:
+            print("{:<14} {:>10.3f} s".format(case['operation'], case['seconds']))
+        else:
+            print("{:<14} {:>10.4f} ms/query".format(case['operation'], case['ms_per_query']))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'inventory', 'python': sys.version.split()[0], 'hosts': args.hosts,
+                       'boots_per_host': args.boots, 'results': cases}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
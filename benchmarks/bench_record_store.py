@@ -0,0 +1,112 @@
+"""開機紀錄記憶體用量測試：比較dict清單、BootRecord清單與欄位式BootRecordStore每百萬筆的記憶體
+
+用法:
+    python benchmarks/bench_record_store.py [--count 100000] [--json 結果檔]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from scan import BootRecord, BootRecordStore  # noqa: E402
+
+LOG_DIRECTORY = "/run/media/mmcblk1p1/log/agvapp"
+VERSIONS = ("2.0.9", "2.0.10", "2.0.11", "2.1.0")
+FULL_LINE = "{}\tINFO\t[AgvApp] Agv build version :{}-pre.{}\t[/home/arm64/mmr_agv_dev/src/AGV/Ethercat/Garmin/app/AgvApp/AgvApp.cpp,12]"
+
+
+def generate_records(count):
+    """依實際日誌格式產生開機紀錄（每台車每天數次重開，版本只有少數幾種）"""
+    started = datetime(2025, 1, 1)
+    for i in range(count):
+        boot = started + timedelta(minutes=37 * i)
+        filename = boot.strftime("agvapp_%y_%m_%d_%H_%M_%S")
+        clock = "{}.{:03d}".format(boot.strftime("%H:%M:%S"), i % 1000)
+        version = VERSIONS[i * len(VERSIONS) // count]
+        version_time = "2025{:02d}{:02d}0550".format(1 + i % 12, 1 + i % 28)
+        yield BootRecord(filename, "{}/{}".format(LOG_DIRECTORY, filename), boot.strftime("%Y-%m-%d %H:%M:%S"),
+                         clock, version, version_time, FULL_LINE.format(clock, version, version_time))
+
+
+def as_dict(record):
+    """舊版SearchWindow保存的log_entry格式"""
+    return {
+        'filename': record.filename,
+        'file_time': record.file_time,
+        'boot_time': record.boot_time,
+        'version': record.version,
+        'version_time': record.version_time,
+        'full_line': record.full_line
+    }
+
+
+def copy_record(record):
+    """以slotted物件保存，與dict相同保留每個欄位的字串"""
+    return BootRecord(record.filename, record.path, record.file_time, record.boot_time,
+                      record.version, record.version_time, record.full_line)
+
+
+def measure(build, records):
+    """回傳 (建立後保留的記憶體位元組數, 建立耗時秒數)
+
+    記憶體以新產生的紀錄量測，各實作保留的字串都計入；耗時以預先建立的紀錄在未啟用
+    tracemalloc時另外量測，避免記憶體追蹤的額外負擔影響結果。
+    """
+    started = time.perf_counter()
+    container = build(records)
+    elapsed = time.perf_counter() - started
+    del container
+
+    gc.collect()
+    tracemalloc.start()
+    container = build(generate_records(len(records)))
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    return current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Boot record memory benchmark")
+    parser.add_argument("--count", type=int, default=100000, help="number of records to store")
+    parser.add_argument("--json", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    # 驗證欄位式儲存可完整還原每一筆紀錄
+    sample = list(generate_records(1000))
+    store = BootRecordStore(sample)
+    assert [record.to_dict() for record in store] == [record.to_dict() for record in sample]
+
+    records = list(generate_records(args.count))
+    cases = []
+    for name, build in (
+            ("list of dicts", lambda records: [as_dict(record) for record in records]),
+            ("list of BootRecord", lambda records: [copy_record(record) for record in records]),
+            ("BootRecordStore", BootRecordStore)):
+        size, elapsed = measure(build, records)
+        cases.append({
+            'implementation': name,
+            'records': args.count,
+            'bytes_per_record': round(size / args.count, 1),
+            'mb_per_million': round(size / args.count * 1000000 / (1024 * 1024), 1),
+            'build_seconds': round(elapsed, 3)
+        })
+
+    for case in cases:
+        print("{:<20} {:>8.1f} bytes/record {:>9.1f} MB per million records {:>8.3f} s".format(
+            case['implementation'], case['bytes_per_record'], case['mb_per_million'], case['build_seconds']))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'record_store', 'python': sys.version.split()[0], 'results': cases}, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
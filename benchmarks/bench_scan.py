@@ -0,0 +1,207 @@
+"""掃描效能測試：對本機的AGV SSH替身伺服器執行完整掃描，量測耗時、第一筆結果時間與記憶體峰值
+
+每種掃描模式各執行一次LogScanner（與FileReadWorker、scan_cli相同的掃描流程）；
+有安裝PyQt5/PySide2時另外以FileReadWorker執行，第一筆結果時間包含Qt信號送達主執行緒的時間。
+結果可輸出為JSON，並以 --baseline 與先前版本的結果比較。
+
+用法:
+    python benchmarks/bench_scan.py [--files 500] [--file-size-kb 64] [--latency-ms 20] [--bandwidth-mbit 10]
+                                    [--modes batch,per_file,sftp] [--repeat 3] [--json 結果檔] [--baseline 舊結果檔]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import paramiko  # noqa: E402
+
+from agv_ssh_server import AGVSSHServer, generate_log_tree  # noqa: E402
+from scan import LogScanner  # noqa: E402
+from scan.core import (SCAN_MODE_BATCH, SCAN_MODE_PER_FILE, SCAN_MODE_SFTP, READ_MODE_BYTES, READ_MODE_LINES,  # noqa: E402
+                       READ_MODE_FULL, DEFAULT_READ_MODE, DEFAULT_SCAN_CHANNELS)
+from ssh import SSHClient  # noqa: E402
+
+MODES = (SCAN_MODE_BATCH, SCAN_MODE_PER_FILE, SCAN_MODE_SFTP)
+
+
+class Run:
+    """一次掃描的計時：開始時間、第一筆結果時間與結果筆數"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.first = None
+        self.records = 0
+        self.errors = []
+
+    def found(self, record):
+        if self.first is None:
+            self.first = time.perf_counter() - self.started
+        self.records += 1
+
+
+def scan_with_scanner(ssh_client, directory, mode, args):
+    """以LogScanner掃描，回傳 (Run, 耗時秒數, 重啟次數)"""
+    run = Run()
+    scanner = LogScanner(ssh_client, directory, scan_mode=mode, read_mode=args.read_mode, channels=args.channels,
+                         on_found=run.found, on_error=run.errors.append)
+    restart_count = scanner.scan()
+    return run, time.perf_counter() - run.started, restart_count
+
+
+def load_worker():
+    """載入FileReadWorker，沒有安裝Qt時回傳None"""
+    try:
+        from PyQt5.QtCore import QCoreApplication
+    except ImportError:
+        try:
+            from PySide2.QtCore import QCoreApplication
+        except ImportError:
+            return None, None
+    from ui.search import FileReadWorker
+    app = QCoreApplication.instance() or QCoreApplication([])
+    return FileReadWorker, app
+
+
+def scan_with_worker(worker_class, app, ssh_client, directory, mode, args):
+    """以FileReadWorker掃描並執行Qt事件迴圈，回傳 (Run, 耗時秒數, 重啟次數)"""
+    run = Run()
+    result = {}
+    worker = worker_class(ssh_client, directory, scan_mode=mode, read_mode=args.read_mode, channels=args.channels,
+                          device_helper=False)
+    worker.build_version_found.connect(run.found)
+    worker.error.connect(run.errors.append)
+    worker.restart_count.connect(lambda count: result.setdefault('restart_count', count))
+    worker.start()
+    while not worker.wait(5):
+        app.processEvents()
+    app.processEvents()
+    return run, time.perf_counter() - run.started, result.get('restart_count')
+
+
+def measure(scan, args, total_bytes):
+    """重複執行掃描並取最快的一次，另外以tracemalloc執行一次量測記憶體峰值"""
+    best = None
+    for _ in range(args.repeat):
+        run, seconds, restart_count = scan()
+        if run.errors:
+            raise RuntimeError("; ".join(run.errors[:3]))
+        if best is None or seconds < best[1]:
+            best = (run, seconds, restart_count)
+
+    run, seconds, restart_count = best
+    case = {
+        'seconds': round(seconds, 4),
+        'first_result_seconds': round(run.first, 4) if run.first is not None else None,
+        'files_per_second': round(args.files / seconds, 1),
+        'tree_mb_per_second': round(total_bytes / seconds / 1e6, 2),
+        'records': run.records,
+        'restart_count': restart_count,
+    }
+    if not args.no_memory:
+        # 替身伺服器在同一個行程中，峰值包含伺服器端轉送資料的暫存
+        tracemalloc.start()
+        scan()
+        case['peak_memory_mb'] = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+        tracemalloc.stop()
+    return case
+
+
+def compare(results, baseline_path):
+    """與先前的結果比較，輸出每個案例的耗時比例（大於1表示變慢）"""
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = dict(((case['runner'], case['scan_mode']), case) for case in json.load(f)['results'])
+    print("\ncompared with {}:".format(baseline_path))
+    for case in results:
+        previous = baseline.get((case['runner'], case['scan_mode']))
+        if not previous:
+            continue
+        print("{:<15} {:<9} time x{:.2f}  first result x{}".format(
+            case['runner'], case['scan_mode'], case['seconds'] / previous['seconds'],
+            "{:.2f}".format(case['first_result_seconds'] / previous['first_result_seconds'])
+            if case['first_result_seconds'] and previous.get('first_result_seconds') else "-"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end scan benchmark against a local stand-in AGV SSH server")
+    parser.add_argument("--files", type=int, default=500, help="number of log files")
+    parser.add_argument("--file-size-kb", type=int, default=64, help="size of each log file in KiB")
+    parser.add_argument("--missing-ratio", type=float, default=0.02,
+                        help="fraction of files without a build version (read in full)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="emulated round-trip latency")
+    parser.add_argument("--bandwidth-mbit", type=float, default=None, help="emulated bandwidth limit")
+    parser.add_argument("--modes", default=",".join(MODES), help="comma separated scan modes")
+    parser.add_argument("--read-mode", choices=(READ_MODE_BYTES, READ_MODE_LINES, READ_MODE_FULL),
+                        default=DEFAULT_READ_MODE)
+    parser.add_argument("--channels", type=int, default=DEFAULT_SCAN_CHANNELS, help="parallel channels")
+    parser.add_argument("--repeat", type=int, default=1, help="repetitions, the fastest run is reported")
+    parser.add_argument("--no-worker", action="store_true", help="skip the FileReadWorker runs even if Qt is installed")
+    parser.add_argument("--no-memory", action="store_true", help="skip the extra tracemalloc run")
+    parser.add_argument("--json", help="write results as JSON to this file")
+    parser.add_argument("--baseline", help="compare with results previously written by --json")
+    args = parser.parse_args()
+
+    modes = [mode.strip() for mode in args.modes.split(",") if mode.strip()]
+    for mode in modes:
+        if mode not in MODES:
+            parser.error("unknown scan mode '{}'".format(mode))
+
+    worker_class, app = (None, None) if args.no_worker else load_worker()
+    if worker_class is None and not args.no_worker:
+        print("PyQt5/PySide2 is not installed, only LogScanner was measured")
+
+    root = tempfile.mkdtemp(prefix="agv_tree_")
+    results = []
+    try:
+        directory = generate_log_tree(root, args.files, args.file_size_kb * 1024, args.missing_ratio) + "/"
+        total_bytes = sum(entry.stat().st_size for entry in os.scandir(directory))
+
+        with AGVSSHServer(latency_ms=args.latency_ms, bandwidth_mbit=args.bandwidth_mbit) as server:
+            started = time.perf_counter()
+            ssh_client = SSHClient()
+            success, message = ssh_client.connect("127.0.0.1", server.port, server.username, server.password)
+            if not success:
+                print("Error: {}".format(message), file=sys.stderr)
+                return 1
+            connect_seconds = time.perf_counter() - started
+            try:
+                for mode in modes:
+                    runners = [("LogScanner", lambda: scan_with_scanner(ssh_client, directory, mode, args))]
+                    if worker_class is not None:
+                        runners.append(("FileReadWorker", lambda: scan_with_worker(
+                            worker_class, app, ssh_client, directory, mode, args)))
+                    for runner, scan in runners:
+                        case = {'runner': runner, 'scan_mode': mode}
+                        case.update(measure(scan, args, total_bytes))
+                        results.append(case)
+            finally:
+                ssh_client.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    print("connect {:.3f} s, {} files, {:.1f} MB".format(connect_seconds, args.files, total_bytes / 1e6))
+    for case in results:
+        print("{:<15} {:<9} {:>8.3f} s  first {:>7} s  {:>8.1f} files/s  peak {} MB".format(
+            case['runner'], case['scan_mode'], case['seconds'],
+            "{:.3f}".format(case['first_result_seconds']) if case['first_result_seconds'] is not None else "-",
+            case['files_per_second'], case.get('peak_memory_mb', "-")))
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'benchmark': 'scan', 'python': sys.version.split()[0], 'paramiko': paramiko.__version__,
+                       'files': args.files, 'file_size_kb': args.file_size_kb,
+                       'missing_ratio': args.missing_ratio, 'latency_ms': args.latency_ms,
+                       'bandwidth_mbit': args.bandwidth_mbit, 'read_mode': args.read_mode, 'channels': args.channels,
+                       'connect_seconds': round(connect_seconds, 4), 'results': results}, f, indent=4)
+    if args.baseline:
+        compare(results, args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
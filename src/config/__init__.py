@@ -1,3 +1,6 @@
-from .config_manager import ConfigManager, config_manager
+from .config_manager import ConfigManager, SQLiteConfigManager, create_config_manager, config_manager
+from .scan_cache import ScanCache, scan_cache
+from .version_inventory import VersionInventory, version_inventory, parse_build_id
+from .profile_io import normalize_tags, read_profiles, write_profiles
 
-__all__ = ['ConfigManager', 'config_manager']
\ No newline at end of file
+__all__ = ['ConfigManager', 'SQLiteConfigManager', 'create_config_manager', 'config_manager', 'ScanCache', 'scan_cache', 'VersionInventory', 'version_inventory', 'parse_build_id', 'normalize_tags', 'read_profiles', 'write_profiles']
\ No newline at end of file
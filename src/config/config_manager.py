@@ -1,7 +1,16 @@
 import json
 import os
 import base64
-from typing import Dict, Any, Optional
+import sqlite3
+import tempfile
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+from .profile_io import normalize_tags, read_profiles, write_profiles
+
+
+# 設定為 sqlite 時全域實例改用SQLite儲存連線設定（ssh_config.db），適合數千台設備
+CONFIG_BACKEND_ENV = "AGV_CONFIG_BACKEND"
 
 
 class ConfigManager:
@@ -10,6 +19,12 @@ class ConfigManager:
     def __init__(self, config_file: str = "ssh_config.json"):
         self.config_file = config_file
         self.config_path = os.path.join(os.path.dirname(__file__), "..", self.config_file)
+        self._lock = threading.RLock()
+        # 設定檔內容快取，以檔案的 (修改時間, 大小) 判斷是否需要重新讀取
+        self._cache = None
+        self._cache_stamp = None
+        # 已解碼的連線設定 {profile名稱: 連線資訊}，第一次使用時才解碼密碼
+        self._decoded = {}
         
     def _encode_password(self, password: str) -> str:
         """簡單編碼密碼（僅用於基本混淆，不是真正的加密）"""
@@ -26,56 +41,122 @@ class ConfigManager:
         except:
             return ""
     
-    def save_config(self, ip: str, port: int, username: str, password: str = "", allow_no_password: bool = False, profile_name: str = None) -> bool:
-        """保存SSH連線配置"""
+    def _decode_connection(self, conn_data: Dict[str, Any]) -> Dict[str, Any]:
+        """將檔案中的連線資料轉為解碼後的連線資訊"""
+        return {
+            "ip": conn_data.get("ip", ""),
+            "port": conn_data.get("port", 22),
+            "username": conn_data.get("username", ""),
+            "password": self._decode_password(conn_data.get("password", "")),
+            "allow_no_password": conn_data.get("allow_no_password", False),
+            "timestamp": conn_data.get("timestamp", ""),
+            "tags": list(conn_data.get("tags") or [])
+        }
+    
+    def _build_connection_data(self, ip: str, port: int, username: str, password: str,
+                               allow_no_password: bool, tags: Optional[List[str]] = None) -> Dict[str, Any]:
+        """建立要保存的連線資料"""
+        return {
+            "ip": ip,
+            "port": port,
+            "username": username,
+            "password": self._encode_password(password) if password else "",
+            "allow_no_password": allow_no_password,
+            "timestamp": self._get_timestamp(),
+            "tags": normalize_tags(tags)
+        }
+    
+    def save_config(self, ip: str, port: int, username: str, password: str = "", allow_no_password: bool = False, profile_name: str = None, tags: Optional[List[str]] = None) -> bool:
+        """保存SSH連線配置，tags為None時保留該profile原有的標籤"""
         try:
-            # 載入現有配置
-            existing_config = self._load_raw_config()
-            if not existing_config:
-                existing_config = {"connections": {}, "last_connection": ""}
-            
-            # 確保connections字典存在
-            if "connections" not in existing_config:
-                existing_config["connections"] = {}
-            
-            # 生成profile名稱
-            if not profile_name:
-                profile_name = "{}@{}:{}".format(username, ip, port)
-            
-            # 保存連線設定
-            connection_data = {
-                "ip": ip,
-                "port": port,
-                "username": username,
-                "password": self._encode_password(password) if password else "",
-                "allow_no_password": allow_no_password,
-                "timestamp": self._get_timestamp()
-            }
-            
-            existing_config["connections"][profile_name] = connection_data
-            existing_config["last_connection"] = profile_name
-            
-            with open(self.config_path, 'w', encoding='utf-8') as f:
-                json.dump(existing_config, f, indent=4, ensure_ascii=False)
+            with self._lock:
+                # 載入現有配置（複製一份，寫入失敗時快取維持不變）
+                existing_config = dict(self._load_raw_config() or {"connections": {}, "last_connection": ""})
+                
+                # 確保connections字典存在
+                existing_config["connections"] = dict(existing_config.get("connections") or {})
+                
+                # 生成profile名稱
+                if not profile_name:
+                    profile_name = "{}@{}:{}".format(username, ip, port)
+                
+                # 保存連線設定
+                if tags is None:
+                    tags = existing_config["connections"].get(profile_name, {}).get("tags")
+                connection_data = self._build_connection_data(ip, port, username, password, allow_no_password, tags)
+                
+                existing_config["connections"][profile_name] = connection_data
+                existing_config["last_connection"] = profile_name
+                
+                self._write_raw_config(existing_config)
+                self._decoded.pop(profile_name, None)
             
             return True
         except Exception as e:
             print("Error saving config: {}".format(e))
             return False
     
+    def _file_stamp(self) -> Optional[Tuple[int, int]]:
+        """設定檔的 (修改時間ns, 大小)，檔案不存在時回傳None"""
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
     def _load_raw_config(self) -> Optional[Dict[str, Any]]:
-        """載入原始配置檔案"""
+        """載入原始配置檔案，檔案未變更時直接使用快取（回傳的內容不可直接修改）"""
         try:
-            if not os.path.exists(self.config_path):
-                return None
-                
-            with open(self.config_path, 'r', encoding='utf-8') as f:
-                config = json.load(f)
-            return config
+            with self._lock:
+                stamp = self._file_stamp()
+                if stamp is None:
+                    self._cache, self._cache_stamp, self._decoded = None, None, {}
+                    return None
+                if stamp == self._cache_stamp:
+                    return self._cache
+                    
+                with open(self.config_path, 'r', encoding='utf-8') as f:
+                    config = json.load(f)
+                self._cache, self._cache_stamp, self._decoded = config, stamp, {}
+                return config
         except Exception as e:
             print("Error loading raw config: {}".format(e))
             return None
     
+    def _write_raw_config(self, config: Dict[str, Any]):
+        """寫入配置檔案：先寫入同目錄的暫存檔再更名，寫到一半中斷或同時讀取都不會看到不完整的檔案"""
+        directory = os.path.dirname(os.path.abspath(self.config_path))
+        fd, temporary = tempfile.mkstemp(prefix=".{}.".format(os.path.basename(self.config_path)),
+                                         suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=4, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporary, self.config_path)
+        except BaseException:
+            try:
+                os.remove(temporary)
+            except OSError:
+                pass
+            raise
+        self._cache, self._cache_stamp = config, self._file_stamp()
+    
+    def _get_connection(self, profile_name: str, config: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """取得單一解碼後的連線資訊（快取中的物件，不可直接修改）"""
+        with self._lock:
+            if config is None:
+                config = self._load_raw_config()
+            if not config or "connections" not in config:
+                return None
+            connection = self._decoded.get(profile_name)
+            if connection is None:
+                conn_data = config["connections"].get(profile_name)
+                if conn_data is None:
+                    return None
+                connection = self._decoded[profile_name] = self._decode_connection(conn_data)
+            return connection
+    
     def load_config(self) -> Optional[Dict[str, Any]]:
         """載入最後使用的SSH連線配置"""
         try:
@@ -86,56 +167,112 @@ class ConfigManager:
             # 新格式：從connections中載入
             if "connections" in config and "last_connection" in config:
                 last_profile = config["last_connection"]
-                if last_profile and last_profile in config["connections"]:
-                    last_conn = config["connections"][last_profile]
-                    return {
-                        "ip": last_conn.get("ip", ""),
-                        "port": last_conn.get("port", 22),
-                        "username": last_conn.get("username", ""),
-                        "password": self._decode_password(last_conn.get("password", "")),
-                        "allow_no_password": last_conn.get("allow_no_password", False),
-                        "timestamp": last_conn.get("timestamp", ""),
-                        "profile_name": last_profile
-                    }
+                if last_profile and isinstance(last_profile, str):
+                    last_conn = self._get_connection(last_profile, config)
+                    if last_conn:
+                        result = dict(last_conn)
+                        result["profile_name"] = last_profile
+                        return result
             
             # 舊格式兼容性
             if "last_connection" in config and isinstance(config["last_connection"], dict):
-                last_conn = config["last_connection"]
-                return {
-                    "ip": last_conn.get("ip", ""),
-                    "port": last_conn.get("port", 22),
-                    "username": last_conn.get("username", ""),
-                    "password": self._decode_password(last_conn.get("password", "")),
-                    "allow_no_password": last_conn.get("allow_no_password", False),
-                    "timestamp": last_conn.get("timestamp", ""),
-                    "profile_name": None
-                }
+                result = self._decode_connection(config["last_connection"])
+                result["profile_name"] = None
+                return result
             
             return None
         except Exception as e:
             print("Error loading config: {}".format(e))
             return None
     
-    def get_all_connections(self) -> Dict[str, Dict[str, Any]]:
-        """獲取所有保存的連線設定"""
+    def get_profile_names(self) -> List[str]:
+        """獲取所有profile名稱（已排序，不解碼密碼）"""
         try:
             config = self._load_raw_config()
             if not config or "connections" not in config:
-                return {}
-            
-            # 解碼所有密碼
-            connections = {}
-            for profile_name, conn_data in config["connections"].items():
-                connections[profile_name] = {
-                    "ip": conn_data.get("ip", ""),
-                    "port": conn_data.get("port", 22),
-                    "username": conn_data.get("username", ""),
-                    "password": self._decode_password(conn_data.get("password", "")),
-                    "allow_no_password": conn_data.get("allow_no_password", False),
-                    "timestamp": conn_data.get("timestamp", "")
-                }
-            
-            return connections
+                return []
+            return sorted(config["connections"].keys())
+        except Exception as e:
+            print("Error getting profile names: {}".format(e))
+            return []
+    
+    def get_profile_summaries(self) -> List[Dict[str, Any]]:
+        """獲取所有profile的名稱、位址與標籤（依名稱排序，不解碼密碼），供快速選取清單使用"""
+        try:
+            config = self._load_raw_config()
+            if not config or "connections" not in config:
+                return []
+            return [{
+                "profile_name": profile_name,
+                "ip": conn_data.get("ip", ""),
+                "port": conn_data.get("port", 22),
+                "username": conn_data.get("username", ""),
+                "tags": list(conn_data.get("tags") or [])
+            } for profile_name, conn_data in sorted(config["connections"].items())]
+        except Exception as e:
+            print("Error getting profile summaries: {}".format(e))
+            return []
+    
+    def save_connections(self, profiles: List[Dict[str, Any]]) -> int:
+        """一次保存多筆連線設定（只寫入一次檔案），密碼為空時保留原有密碼，回傳保存的筆數"""
+        with self._lock:
+            config = dict(self._load_raw_config() or {"connections": {}, "last_connection": ""})
+            config["connections"] = connections = dict(config.get("connections") or {})
+            for profile in profiles:
+                profile_name = profile["profile_name"]
+                connection_data = self._build_connection_data(
+                    profile["ip"], profile.get("port", 22), profile.get("username", ""), profile.get("password", ""),
+                    profile.get("allow_no_password", False), profile.get("tags"))
+                if not connection_data["password"] and profile_name in connections:
+                    connection_data["password"] = connections[profile_name].get("password", "")
+                connections[profile_name] = connection_data
+                self._decoded.pop(profile_name, None)
+            self._write_raw_config(config)
+        return len(profiles)
+    
+    def import_profiles(self, path: str, tags: Optional[List[str]] = None) -> Tuple[bool, str]:
+        """從CSV或JSON設備清單匯入連線設定，tags會加到每一筆設定，回傳 (成功與否, 訊息)"""
+        try:
+            profiles, errors = read_profiles(path)
+        except Exception as e:
+            return False, "Failed to read {}: {}".format(path, e)
+        if not profiles:
+            return False, "No valid profiles in {}{}".format(path, "; " + "; ".join(errors[:5]) if errors else "")
+        
+        for profile in profiles:
+            profile["tags"] = normalize_tags(profile["tags"] + normalize_tags(tags))
+        try:
+            count = self.save_connections(profiles)
+        except Exception as e:
+            return False, "Failed to save profiles: {}".format(e)
+        
+        message = "Imported {} profiles".format(count)
+        if errors:
+            message += ", skipped {} invalid rows ({})".format(len(errors), "; ".join(errors[:5]))
+        return True, message
+    
+    def export_profiles(self, path: str, profile_names: Optional[List[str]] = None, include_passwords: bool = False) -> Tuple[bool, str]:
+        """將連線設定匯出為CSV或JSON（依副檔名），預設不包含密碼，回傳 (成功與否, 訊息)"""
+        try:
+            connections = self.get_all_connections()
+            if profile_names is not None:
+                connections = dict((name, connections[name]) for name in profile_names if name in connections)
+            count = write_profiles(path, sorted(connections.items()), include_passwords)
+            return True, "Exported {} profiles to {}".format(count, path)
+        except Exception as e:
+            return False, "Failed to export profiles: {}".format(e)
+    
+    def get_all_connections(self) -> Dict[str, Dict[str, Any]]:
+        """獲取所有保存的連線設定"""
+        try:
+            with self._lock:
+                config = self._load_raw_config()
+                if not config or "connections" not in config:
+                    return {}
+                
+                # 解碼所有密碼（已解碼的沿用快取），回傳副本讓呼叫端可以修改
+                return dict((profile_name, dict(self._get_connection(profile_name, config)))
+                            for profile_name in config["connections"])
         except Exception as e:
             print("Error getting all connections: {}".format(e))
             return {}
@@ -143,9 +280,9 @@ class ConfigManager:
     def load_connection_by_name(self, profile_name: str) -> Optional[Dict[str, Any]]:
         """根據profile名稱載入特定連線設定"""
         try:
-            connections = self.get_all_connections()
-            if profile_name in connections:
-                conn_data = connections[profile_name]
+            connection = self._get_connection(profile_name)
+            if connection is not None:
+                conn_data = dict(connection)
                 conn_data["profile_name"] = profile_name
                 return conn_data
             return None
@@ -156,22 +293,25 @@ class ConfigManager:
     def delete_connection(self, profile_name: str) -> bool:
         """刪除特定的連線設定"""
         try:
-            config = self._load_raw_config()
-            if not config or "connections" not in config:
-                return False
-            
-            if profile_name in config["connections"]:
-                del config["connections"][profile_name]
-                
-                # 如果刪除的是最後使用的連線，清空last_connection
-                if config.get("last_connection") == profile_name:
-                    config["last_connection"] = ""
-                
-                with open(self.config_path, 'w', encoding='utf-8') as f:
-                    json.dump(config, f, indent=4, ensure_ascii=False)
+            with self._lock:
+                config = self._load_raw_config()
+                if not config or "connections" not in config:
+                    return False
                 
-                return True
-            return False
+                if profile_name in config["connections"]:
+                    config = dict(config)
+                    config["connections"] = dict(config["connections"])
+                    del config["connections"][profile_name]
+                    
+                    # 如果刪除的是最後使用的連線，清空last_connection
+                    if config.get("last_connection") == profile_name:
+                        config["last_connection"] = ""
+                    
+                    self._write_raw_config(config)
+                    self._decoded.pop(profile_name, None)
+                    
+                    return True
+                return False
         except Exception as e:
             print("Error deleting connection: {}".format(e))
             return False
@@ -179,8 +319,10 @@ class ConfigManager:
     def clear_config(self) -> bool:
         """清除配置文件"""
         try:
-            if os.path.exists(self.config_path):
-                os.remove(self.config_path)
+            with self._lock:
+                if os.path.exists(self.config_path):
+                    os.remove(self.config_path)
+                self._cache, self._cache_stamp, self._decoded = None, None, {}
             return True
         except Exception as e:
             print("Error clearing config: {}".format(e))
@@ -211,5 +353,255 @@ class ConfigManager:
             return {"exists": False, "size": 0, "modified": ""}
 
 
+class SQLiteConfigManager(ConfigManager):
+    """以SQLite保存連線設定的配置管理器，介面與ConfigManager相同
+
+    每個profile一列，以profile名稱為主鍵：單筆查詢、保存與刪除只讀寫該列，不需要重寫整個檔案。
+    資料庫不存在但同目錄有ssh_config.json時，第一次使用會匯入其中的設定。
+    """
+    
+    def __init__(self, config_file: str = "ssh_config.db", import_file: Optional[str] = "ssh_config.json"):
+        super().__init__(config_file)
+        self.import_path = os.path.join(os.path.dirname(__file__), "..", import_file) if import_file else None
+        self._initialized = False
+        
+    def _connect(self) -> sqlite3.Connection:
+        """開啟資料庫連線，第一次使用時建立資料表並匯入JSON設定檔"""
+        conn = sqlite3.connect(self.config_path, timeout=10)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS connections ("
+                "profile TEXT PRIMARY KEY, "
+                "ip TEXT NOT NULL, "
+                "port INTEGER NOT NULL, "
+                "username TEXT NOT NULL, "
+                "password TEXT NOT NULL, "
+                "allow_no_password INTEGER NOT NULL, "
+                "timestamp TEXT NOT NULL, "
+                "tags TEXT NOT NULL DEFAULT '[]')"
+            )
+            # 沒有標籤欄位的舊資料庫
+            if "tags" not in [row[1] for row in conn.execute("PRAGMA table_info(connections)")]:
+                conn.execute("ALTER TABLE connections ADD COLUMN tags TEXT NOT NULL DEFAULT '[]'")
+            conn.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            if self.import_path and conn.execute("SELECT COUNT(*) FROM settings").fetchone()[0] == 0:
+                self._import_json(conn)
+            conn.commit()
+            self._initialized = True
+        return conn
+    
+    def _import_json(self, conn: sqlite3.Connection):
+        """匯入JSON設定檔中的連線設定（只在資料庫第一次建立時執行）"""
+        raw = {}
+        if os.path.exists(self.import_path):
+            try:
+                with open(self.import_path, 'r', encoding='utf-8') as f:
+                    raw = json.load(f)
+            except Exception as e:
+                print("Error importing config: {}".format(e))
+        connections = raw.get("connections") or {}
+        conn.executemany(
+            "INSERT OR IGNORE INTO connections VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [(name, data.get("ip", ""), data.get("port", 22), data.get("username", ""), data.get("password", ""),
+              int(bool(data.get("allow_no_password", False))), data.get("timestamp", ""),
+              json.dumps(normalize_tags(data.get("tags")), ensure_ascii=False))
+             for name, data in connections.items()])
+        last_connection = raw.get("last_connection")
+        conn.execute("INSERT OR REPLACE INTO settings VALUES ('last_connection', ?)",
+                     (last_connection if isinstance(last_connection, str) else "",))
+    
+    def _row_to_connection(self, row: tuple) -> Dict[str, Any]:
+        """將資料列 (ip, port, username, password, allow_no_password, timestamp, tags) 轉為連線資訊"""
+        return {
+            "ip": row[0],
+            "port": row[1],
+            "username": row[2],
+            "password": self._decode_password(row[3]),
+            "allow_no_password": bool(row[4]),
+            "timestamp": row[5],
+            "tags": json.loads(row[6])
+        }
+    
+    def _data_to_row(self, profile_name: str, data: Dict[str, Any]) -> tuple:
+        """將 _build_connection_data 的結果轉為資料列"""
+        return (profile_name, data["ip"], data["port"], data["username"], data["password"],
+                int(bool(data["allow_no_password"])), data["timestamp"], json.dumps(data["tags"], ensure_ascii=False))
+    
+    def save_config(self, ip: str, port: int, username: str, password: str = "", allow_no_password: bool = False, profile_name: str = None, tags: Optional[List[str]] = None) -> bool:
+        """保存SSH連線配置（只寫入該profile），tags為None時保留該profile原有的標籤"""
+        try:
+            if not profile_name:
+                profile_name = "{}@{}:{}".format(username, ip, port)
+            data = self._build_connection_data(ip, port, username, password, allow_no_password, tags)
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute(
+                        "INSERT INTO connections VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT (profile) DO UPDATE SET ip = excluded.ip, port = excluded.port, "
+                        "username = excluded.username, password = excluded.password, "
+                        "allow_no_password = excluded.allow_no_password, timestamp = excluded.timestamp"
+                        + ("" if tags is None else ", tags = excluded.tags"), self._data_to_row(profile_name, data))
+                    conn.execute("INSERT OR REPLACE INTO settings VALUES ('last_connection', ?)", (profile_name,))
+                    conn.commit()
+                finally:
+                    conn.close()
+            return True
+        except Exception as e:
+            print("Error saving config: {}".format(e))
+            return False
+    
+    def _query_connection(self, conn: sqlite3.Connection, profile_name: str) -> Optional[Dict[str, Any]]:
+        """以主鍵查詢單一profile"""
+        row = conn.execute(
+            "SELECT ip, port, username, password, allow_no_password, timestamp, tags FROM connections WHERE profile = ?",
+            (profile_name,)).fetchone()
+        return self._row_to_connection(row) if row else None
+    
+    def load_config(self) -> Optional[Dict[str, Any]]:
+        """載入最後使用的SSH連線配置"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    row = conn.execute("SELECT value FROM settings WHERE key = 'last_connection'").fetchone()
+                    if not row or not row[0]:
+                        return None
+                    connection = self._query_connection(conn, row[0])
+                finally:
+                    conn.close()
+            if connection:
+                connection["profile_name"] = row[0]
+            return connection
+        except Exception as e:
+            print("Error loading config: {}".format(e))
+            return None
+    
+    def get_profile_names(self) -> List[str]:
+        """獲取所有profile名稱（已排序，不解碼密碼）"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    return [row[0] for row in conn.execute("SELECT profile FROM connections ORDER BY profile")]
+                finally:
+                    conn.close()
+        except Exception as e:
+            print("Error getting profile names: {}".format(e))
+            return []
+    
+    def get_profile_summaries(self) -> List[Dict[str, Any]]:
+        """獲取所有profile的名稱、位址與標籤（依名稱排序，不解碼密碼），供快速選取清單使用"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    rows = conn.execute("SELECT profile, ip, port, username, tags FROM connections "
+                                        "ORDER BY profile").fetchall()
+                finally:
+                    conn.close()
+            return [{"profile_name": row[0], "ip": row[1], "port": row[2], "username": row[3],
+                     "tags": json.loads(row[4])} for row in rows]
+        except Exception as e:
+            print("Error getting profile summaries: {}".format(e))
+            return []
+    
+    def save_connections(self, profiles: List[Dict[str, Any]]) -> int:
+        """一次保存多筆連線設定（單一交易），密碼為空時保留原有密碼，回傳保存的筆數"""
+        rows = [self._data_to_row(profile["profile_name"], self._build_connection_data(
+            profile["ip"], profile.get("port", 22), profile.get("username", ""), profile.get("password", ""),
+            profile.get("allow_no_password", False), profile.get("tags"))) for profile in profiles]
+        with self._lock:
+            conn = self._connect()
+            try:
+                conn.executemany(
+                    "INSERT INTO connections VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT (profile) DO UPDATE SET ip = excluded.ip, port = excluded.port, "
+                    "username = excluded.username, "
+                    "password = CASE WHEN excluded.password = '' THEN connections.password ELSE excluded.password END, "
+                    "allow_no_password = excluded.allow_no_password, timestamp = excluded.timestamp, "
+                    "tags = excluded.tags", rows)
+                conn.commit()
+            finally:
+                conn.close()
+        return len(rows)
+    
+    def get_all_connections(self) -> Dict[str, Dict[str, Any]]:
+        """獲取所有保存的連線設定"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    rows = conn.execute("SELECT profile, ip, port, username, password, allow_no_password, timestamp, "
+                                        "tags FROM connections").fetchall()
+                finally:
+                    conn.close()
+            return dict((row[0], self._row_to_connection(row[1:])) for row in rows)
+        except Exception as e:
+            print("Error getting all connections: {}".format(e))
+            return {}
+    
+    def load_connection_by_name(self, profile_name: str) -> Optional[Dict[str, Any]]:
+        """根據profile名稱載入特定連線設定"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    connection = self._query_connection(conn, profile_name)
+                finally:
+                    conn.close()
+            if connection:
+                connection["profile_name"] = profile_name
+            return connection
+        except Exception as e:
+            print("Error loading connection by name: {}".format(e))
+            return None
+    
+    def delete_connection(self, profile_name: str) -> bool:
+        """刪除特定的連線設定"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    deleted = conn.execute("DELETE FROM connections WHERE profile = ?", (profile_name,)).rowcount
+                    # 如果刪除的是最後使用的連線，清空last_connection
+                    conn.execute("UPDATE settings SET value = '' WHERE key = 'last_connection' AND value = ?",
+                                 (profile_name,))
+                    conn.commit()
+                finally:
+                    conn.close()
+            return deleted > 0
+        except Exception as e:
+            print("Error deleting connection: {}".format(e))
+            return False
+    
+    def clear_config(self) -> bool:
+        """清除所有連線設定（不會再次匯入JSON設定檔）"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    conn.execute("DELETE FROM connections")
+                    conn.execute("INSERT OR REPLACE INTO settings VALUES ('last_connection', '')")
+                    conn.commit()
+                finally:
+                    conn.close()
+            return True
+        except Exception as e:
+            print("Error clearing config: {}".format(e))
+            return False
+
+
+def create_config_manager(config_file: Optional[str] = None) -> ConfigManager:
+    """依檔名建立配置管理器：.db 使用SQLite；未指定時依環境變數 AGV_CONFIG_BACKEND 選擇"""
+    if config_file is None:
+        if os.environ.get(CONFIG_BACKEND_ENV, "").lower() == "sqlite":
+            return SQLiteConfigManager()
+        return ConfigManager()
+    if config_file.endswith(".db"):
+        return SQLiteConfigManager(config_file)
+    return ConfigManager(config_file)
+
+
 # 創建全域實例
-config_manager = ConfigManager()
\ No newline at end of file
+config_manager = create_config_manager()
\ No newline at end of file
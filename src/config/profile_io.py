@@ -0,0 +1,133 @@
+import csv
+import json
+import os
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+# 檔案中可使用的欄位名稱與別名
+COLUMN_ALIASES = {
+    "profile": "profile_name",
+    "profile_name": "profile_name",
+    "name": "profile_name",
+    "ip": "ip",
+    "host": "ip",
+    "address": "ip",
+    "port": "port",
+    "username": "username",
+    "user": "username",
+    "password": "password",
+    "allow_no_password": "allow_no_password",
+    "tags": "tags",
+}
+EXPORT_COLUMNS = ("profile", "ip", "port", "username", "password", "allow_no_password", "tags")
+TRUE_VALUES = ("1", "true", "yes", "y")
+
+
+def normalize_tags(value: Any) -> List[str]:
+    """將標籤字串（以 ; 或 , 分隔）或清單轉為不重複、保持順序的標籤清單"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.replace(",", ";").split(";")
+    tags = []
+    for tag in value:
+        tag = str(tag).strip()
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+
+def parse_profile(row: Dict[str, Any]) -> Dict[str, Any]:
+    """驗證並轉換一筆設備資料，其他欄位（例如site、line）轉為 "欄位:值" 標籤；資料不正確時拋出ValueError"""
+    entry = {}
+    extra_tags = []
+    for key, value in row.items():
+        if key is None:
+            continue
+        column = COLUMN_ALIASES.get(str(key).strip().lower())
+        if column:
+            entry[column] = value
+        elif value not in (None, ""):
+            extra_tags.append("{}:{}".format(str(key).strip(), str(value).strip()))
+
+    ip = str(entry.get("ip") or "").strip()
+    if not ip:
+        raise ValueError("missing ip")
+    try:
+        port = int(entry.get("port") or 22)
+    except (TypeError, ValueError):
+        raise ValueError("invalid port '{}'".format(entry.get("port")))
+    if not 0 < port < 65536:
+        raise ValueError("invalid port '{}'".format(port))
+    username = str(entry.get("username") or "root").strip()
+    allow_no_password = entry.get("allow_no_password", False)
+    if isinstance(allow_no_password, str):
+        allow_no_password = allow_no_password.strip().lower() in TRUE_VALUES
+
+    return {
+        "profile_name": str(entry.get("profile_name") or "").strip() or "{}@{}:{}".format(username, ip, port),
+        "ip": ip,
+        "port": port,
+        "username": username,
+        "password": str(entry.get("password") or ""),
+        "allow_no_password": bool(allow_no_password),
+        "tags": normalize_tags(normalize_tags(entry.get("tags")) + extra_tags)
+    }
+
+
+def read_profiles(path: str) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """讀取CSV或JSON設備清單，回傳 (設備資料清單, 錯誤訊息清單)
+
+    JSON可以是設備物件的清單，或 {"profiles": [...]}；CSV第一列為欄位名稱。
+    """
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        rows = data.get("profiles", []) if isinstance(data, dict) else data
+        if not isinstance(rows, list):
+            raise ValueError("JSON inventory must be a list of profiles")
+        labels = ["entry {}".format(index + 1) for index in range(len(rows))]
+    else:
+        # utf-8-sig 可讀取Excel輸出的CSV
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            rows = list(csv.DictReader(f))
+        labels = ["line {}".format(index + 2) for index in range(len(rows))]
+
+    profiles = []
+    errors = []
+    for label, row in zip(labels, rows):
+        if not isinstance(row, dict):
+            errors.append("{}: not an object".format(label))
+            continue
+        try:
+            profiles.append(parse_profile(row))
+        except ValueError as e:
+            errors.append("{}: {}".format(label, e))
+    return profiles, errors
+
+
+def write_profiles(path: str, connections: Iterable[Tuple[str, Dict[str, Any]]], include_passwords: bool = False) -> int:
+    """將 (profile名稱, 連線資訊) 寫入CSV或JSON（依副檔名），回傳筆數"""
+    rows = []
+    for profile_name, connection in connections:
+        rows.append({
+            "profile": profile_name,
+            "ip": connection.get("ip", ""),
+            "port": connection.get("port", 22),
+            "username": connection.get("username", ""),
+            "password": connection.get("password", "") if include_passwords else "",
+            "allow_no_password": bool(connection.get("allow_no_password", False)),
+            "tags": list(connection.get("tags", []))
+        })
+
+    if os.path.splitext(path)[1].lower() == ".json":
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({"profiles": rows}, f, indent=4, ensure_ascii=False)
+    else:
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=EXPORT_COLUMNS)
+            writer.writeheader()
+            for row in rows:
+                row["tags"] = ";".join(row["tags"])
+                writer.writerow(row)
+    return len(rows)
@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# 每台主機最多保留的快取筆數，超過時依最後使用時間淘汰
+DEFAULT_MAX_ENTRIES_PER_HOST = 50000
+
+
+class ScanCache:
+    """日誌掃描結果快取，以 (主機, 路徑, 大小, 修改時間) 判斷檔案是否變更"""
+
+    def __init__(self, cache_file: str = "scan_cache.db", max_entries_per_host: int = DEFAULT_MAX_ENTRIES_PER_HOST):
+        self.cache_file = cache_file
+        self.cache_path = os.path.join(os.path.dirname(__file__), "..", self.cache_file)
+        self.max_entries_per_host = max_entries_per_host
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """開啟資料庫連線，第一次使用時建立資料表"""
+        conn = sqlite3.connect(self.cache_path, timeout=10)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS scan_records ("
+                "host TEXT NOT NULL, "
+                "path TEXT NOT NULL, "
+                "size INTEGER NOT NULL, "
+                "mtime INTEGER NOT NULL, "
+                "line TEXT NOT NULL, "
+                "last_used REAL NOT NULL, "
+                "PRIMARY KEY (host, path))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_scan_records_lru ON scan_records (host, last_used)")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def get_many(self, host: str, entries: Iterable[Tuple[str, int, int]]) -> Dict[str, str]:
+        """查詢多個檔案的快取，回傳 {路徑: build version行}，只包含大小與修改時間都相符的檔案
+
+        build version行為空字串表示該檔案已確認不含build version。
+        """
+        entries = [entry for entry in entries if entry[1] >= 0 and entry[2] >= 0]
+        if not entries:
+            return {}
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    cached = {}
+                    for path, size, mtime, line in conn.execute(
+                            "SELECT path, size, mtime, line FROM scan_records WHERE host = ?", (host,)):
+                        cached[path] = (size, mtime, line)
+
+                    hits = {}
+                    for path, size, mtime in entries:
+                        record = cached.get(path)
+                        if record and record[0] == size and record[1] == mtime:
+                            hits[path] = record[2]
+
+                    if hits:
+                        now = time.time()
+                        conn.executemany(
+                            "UPDATE scan_records SET last_used = ? WHERE host = ? AND path = ?",
+                            [(now, host, path) for path in hits])
+                        conn.commit()
+                    return hits
+                finally:
+                    conn.close()
+        except Exception as e:
+            print("Error reading scan cache: {}".format(e))
+            return {}
+
+    def put_many(self, host: str, records: Iterable[Tuple[str, int, int, str]]) -> bool:
+        """寫入多筆 (路徑, 大小, 修改時間, build version行) 快取並依容量上限淘汰舊資料"""
+        records = [record for record in records if record[1] >= 0 and record[2] >= 0]
+        if not records:
+            return True
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    now = time.time()
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO scan_records (host, path, size, mtime, line, last_used) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        [(host, path, size, mtime, line, now) for path, size, mtime, line in records])
+                    self._evict(conn, host)
+                    conn.commit()
+                    return True
+                finally:
+                    conn.close()
+        except Exception as e:
+            print("Error writing scan cache: {}".format(e))
+            return False
+
+    def _evict(self, conn: sqlite3.Connection, host: str) -> None:
+        """超過每台主機容量上限時，刪除最久未使用的紀錄"""
+        count = conn.execute("SELECT COUNT(*) FROM scan_records WHERE host = ?", (host,)).fetchone()[0]
+        excess = count - self.max_entries_per_host
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM scan_records WHERE rowid IN ("
+                "SELECT rowid FROM scan_records WHERE host = ? ORDER BY last_used ASC LIMIT ?)",
+                (host, excess))
+
+    def clear(self, host: Optional[str] = None) -> bool:
+        """清除快取，未指定主機時清除全部"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    if host is None:
+                        conn.execute("DELETE FROM scan_records")
+                    else:
+                        conn.execute("DELETE FROM scan_records WHERE host = ?", (host,))
+                    conn.commit()
+                    return True
+                finally:
+                    conn.close()
+        except Exception as e:
+            print("Error clearing scan cache: {}".format(e))
+            return False
+
+    def get_hosts(self) -> List[str]:
+        """取得快取中所有主機"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    return [row[0] for row in conn.execute("SELECT DISTINCT host FROM scan_records")]
+                finally:
+                    conn.close()
+        except Exception as e:
+            print("Error reading scan cache: {}".format(e))
+            return []
+
+
+# 創建全域實例
+scan_cache = ScanCache()
@@ -0,0 +1,233 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from scan.core import parse_filename_datetime
+from scan.time_index import to_epoch, from_epoch
+
+
+# 最後一段版本沒有結束時間（仍在執行或尚未掃描到下一次開機）
+OPEN_END = 2 ** 62
+
+# 實際日誌的版本後面緊接NUL字元，不可納入建構版本
+_BUILD_PATTERN = re.compile(r'build version\s*:\s*([^\s\x00]+)', re.IGNORECASE)
+
+
+def parse_build_id(record) -> Optional[str]:
+    """取得紀錄的完整建構版本（例如 2.0.11-pre.202507030550），無法解析時回傳None"""
+    match = _BUILD_PATTERN.search(record.full_line or "")
+    if match:
+        return match.group(1)
+    if record.version and record.version != "Unknown":
+        return record.version
+    return None
+
+
+class VersionInventory:
+    """車隊版本清冊，記錄每台設備每次開機時的建構版本
+
+    資料保存在SQLite中，查詢時使用記憶體中的索引：每台設備依開機時間排序的版本，
+    以及每個版本在每台設備上連續執行的時間區段，都以二分搜尋查詢。
+    同一台設備連續以相同版本開機視為同一個區段，區段在下一次以其他版本開機時結束。
+    """
+
+    def __init__(self, inventory_file: str = "version_inventory.db"):
+        self.inventory_file = inventory_file
+        self.inventory_path = os.path.join(os.path.dirname(__file__), "..", self.inventory_file)
+        self._lock = threading.Lock()
+        self._initialized = False
+        self._boots = None  # 主機 -> (開機時間array, 版本list)，第一次查詢時由資料庫載入
+        self._runs = {}  # 版本 -> 主機 -> (區段開始array, 區段結束array)
+
+    def _connect(self) -> sqlite3.Connection:
+        """開啟資料庫連線，第一次使用時建立資料表"""
+        conn = sqlite3.connect(self.inventory_path, timeout=10)
+        if not self._initialized:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS boots ("
+                "host TEXT NOT NULL, "
+                "path TEXT NOT NULL, "
+                "boot_time INTEGER NOT NULL, "
+                "build TEXT NOT NULL, "
+                "added REAL NOT NULL, "
+                "PRIMARY KEY (host, boot_time))"
+            )
+            # 先前以per_file/sftp模式寫入的建構版本可能帶有結尾的NUL字元
+            conn.execute("UPDATE boots SET build = replace(build, char(0), '') WHERE instr(build, char(0)) > 0")
+            conn.commit()
+            self._initialized = True
+        return conn
+
+    def _ensure_loaded(self, conn: sqlite3.Connection) -> None:
+        """第一次使用時由資料庫建立記憶體索引"""
+        if self._boots is not None:
+            return
+        boots = {}
+        for host, boot_time, build in conn.execute("SELECT host, boot_time, build FROM boots ORDER BY host, boot_time"):
+            epochs, builds = boots.setdefault(host, (array('q'), []))
+            epochs.append(boot_time)
+            builds.append(build)
+        self._boots = boots
+        self._runs = {}
+        for host in boots:
+            self._index_host(host)
+
+    def _index_host(self, host: str) -> None:
+        """重新計算單一主機的版本區段"""
+        for hosts in self._runs.values():
+            hosts.pop(host, None)
+        epochs, builds = self._boots[host]
+        for position, build in enumerate(builds):
+            if position > 0 and builds[position - 1] == build:
+                continue
+            end = position + 1
+            while end < len(builds) and builds[end] == build:
+                end += 1
+            starts, ends = self._runs.setdefault(build, {}).setdefault(host, (array('q'), array('q')))
+            starts.append(epochs[position])
+            ends.append(epochs[end] if end < len(builds) else OPEN_END)
+
+    def add_records(self, host: str, records: Iterable) -> int:
+        """加入一台主機的開機紀錄（BootRecord），回傳新增或變更的筆數
+
+        以開機時間識別同一次開機：.tmp檔更名後路徑改變，只更新路徑，不會重複計算。
+        """
+        rows = []
+        for record in records:
+            boot = parse_filename_datetime(record.filename)
+            build = parse_build_id(record)
+            if boot and build:
+                rows.append((host, record.path, to_epoch(boot), build))
+        if not rows:
+            return 0
+
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    before = conn.total_changes
+                    now = time.time()
+                    conn.executemany(
+                        "INSERT INTO boots (host, path, boot_time, build, added) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT (host, boot_time) DO UPDATE SET path = excluded.path, build = excluded.build "
+                        "WHERE boots.path != excluded.path OR boots.build != excluded.build",
+                        [row + (now,) for row in rows])
+                    conn.commit()
+                    added = conn.total_changes - before
+
+                    # 記憶體索引已載入時只更新這台主機
+                    if added and self._boots is not None:
+                        epochs, builds = array('q'), []
+                        for boot_time, build in conn.execute(
+                                "SELECT boot_time, build FROM boots WHERE host = ? ORDER BY boot_time", (host,)):
+                            epochs.append(boot_time)
+                            builds.append(build)
+                        self._boots[host] = (epochs, builds)
+                        self._index_host(host)
+                    return added
+                finally:
+                    conn.close()
+        except Exception as e:
+            print("Error writing version inventory: {}".format(e))
+            return 0
+
+    def _query(self, query, default):
+        """在載入索引後執行查詢，資料庫錯誤時回傳default"""
+        try:
+            with self._lock:
+                if self._boots is None:
+                    conn = self._connect()
+                    try:
+                        self._ensure_loaded(conn)
+                    finally:
+                        conn.close()
+                return query()
+        except Exception as e:
+            print("Error reading version inventory: {}".format(e))
+            return default
+
+    def version_at(self, host: str, when: datetime) -> Optional[str]:
+        """主機在指定時間執行的版本（該時間之前最後一次開機的版本），沒有紀錄時回傳None"""
+        def query():
+            epochs, builds = self._boots.get(host, ((), ()))
+            position = bisect_right(epochs, to_epoch(when)) - 1
+            return builds[position] if position >= 0 else None
+        return self._query(query, None)
+
+    def hosts_running(self, build: str, start_time: Optional[datetime] = None,
+                      end_time: Optional[datetime] = None) -> List[Tuple[str, str, datetime, Optional[datetime]]]:
+        """在時間範圍內執行過指定版本的主機，回傳 [(主機, 版本, 區段開始, 區段結束)]
+
+        build可以是完整的建構版本，也可以只有版本號（例如 2.0.11，符合所有 2.0.11-* 建構）；
+        區段結束為None表示該版本仍在執行。
+        """
+        def query():
+            start = -OPEN_END if start_time is None else to_epoch(start_time)
+            end = OPEN_END if end_time is None else to_epoch(end_time)
+            result = []
+            for name, hosts in self._runs.items():
+                if name != build and not name.startswith(build + "-"):
+                    continue
+                for host, (starts, ends) in hosts.items():
+                    # 同一主機同一版本的區段互不重疊且依時間排列，從最後一個在範圍結束前開始的區段往回找
+                    position = bisect_right(starts, end) - 1
+                    while position >= 0 and ends[position] > start:
+                        result.append((host, name, from_epoch(starts[position]),
+                                       None if ends[position] == OPEN_END else from_epoch(ends[position])))
+                        position -= 1
+            result.sort(key=lambda run: (run[0], run[2]))
+            return result
+        return self._query(query, [])
+
+    def history(self, host: str) -> List[Tuple[str, datetime, Optional[datetime], int]]:
+        """主機的版本歷史，回傳 [(版本, 區段開始, 區段結束, 開機次數)]，依時間排列"""
+        def query():
+            epochs, builds = self._boots.get(host, ((), ()))
+            result = []
+            for position, build in enumerate(builds):
+                if result and result[-1][0] == build:
+                    result[-1][3] += 1
+                    continue
+                if result:
+                    result[-1][2] = from_epoch(epochs[position])
+                result.append([build, from_epoch(epochs[position]), None, 1])
+            return [tuple(run) for run in result]
+        return self._query(query, [])
+
+    def versions(self) -> Dict[str, int]:
+        """所有版本與執行過該版本的主機數"""
+        return self._query(lambda: dict((build, len(hosts)) for build, hosts in self._runs.items()), {})
+
+    def get_hosts(self) -> List[str]:
+        """清冊中所有主機"""
+        return self._query(lambda: sorted(self._boots), [])
+
+    def clear(self, host: Optional[str] = None) -> bool:
+        """清除清冊，未指定主機時清除全部"""
+        try:
+            with self._lock:
+                conn = self._connect()
+                try:
+                    if host is None:
+                        conn.execute("DELETE FROM boots")
+                    else:
+                        conn.execute("DELETE FROM boots WHERE host = ?", (host,))
+                    conn.commit()
+                    self._boots = None
+                    self._runs = {}
+                    return True
+                finally:
+                    conn.close()
+        except Exception as e:
+            print("Error clearing version inventory: {}".format(e))
+            return False
+
+
+# 創建全域實例
+version_inventory = VersionInventory()
@@ -0,0 +1,402 @@
+import sys
+import os
+import time
+import random
+import signal
+import asyncio
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import scan_trace
+from config import create_config_manager, config_manager, scan_cache, version_inventory, parse_build_id
+from scan.core import DEFAULT_LOG_DIRECTORY, parse_filename_datetime
+from scan.fleet import get_host_key, scan_fleet_host
+from scan.time_index import to_epoch
+
+
+# 車隊輪詢服務：不載入Qt，依ConfigManager中的設定定期掃描每台AGV，
+# 以OpenMetrics文字格式（檔案或本機HTTP端點）提供重啟次數、目前版本、掃描耗時與SSH錯誤次數
+
+DEFAULT_POLL_INTERVAL = 300
+DEFAULT_MAX_SESSIONS = 64
+DEFAULT_HOST_TIMEOUT = 300
+# 重新讀取連線設定的間隔秒數，新增或刪除的設備不需要重新啟動服務
+DEFAULT_PROFILE_REFRESH = 60
+# 指標檔案最短的寫入間隔秒數
+METRICS_WRITE_INTERVAL = 5
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+# 失敗的階段：連線、列出檔案、讀取檔案、整台設備逾時
+ERROR_STAGES = ("connect", "listing", "scan", "timeout")
+MAX_ERROR_LENGTH = 200
+
+# (名稱, 類型, 說明)
+METRIC_FAMILIES = (
+    ("agv_up", "gauge", "Whether the last poll of the AGV succeeded"),
+    ("agv_restarts", "gauge", "Boot logs with a build version currently on the AGV"),
+    ("agv_last_boot_timestamp_seconds", "gauge", "Boot time of the newest log, from its file name"),
+    ("agv_build", "info", "Build version of the newest boot"),
+    ("agv_scan_duration_seconds", "gauge", "Duration of the last poll"),
+    ("agv_last_poll_timestamp_seconds", "gauge", "When the last poll finished"),
+    ("agv_polls", "counter", "Polls since the poller started"),
+    ("agv_scanned_files", "counter", "Log files read from the AGV because they were new or changed"),
+    ("agv_ssh_errors", "counter", "Failed polls by stage"),
+)
+
+
+class HostState:
+    """單一設備的最新狀態，只保留固定數量的欄位，長時間執行也不會累積資料"""
+    __slots__ = ('profile', 'host', 'up', 'restart_count', 'build', 'last_boot', 'duration', 'last_poll',
+                 'polls', 'scanned_files', 'errors', 'last_error', 'inventoried')
+
+    def __init__(self, profile, host):
+        self.profile = profile
+        self.host = host
+        self.up = None
+        self.restart_count = None
+        self.build = None
+        self.last_boot = None
+        self.duration = None
+        self.last_poll = None
+        self.polls = 0
+        self.scanned_files = 0
+        self.errors = dict((stage, 0) for stage in ERROR_STAGES)
+        self.last_error = None
+        # 第一次輪詢時將設備上所有紀錄寫入版本清冊，之後只寫入新讀取的紀錄
+        self.inventoried = False
+
+
+def escape_label(value):
+    """OpenMetrics標籤值的跳脫"""
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(labels):
+    """將 [(名稱, 值)] 轉為 {名稱="值",...}"""
+    return "{" + ",".join("{}=\"{}\"".format(name, escape_label(value)) for name, value in labels) + "}"
+
+
+class FleetMetrics:
+    """所有設備的狀態與OpenMetrics輸出，可在輪詢執行緒與HTTP執行緒間共用"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hosts = {}  # 設定名稱 -> HostState
+        self.dirty = False
+
+    def state(self, profile, host):
+        """取得設備的狀態，不存在或主機改變時建立新的"""
+        with self._lock:
+            state = self._hosts.get(profile)
+            if state is None or state.host != host:
+                state = self._hosts[profile] = HostState(profile, host)
+            return state
+
+    def retain(self, profiles):
+        """移除已不在設定中的設備"""
+        with self._lock:
+            for profile in list(self._hosts):
+                if profile not in profiles:
+                    del self._hosts[profile]
+                    self.dirty = True
+
+    def update(self, state, result, build, last_boot):
+        """以一次輪詢的結果更新設備狀態"""
+        with self._lock:
+            state.polls += 1
+            state.duration = result['duration']
+            state.last_poll = time.time()
+            if result['error']:
+                state.up = 0
+                stage = result.get('error_stage') or "scan"
+                state.errors[stage] = state.errors.get(stage, 0) + 1
+                state.last_error = result['error'][:MAX_ERROR_LENGTH]
+            else:
+                state.up = 1
+                state.restart_count = result['restart_count']
+                state.scanned_files += result.get('scanned_files', 0)
+                state.build = build or state.build
+                state.last_boot = last_boot or state.last_boot
+            self.dirty = True
+
+    def render(self):
+        """輸出OpenMetrics文字格式"""
+        with self._lock:
+            states = sorted(self._hosts.values(), key=lambda state: state.profile)
+            samples = dict((name, []) for name, kind, help_text in METRIC_FAMILIES)
+            for state in states:
+                labels = [("profile", state.profile), ("host", state.host)]
+                if state.up is not None:
+                    samples['agv_up'].append(("", labels, state.up))
+                if state.restart_count is not None:
+                    samples['agv_restarts'].append(("", labels, state.restart_count))
+                if state.last_boot is not None:
+                    samples['agv_last_boot_timestamp_seconds'].append(("", labels, state.last_boot))
+                if state.build:
+                    samples['agv_build'].append(("_info", labels + [("build", state.build),
+                                                                    ("version", state.build.split("-")[0])], 1))
+                if state.duration is not None:
+                    samples['agv_scan_duration_seconds'].append(("", labels, round(state.duration, 3)))
+                if state.last_poll is not None:
+                    samples['agv_last_poll_timestamp_seconds'].append(("", labels, round(state.last_poll, 3)))
+                samples['agv_polls'].append(("_total", labels, state.polls))
+                samples['agv_scanned_files'].append(("_total", labels, state.scanned_files))
+                for stage in sorted(state.errors):
+                    samples['agv_ssh_errors'].append(("_total", labels + [("stage", stage)], state.errors[stage]))
+            self.dirty = False
+
+        lines = []
+        for name, kind, help_text in METRIC_FAMILIES:
+            lines.append("# TYPE {} {}".format(name, kind))
+            lines.append("# HELP {} {}".format(name, help_text))
+            for suffix, labels, value in samples[name]:
+                lines.append("{}{}{} {}".format(name, suffix, format_labels(labels), value))
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write_file(self, path):
+        """寫入指標檔案，先寫入暫存檔再更名，讀取端不會讀到寫一半的內容"""
+        temporary = path + ".tmp"
+        try:
+            with open(temporary, 'w', encoding='utf-8') as f:
+                f.write(self.render())
+            os.replace(temporary, path)
+            return True
+        except (IOError, OSError) as e:
+            print("Error writing metrics file: {}".format(e), file=sys.stderr)
+            return False
+
+
+def newest_boot(records):
+    """從紀錄中找出最新一次開機，回傳 (建構版本, 開機時間epoch)，沒有紀錄時回傳 (None, None)"""
+    newest = None
+    for record in records:
+        boot = parse_filename_datetime(record.filename)
+        if boot and (newest is None or boot > newest[0]):
+            newest = (boot, record)
+    if newest is None:
+        return None, None
+    return parse_build_id(newest[1]), to_epoch(newest[0])
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    """提供 /metrics 的HTTP處理器"""
+    metrics = None
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.metrics.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", OPENMETRICS_CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(metrics, host, port):
+    """在背景執行緒中啟動指標HTTP端點，回傳伺服器物件"""
+    handler = type("BoundMetricsHandler", (MetricsHandler,), {'metrics': metrics})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+class FleetPoller:
+    """依固定間隔輪詢每台設備，每台設備一個非同步工作，同時進行的設備數受max_sessions限制
+
+    每次輪詢都重新列出日誌目錄，但只讀取掃描快取中沒有（新增或大小、修改時間改變）的檔案。
+    """
+
+    def __init__(self, metrics, configs=config_manager, interval=DEFAULT_POLL_INTERVAL,
+                 max_sessions=DEFAULT_MAX_SESSIONS, host_timeout=DEFAULT_HOST_TIMEOUT,
+                 log_directory=DEFAULT_LOG_DIRECTORY, profile_names=None, use_inventory=True,
+                 metrics_file=None, profile_refresh=DEFAULT_PROFILE_REFRESH):
+        self.metrics = metrics
+        self.configs = configs
+        self.interval = interval
+        self.max_sessions = max(1, int(max_sessions))
+        self.host_timeout = host_timeout
+        self.log_directory = log_directory
+        self.profile_names = set(profile_names) if profile_names else None
+        self.use_inventory = use_inventory
+        self.metrics_file = metrics_file
+        self.profile_refresh = profile_refresh
+        self._stop = None
+        self._semaphore = None
+
+    def load_profiles(self):
+        """讀取要輪詢的設備 {設定名稱: 連線資訊}"""
+        profiles = {}
+        for name, connection in self.configs.get_all_connections().items():
+            if self.profile_names is None or name in self.profile_names:
+                connection = dict(connection)
+                connection.pop('timestamp', None)
+                profiles[name] = connection
+        return profiles
+
+    def stop(self):
+        """要求停止輪詢（在事件迴圈執行緒中呼叫）"""
+        if self._stop is not None:
+            self._stop.set()
+
+    async def run(self, once=False):
+        """持續輪詢直到stop()；once時每台設備輪詢一次後結束"""
+        # 沒有asyncssh時由引擎的執行緒池執行paramiko
+        from ssh import AsyncSSHEngine
+
+        self._stop = asyncio.Event()
+        tasks = {}  # 設定名稱 -> (連線資訊, 工作)
+        async with AsyncSSHEngine(max_sessions=self.max_sessions, host_timeout=self.host_timeout) as engine:
+            # 沒有asyncssh時引擎會將同時連線數限制為執行緒池大小
+            self._semaphore = asyncio.Semaphore(engine.max_sessions)
+            try:
+                if once:
+                    profiles = self.load_profiles()
+                    self.metrics.retain(profiles)
+                    await asyncio.gather(*[self.poll_host(engine, name, connection)
+                                           for name, connection in profiles.items()])
+                    return
+
+                last_refresh = None
+                while not self._stop.is_set():
+                    if last_refresh is None or time.monotonic() - last_refresh >= self.profile_refresh:
+                        last_refresh = time.monotonic()
+                        self.reconcile(engine, tasks, self.load_profiles())
+                    if self.metrics_file and self.metrics.dirty:
+                        self.metrics.write_file(self.metrics_file)
+                    try:
+                        await asyncio.wait_for(self._stop.wait(), METRICS_WRITE_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+            finally:
+                for connection, task in tasks.values():
+                    task.cancel()
+                await asyncio.gather(*[task for connection, task in tasks.values()], return_exceptions=True)
+                if self.metrics_file:
+                    self.metrics.write_file(self.metrics_file)
+
+    def reconcile(self, engine, tasks, profiles):
+        """依最新設定啟動新設備的輪詢、停止已刪除或設定已改變的設備"""
+        for name in list(tasks):
+            connection, task = tasks[name]
+            if profiles.get(name) != connection:
+                task.cancel()
+                del tasks[name]
+        for name, connection in profiles.items():
+            if name not in tasks:
+                tasks[name] = (connection, asyncio.ensure_future(self.poll_loop(engine, name, connection)))
+        self.metrics.retain(profiles)
+
+    async def poll_loop(self, engine, name, connection):
+        """單一設備的輪詢迴圈，第一次輪詢隨機延遲，避免所有設備同時連線"""
+        await asyncio.sleep(random.uniform(0, min(self.interval, self.profile_refresh)))
+        while True:
+            started = time.monotonic()
+            await self.poll_host(engine, name, connection)
+            await asyncio.sleep(max(0.0, self.interval - (time.monotonic() - started)))
+
+    async def poll_host(self, engine, name, connection):
+        """輪詢一台設備一次並更新指標"""
+        state = self.metrics.state(name, get_host_key(connection))
+        async with self._semaphore:
+            try:
+                result = await asyncio.wait_for(
+                    scan_fleet_host(engine, name, name, connection, log_directory=self.log_directory,
+                                    scan_cache=scan_cache), self.host_timeout)
+            except asyncio.TimeoutError:
+                result = {'host': state.host, 'records': [], 'restart_count': 0, 'scanned_files': 0,
+                          'error': "Host timed out after {}s".format(self.host_timeout), 'error_stage': "timeout",
+                          'duration': self.host_timeout}
+            except Exception as e:
+                result = {'host': state.host, 'records': [], 'restart_count': 0, 'scanned_files': 0,
+                          'error': "Poll failed: {}".format(e), 'error_stage': "scan", 'duration': 0.0}
+            finally:
+                await engine.close(name)
+
+        build, last_boot = newest_boot(result['records'])
+        if self.use_inventory and not result['error'] and result['records']:
+            # 快取中的紀錄先回報，之後才是本次從設備讀取的紀錄
+            records = result['records'][result.get('cached_records', 0):] if state.inventoried else result['records']
+            if records:
+                version_inventory.add_records(result['host'], records)
+            state.inventoried = True
+        self.metrics.update(state, result, build, last_boot)
+
+
+def build_parser():
+    """建立命令列參數解析器"""
+    parser = argparse.ArgumentParser(description="Poll all saved AGV profiles on a schedule and export OpenMetrics.")
+    parser.add_argument("--interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="seconds between polls of the same AGV (default: {})".format(DEFAULT_POLL_INTERVAL))
+    parser.add_argument("--profile", action="append", dest="profiles", metavar="NAME",
+                        help="only poll this saved profile (repeatable, default: all profiles)")
+    parser.add_argument("--config", help="connection config file, .db for the SQLite store (default: ssh_config.json next to the program)")
+    parser.add_argument("--max-sessions", type=int, default=DEFAULT_MAX_SESSIONS, help="AGVs polled at the same time")
+    parser.add_argument("--host-timeout", type=float, default=DEFAULT_HOST_TIMEOUT, help="timeout for one poll")
+    parser.add_argument("--log-dir", default=DEFAULT_LOG_DIRECTORY, help="remote log directory")
+    parser.add_argument("--no-inventory", action="store_true", help="do not add records to the version inventory")
+    parser.add_argument("--metrics-file", help="write OpenMetrics text to this file (replaced atomically)")
+    parser.add_argument("--http-port", type=int, help="serve OpenMetrics on http://HOST:PORT/metrics")
+    parser.add_argument("--http-host", default="127.0.0.1", help="address for --http-port (default: 127.0.0.1)")
+    parser.add_argument("--once", action="store_true",
+                        help="poll every AGV once, print the metrics unless --metrics-file is given, then exit")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.once and not args.metrics_file and args.http_port is None:
+        print("Error: --metrics-file or --http-port is required unless --once is used", file=sys.stderr)
+        return 2
+
+    # 追蹤資料會隨時間累積，長時間執行的服務不記錄
+    scan_trace.enable(False)
+
+    metrics = FleetMetrics()
+    poller = FleetPoller(metrics, create_config_manager(args.config) if args.config else config_manager,
+                         interval=args.interval, max_sessions=args.max_sessions, host_timeout=args.host_timeout,
+                         log_directory=args.log_dir, profile_names=args.profiles,
+                         use_inventory=not args.no_inventory, metrics_file=args.metrics_file)
+    if not poller.load_profiles():
+        print("Error: no saved connection profiles to poll", file=sys.stderr)
+        return 2
+
+    http_server = None
+    if args.http_port is not None:
+        http_server = start_http_server(metrics, args.http_host, args.http_port)
+        print("Serving metrics on http://{}:{}/metrics".format(args.http_host, http_server.server_address[1]),
+              file=sys.stderr)
+
+    async def run():
+        loop = asyncio.get_event_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, poller.stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows的事件迴圈不支援，Ctrl+C以KeyboardInterrupt結束
+                pass
+        await poller.run(once=args.once)
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if http_server is not None:
+            http_server.shutdown()
+
+    if args.once and not args.metrics_file:
+        sys.stdout.write(metrics.render())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import sys
+import json
+import argparse
+
+from config import version_inventory
+from scan_cli import parse_time_argument
+
+
+# 車隊版本清冊查詢工具：只讀取本機的版本清冊，不連線到設備
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def format_time(value):
+    """輸出用的時間字串，None表示仍在執行"""
+    return value.strftime(TIME_FORMAT) if value else None
+
+
+def build_parser():
+    """建立命令列參數解析器"""
+    parser = argparse.ArgumentParser(description="Query the local fleet version inventory built by previous scans.")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    who_ran = commands.add_parser("who-ran", help="hosts that ran a version within a time range")
+    who_ran.add_argument("version", help="full build id, or a version such as 2.0.11 to match all of its builds")
+    who_ran.add_argument("--start", type=parse_time_argument, help="range start (default: unbounded)")
+    who_ran.add_argument("--end", type=parse_time_argument, help="range end (default: unbounded)")
+
+    running_at = commands.add_parser("running-at", help="the version a host was running at a given time")
+    running_at.add_argument("host", help="host key as user@ip:port")
+    running_at.add_argument("time", type=parse_time_argument)
+
+    history = commands.add_parser("history", help="version history of a host")
+    history.add_argument("host", help="host key as user@ip:port")
+
+    commands.add_parser("versions", help="all known builds with the number of hosts that ran them")
+    commands.add_parser("hosts", help="all hosts in the inventory")
+    return parser
+
+
+def run_query(args):
+    """執行查詢，回傳可輸出為JSON的結果"""
+    if args.command == "who-ran":
+        return [{'host': host, 'build': build, 'start': format_time(start), 'end': format_time(end)}
+                for host, build, start, end in version_inventory.hosts_running(args.version, args.start, args.end)]
+    if args.command == "running-at":
+        return {'host': args.host, 'time': format_time(args.time),
+                'build': version_inventory.version_at(args.host, args.time)}
+    if args.command == "history":
+        return [{'build': build, 'start': format_time(start), 'end': format_time(end), 'boots': boots}
+                for build, start, end, boots in version_inventory.history(args.host)]
+    if args.command == "versions":
+        return version_inventory.versions()
+    return version_inventory.get_hosts()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    json.dump(run_query(args), sys.stdout, indent=2, ensure_ascii=False)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,23 +1,37 @@
 import sys
 
+import startup_timing
+
 try:
     from PyQt5.QtWidgets import QApplication
+    from PyQt5.QtCore import QTimer
     QT_AVAILABLE = True
 except ImportError:
     try:
         from PySide2.QtWidgets import QApplication
+        from PySide2.QtCore import QTimer
         QT_AVAILABLE = True
     except ImportError:
         sys.exit(1)
 
+startup_timing.mark("Qt imported")
+
+# ui只載入登入視窗，paramiko與搜尋視窗等到按下連線後才載入
 from ui import SSHConnectionApp
 
+startup_timing.mark("login module imported")
+
 
 def main():
     try:
         app = QApplication(sys.argv)
+        startup_timing.mark("QApplication created")
         window = SSHConnectionApp()
+        startup_timing.mark("login window created")
         window.show()
+        # 事件迴圈處理第一個事件時，登入視窗已經顯示在畫面上
+        QTimer.singleShot(0, lambda: (startup_timing.mark("login window shown"),
+                                      startup_timing.report("Startup timing")))
         sys.exit(app.exec_())
     except KeyboardInterrupt:
         print("Program interrupted by user")
@@ -0,0 +1,7 @@
+from .extractor import LogExtractor, ExtractRule, log_extractor, extract_build_version
+from .core import LogScanner, BootRecord, parse_filename_datetime
+from .record_store import BootRecordStore
+from .time_index import ScanTimeIndex
+from .analytics import analyze_reboots, filename_epochs
+
+__all__ = ['LogExtractor', 'ExtractRule', 'log_extractor', 'extract_build_version', 'LogScanner', 'BootRecord', 'parse_filename_datetime', 'BootRecordStore', 'ScanTimeIndex', 'analyze_reboots', 'filename_epochs']
\ No newline at end of file
@@ -0,0 +1,273 @@
+import csv
+import json
+import math
+from bisect import bisect_right
+
+from .core import parse_filename_datetime
+from .time_index import to_epoch, from_epoch
+
+
+# 連續重啟（crash loop）：burst_boots次開機發生在burst_minutes分鐘內
+DEFAULT_BURST_BOOTS = 3
+DEFAULT_BURST_MINUTES = 10
+
+# 運行時間（相鄰兩次開機的間隔）分布的區間上限（秒）與標籤，最後一個區間沒有上限
+UPTIME_BUCKET_EDGES = (60, 600, 3600, 86400)
+UPTIME_BUCKET_LABELS = ("<1 min", "1-10 min", "10-60 min", "1-24 h", ">24 h")
+
+# 輸出的運行時間百分位數
+UPTIME_PERCENTILES = (10, 50, 90)
+
+# NumPy實作以 (設備編號 << 40) + 時間 合成單一排序鍵，一次排序即可依設備分組並依時間排列
+_KEY_BITS = 40
+
+CSV_FIELDS = ['host', 'boots', 'first_boot', 'last_boot', 'mtbf_seconds', 'min_uptime', 'p10_uptime',
+              'median_uptime', 'p90_uptime', 'max_uptime', 'crash_loops', 'crash_loop_boots'] + \
+             ['uptime {}'.format(label) for label in UPTIME_BUCKET_LABELS]
+
+
+# NumPy是選用的依賴，第一次計算時才載入，不影響啟動時間
+_numpy = {}
+
+
+def load_numpy():
+    """載入NumPy，未安裝時回傳None"""
+    if 'module' not in _numpy:
+        try:
+            import numpy
+            _numpy['module'] = numpy
+        except ImportError:
+            _numpy['module'] = None
+    return _numpy['module']
+
+
+def filename_epochs(filenames):
+    """由日誌檔名取出開機時間（epoch秒數），無法解析時間的檔名略過"""
+    epochs = []
+    for filename in filenames:
+        boot = parse_filename_datetime(filename)
+        if boot:
+            epochs.append(to_epoch(boot))
+    return epochs
+
+
+def _rank_index(percentile, count):
+    """最近排名法的百分位數位置（0起算）"""
+    return max(int(math.ceil(percentile * count / 100.0)) - 1, 0)
+
+
+def _analyze_python(groups, burst_boots, burst_seconds):
+    """純Python實作，逐台設備計算，結果與NumPy版本相同"""
+    results = []
+    for epochs in groups:
+        epochs = sorted(epochs)
+        intervals = [later - earlier for earlier, later in zip(epochs, epochs[1:])]
+        ordered = sorted(intervals)
+        histogram = [0] * len(UPTIME_BUCKET_LABELS)
+        for interval in intervals:
+            histogram[bisect_right(UPTIME_BUCKET_EDGES, interval)] += 1
+
+        # 每個滿足條件的視窗涵蓋burst_boots次開機，重疊或相鄰的視窗合併為一次連續重啟
+        bursts = []
+        span = burst_boots - 1
+        for start in range(len(epochs) - span):
+            if epochs[start + span] - epochs[start] > burst_seconds:
+                continue
+            if bursts and start <= bursts[-1][1] + 1:
+                bursts[-1][1] = start + span
+            else:
+                bursts.append([start, start + span])
+
+        results.append({
+            'boots': len(epochs),
+            'first': epochs[0] if epochs else None,
+            'last': epochs[-1] if epochs else None,
+            'interval_count': len(intervals),
+            'interval_total': sum(intervals),
+            'percentiles': [ordered[_rank_index(p, len(ordered))] if ordered else None for p in UPTIME_PERCENTILES],
+            'min': ordered[0] if ordered else None,
+            'max': ordered[-1] if ordered else None,
+            'histogram': histogram,
+            'bursts': [(epochs[first], epochs[last], last - first + 1) for first, last in bursts],
+        })
+    return results
+
+
+def _analyze_numpy(groups, burst_boots, burst_seconds):
+    """以NumPy一次處理所有設備：所有開機時間串接後依 (設備, 時間) 排序，各項統計以分組的陣列運算求得"""
+    np = load_numpy()
+    host_count = len(groups)
+    sizes = np.array([len(epochs) for epochs in groups], dtype=np.int64)
+    epochs = np.concatenate([np.asarray(epochs, dtype=np.int64) for epochs in groups]) if host_count else \
+        np.zeros(0, dtype=np.int64)
+    hosts = np.repeat(np.arange(host_count, dtype=np.int64), sizes)
+    base = int(epochs.min()) if len(epochs) else 0
+    keys = np.sort((hosts << _KEY_BITS) + (epochs - base))
+    hosts = keys >> _KEY_BITS
+    epochs = (keys & ((1 << _KEY_BITS) - 1)) + base
+
+    same_host = hosts[1:] == hosts[:-1]
+    intervals = np.diff(epochs)[same_host]
+    interval_hosts = hosts[1:][same_host]
+    counts = np.bincount(interval_hosts, minlength=host_count)
+    totals = np.bincount(interval_hosts, weights=intervals, minlength=host_count)
+
+    # 依 (設備, 間隔) 排序後每台設備的間隔連續且遞增，百分位數可直接以位移取出
+    ordered = np.sort((interval_hosts << _KEY_BITS) + intervals) & ((1 << _KEY_BITS) - 1)
+    offsets = np.cumsum(counts) - counts
+    last = max(len(ordered) - 1, 0)
+
+    def pick(positions):
+        return ordered[np.minimum(offsets + positions, last)] if len(ordered) else np.zeros(host_count, dtype=np.int64)
+
+    percentiles = [pick(np.maximum(np.ceil(p * counts / 100.0).astype(np.int64) - 1, 0)) for p in UPTIME_PERCENTILES]
+    minimums = pick(np.zeros(host_count, dtype=np.int64))
+    maximums = pick(np.maximum(counts - 1, 0))
+
+    bucket_count = len(UPTIME_BUCKET_LABELS)
+    buckets = np.searchsorted(np.asarray(UPTIME_BUCKET_EDGES), intervals, side='right')
+    histogram = np.bincount(interval_hosts * bucket_count + buckets,
+                            minlength=host_count * bucket_count).reshape(host_count, bucket_count)
+
+    # 連續重啟：第i次與第i+span次開機在同一台設備且間隔不超過burst_seconds時，兩者之間的開機都屬於連續重啟；
+    # 以差分陣列標記涵蓋範圍，再依設備切分為連續的區段
+    span = burst_boots - 1
+    covered = np.zeros(len(epochs), dtype=bool)
+    if len(epochs) > span:
+        starts = np.nonzero((epochs[span:] - epochs[:len(epochs) - span] <= burst_seconds) &
+                            (hosts[span:] == hosts[:len(hosts) - span]))[0]
+        marks = np.zeros(len(epochs) + 1, dtype=np.int64)
+        np.add.at(marks, starts, 1)
+        np.add.at(marks, starts + span + 1, -1)
+        covered = np.cumsum(marks[:-1]) > 0
+    # continues[i]：第i次開機與前一次開機屬於同一段連續重啟
+    continues = np.concatenate(([False], covered[1:] & covered[:-1] & same_host))
+    run_starts = np.nonzero(covered & ~continues)[0]
+    run_ends = np.nonzero(covered & ~np.concatenate((continues[1:], [False])))[0]
+
+    boundaries = np.cumsum(sizes) - sizes
+    bursts = [[] for _ in range(host_count)]
+    for first, last_index in zip(run_starts.tolist(), run_ends.tolist()):
+        bursts[int(hosts[first])].append((int(epochs[first]), int(epochs[last_index]), last_index - first + 1))
+
+    results = []
+    for host in range(host_count):
+        has_intervals = counts[host] > 0
+        begin = int(boundaries[host])
+        size = int(sizes[host])
+        results.append({
+            'boots': size,
+            'first': int(epochs[begin]) if size else None,
+            'last': int(epochs[begin + size - 1]) if size else None,
+            'interval_count': int(counts[host]),
+            'interval_total': int(totals[host]),
+            'percentiles': [int(values[host]) if has_intervals else None for values in percentiles],
+            'min': int(minimums[host]) if has_intervals else None,
+            'max': int(maximums[host]) if has_intervals else None,
+            'histogram': histogram[host].tolist(),
+            'bursts': bursts[host],
+        })
+    return results
+
+
+def format_epoch(value):
+    """epoch秒數轉為與檔案時間相同格式的字串"""
+    if value is None:
+        return None
+    return from_epoch(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def analyze_reboots(epochs_by_host, burst_boots=DEFAULT_BURST_BOOTS, burst_minutes=DEFAULT_BURST_MINUTES,
+                    use_numpy=None):
+    """計算每台設備與整個車隊的重啟統計
+
+    epochs_by_host為 [(設備, 開機時間epoch秒數的序列)]，回傳 {'hosts': [每台設備的統計], 'fleet': 車隊統計}；
+    有安裝NumPy時所有設備以一次向量化運算處理，否則改用純Python實作。
+    """
+    burst_boots = max(2, int(burst_boots))
+    burst_seconds = int(burst_minutes * 60)
+    use_numpy = (use_numpy is None or use_numpy) and load_numpy() is not None
+    names = [host for host, epochs in epochs_by_host]
+    groups = [epochs for host, epochs in epochs_by_host]
+    analyze = _analyze_numpy if use_numpy else _analyze_python
+
+    hosts = []
+    fleet_intervals = 0
+    fleet_total = 0
+    for name, stats in zip(names, analyze(groups, burst_boots, burst_seconds)):
+        fleet_intervals += stats['interval_count']
+        fleet_total += stats['interval_total']
+        p10, median, p90 = stats['percentiles']
+        hosts.append({
+            'host': name,
+            'boots': stats['boots'],
+            'first_boot': format_epoch(stats['first']),
+            'last_boot': format_epoch(stats['last']),
+            # 平均重啟間隔（MTBF），少於兩次開機時無法計算
+            'mtbf_seconds': stats['interval_total'] / stats['interval_count'] if stats['interval_count'] else None,
+            'min_uptime': stats['min'],
+            'p10_uptime': p10,
+            'median_uptime': median,
+            'p90_uptime': p90,
+            'max_uptime': stats['max'],
+            'uptime_histogram': dict(zip(UPTIME_BUCKET_LABELS, stats['histogram'])),
+            'crash_loops': [{'start': format_epoch(start), 'end': format_epoch(end), 'boots': boots}
+                            for start, end, boots in stats['bursts']],
+        })
+
+    return {
+        'burst_boots': burst_boots,
+        'burst_minutes': burst_minutes,
+        'hosts': hosts,
+        'fleet': {
+            'hosts': len(hosts),
+            'boots': sum(host['boots'] for host in hosts),
+            'mtbf_seconds': fleet_total / fleet_intervals if fleet_intervals else None,
+            'crash_loops': sum(len(host['crash_loops']) for host in hosts),
+            'hosts_with_crash_loops': sum(1 for host in hosts if host['crash_loops']),
+        },
+    }
+
+
+def format_duration(seconds):
+    """秒數轉為易讀的時間長度"""
+    if seconds is None:
+        return "-"
+    if seconds < 60:
+        return "{:.0f} s".format(seconds)
+    if seconds < 3600:
+        return "{:.1f} min".format(seconds / 60.0)
+    if seconds < 86400:
+        return "{:.1f} h".format(seconds / 3600.0)
+    return "{:.1f} d".format(seconds / 86400.0)
+
+
+def summarize(analysis):
+    """單行摘要，顯示在重啟次數旁"""
+    fleet = analysis['fleet']
+    if len(analysis['hosts']) == 1:
+        host = analysis['hosts'][0]
+        return "平均重啟間隔 {} | 運行時間中位數 {} | 連續重啟 {} 次（{}分鐘內{}次開機）".format(
+            format_duration(host['mtbf_seconds']), format_duration(host['median_uptime']),
+            len(host['crash_loops']), analysis['burst_minutes'], analysis['burst_boots'])
+    return "平均重啟間隔 {} | 連續重啟 {} 次，{}/{} 台設備（{}分鐘內{}次開機）".format(
+        format_duration(fleet['mtbf_seconds']), fleet['crash_loops'], fleet['hosts_with_crash_loops'],
+        fleet['hosts'], analysis['burst_minutes'], analysis['burst_boots'])
+
+
+def write_analysis(analysis, stream, output_format="json"):
+    """以JSON（完整內容）或CSV（每台設備一行）輸出重啟統計"""
+    if output_format == "json":
+        json.dump(analysis, stream, indent=2, ensure_ascii=False)
+        stream.write("\n")
+        return
+
+    writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for host in analysis['hosts']:
+        row = dict((field, host.get(field)) for field in CSV_FIELDS[:10])
+        row['crash_loops'] = len(host['crash_loops'])
+        row['crash_loop_boots'] = sum(loop['boots'] for loop in host['crash_loops'])
+        for label in UPTIME_BUCKET_LABELS:
+            row['uptime {}'.format(label)] = host['uptime_histogram'][label]
+        writer.writerow(row)
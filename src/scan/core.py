@@ -0,0 +1,566 @@
+import os
+import re
+import time
+import queue
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from ssh import build_listing_command, parse_listing_output, build_batch_scan_command, build_batch_scan_input, parse_batch_record
+from ssh import (HELPER_VERSION, build_helper_probe_command, parse_helper_probe_output, build_helper_install_command,
+                 build_helper_script, is_helper_installed, build_helper_scan_command, build_helper_input)
+import scan_trace
+from .extractor import extract_build_version
+
+
+# AGV上agvapp日誌的預設目錄
+DEFAULT_LOG_DIRECTORY = "/run/media/mmcblk1p1/log/agvapp/"
+
+# 檔案讀取模式：只讀取檔頭(位元組/行數)或讀取整個檔案
+READ_MODE_BYTES = "bytes"
+READ_MODE_LINES = "lines"
+READ_MODE_FULL = "full"
+
+# build version 訊息位於日誌開頭幾行，預設只讀取檔頭
+DEFAULT_READ_MODE = READ_MODE_BYTES
+DEFAULT_HEADER_BYTES = 16384
+DEFAULT_HEADER_LINES = 50
+
+BUILD_VERSION_MARKER = "build version"
+
+# 掃描模式：批次模式整批檔案只需一次遠端往返，逐檔模式每個檔案各執行一次命令，
+# SFTP模式不啟動遠端shell，在同一個Transport上並行讀取檔頭
+SCAN_MODE_BATCH = "batch"
+SCAN_MODE_PER_FILE = "per_file"
+SCAN_MODE_SFTP = "sftp"
+DEFAULT_SCAN_MODE = SCAN_MODE_BATCH
+
+# 同一個連線上並行使用的通道數（逐檔模式同時讀取的檔案數、SFTP通道數、批次模式的並行批次數），
+# 批次模式中每個批次至少包含的檔案數
+DEFAULT_SCAN_CHANNELS = 4
+BATCH_CHUNK_MIN_FILES = 200
+# 並行批次中每個批次最多暫存的輸出行數，以及佇列滿或空時每次等待的秒數
+BATCH_QUEUE_LINES = 1000
+BATCH_QUEUE_POLL_INTERVAL = 0.05
+
+# 進度回報的最短間隔秒數，避免大量檔案時每個檔案都發送一次進度
+DEFAULT_PROGRESS_INTERVAL = 0.1
+
+UNKNOWN_FILE_TIME = "Unknown time"
+
+
+def parse_filename_datetime(filename):
+    """從檔案名稱中解析時間
+    支援格式: agvapp_25_07_04_09_55_31.tmp 或 agvapp_YY_MM_DD_HH_MM_SS.*
+    """
+    # 匹配檔案名稱中的時間格式
+    pattern = r'agvapp_(\d{2})_(\d{2})_(\d{2})_(\d{2})_(\d{2})_(\d{2})'
+    match = re.search(pattern, filename)
+    
+    if match:
+        year, month, day, hour, minute, second = match.groups()
+        # 假設年份為20XX
+        year = int("20" + year)
+        month = int(month)
+        day = int(day)
+        hour = int(hour)
+        minute = int(minute)
+        second = int(second)
+        
+        try:
+            return datetime(year, month, day, hour, minute, second)
+        except ValueError:
+            # 如果日期無效，返回None
+            return None
+    
+    return None
+
+
+class BootRecord:
+    """一筆開機紀錄，只包含檔名、遠端路徑與build version欄位，不帶檔案內容"""
+    __slots__ = ('filename', 'path', 'file_time', 'boot_time', 'version', 'version_time', 'full_line')
+    
+    def __init__(self, filename, path, file_time, boot_time, version, version_time, full_line):
+        self.filename = filename
+        self.path = path
+        self.file_time = file_time
+        self.boot_time = boot_time
+        self.version = version
+        self.version_time = version_time
+        self.full_line = full_line
+    
+    @classmethod
+    def from_build_version(cls, file_path, build_version):
+        """由檔案路徑與build version資訊建立紀錄，檔案時間取自檔名"""
+        filename = os.path.basename(file_path)
+        file_datetime = parse_filename_datetime(filename)
+        file_time = file_datetime.strftime("%Y-%m-%d %H:%M:%S") if file_datetime else UNKNOWN_FILE_TIME
+        return cls(filename, file_path, file_time, build_version['time'], build_version['version'],
+                   build_version['version_time'], build_version['full_line'])
+    
+    def to_dict(self):
+        """轉換為字典（輸出JSON/CSV用）"""
+        return dict((field, getattr(self, field)) for field in self.__slots__)
+
+
+class LogScanner:
+    """日誌掃描流程（不依賴Qt），以回呼函式回報結果，可在任何執行緒中執行
+    
+    可由其他執行緒呼叫cancel()停止掃描：掃描迴圈與遠端命令都會檢查cancel_event，
+    已開啟的通道會被關閉，已回報的結果保留，scan()回傳目前為止的重啟次數。
+    """
+    
+    def __init__(self, ssh_client, log_directory=DEFAULT_LOG_DIRECTORY, start_time=None, end_time=None,
+                 read_mode=DEFAULT_READ_MODE, read_limit=None, scan_mode=DEFAULT_SCAN_MODE,
+                 scan_cache=None, host_key=None, on_found=None, on_progress=None, on_error=None,
+                 channels=DEFAULT_SCAN_CHANNELS, progress_interval=DEFAULT_PROGRESS_INTERVAL, time_ranges=None,
+                 cancel_event=None, device_helper=False, install_helper=False):
+        self.ssh_client = ssh_client
+        self.log_directory = log_directory
+        self.start_time = start_time
+        self.end_time = end_time
+        # 多個時間範圍 [(開始, 結束)]（例如只掃描時間索引尚未涵蓋的部分），未指定時使用start_time/end_time
+        if time_ranges is None:
+            time_ranges = [(start_time, end_time)] if (start_time or end_time) else []
+        self.time_ranges = list(time_ranges)
+        self.read_mode = read_mode
+        if read_limit is None:
+            read_limit = DEFAULT_HEADER_LINES if read_mode == READ_MODE_LINES else DEFAULT_HEADER_BYTES
+        self.read_limit = read_limit
+        self.scan_mode = scan_mode
+        self.scan_cache = scan_cache
+        self.host_key = host_key
+        self.channels = max(1, int(channels))
+        # 回呼函式：找到build version (BootRecord)、進度 (當前, 總數)、錯誤訊息
+        self.on_found = on_found or (lambda record: None)
+        self.on_progress = on_progress or (lambda current, total: None)
+        self.on_error = on_error or (lambda message: None)
+        self.progress_interval = progress_interval
+        self._last_progress = 0.0
+        self.file_stats = {}
+        self.scanned_records = []
+        self.cancel_event = cancel_event or threading.Event()
+        # 批次模式下偵測設備端輔助程式，有可用的版本時改由設備擷取build version行；
+        # install_helper時設備上沒有（或版本不符）會先上傳
+        self.device_helper = device_helper or install_helper
+        self.install_helper = install_helper
+        self.helper_ready = False
+        
+    def cancel(self):
+        """要求停止掃描（可從其他執行緒呼叫，不等待掃描結束）"""
+        self.cancel_event.set()
+    
+    def is_cancelled(self):
+        """掃描是否已被取消"""
+        return self.cancel_event.is_set()
+    
+    def scan(self):
+        """執行掃描，回傳重啟次數，發生錯誤時回傳None；取消時回傳已找到的重啟次數"""
+        trace_started = scan_trace.start()
+        try:
+            # 列出目錄中的所有.tmp檔案和agvapp日誌檔案（含大小與修改時間）
+            with scan_trace.span("scan.listing") as span:
+                success, result = self.ssh_client.execute_command(build_listing_command(self.log_directory),
+                                                                  cancel_event=self.cancel_event)
+                entries = parse_listing_output(result) if success else []
+                span.set('files', len(entries))
+            
+            if self.is_cancelled():
+                return 0
+            if not success:
+                self.on_error("Failed to list files in directory: {}".format(result))
+                return None
+            
+            if not entries:
+                self.on_error("No .tmp or agvapp log files found in directory: {}".format(self.log_directory))
+                return None
+            
+            total_files = len(entries)
+            candidates = self.select_candidates(entries)
+            with scan_trace.span("scan.cache_lookup", files=len(candidates)):
+                restart_count, pending = self.report_cached(candidates, total_files)
+            done = total_files - len(pending)
+            
+            if self.is_cancelled():
+                return restart_count
+            try:
+                with scan_trace.span("scan.files", mode=self.scan_mode, files=len(pending)):
+                    if self.scan_mode == SCAN_MODE_BATCH:
+                        if self.device_helper and pending:
+                            self.helper_ready = self.prepare_device_helper()
+                        scanned_count = self.scan_batch(pending, done, total_files)
+                    elif self.scan_mode == SCAN_MODE_SFTP:
+                        scanned_count = self.scan_sftp(pending, done, total_files)
+                    else:
+                        scanned_count = self.scan_per_file(pending, done, total_files)
+            finally:
+                with scan_trace.span("scan.cache_save"):
+                    self.save_to_cache()
+            
+            if scanned_count is None:
+                return None
+            return restart_count + scanned_count
+            
+        except Exception as e:
+            self.on_error("Error during file reading: {}".format(str(e)))
+            return None
+        finally:
+            scan_trace.record("scan.total", trace_started)
+    
+    def select_candidates(self, entries):
+        """依檔名時間過濾，只保留需要讀取的候選檔案 [(路徑, 大小, 修改時間)]"""
+        return [entry for entry in entries if self.in_time_range(os.path.basename(entry[0]))]
+    
+    def report_cached(self, candidates, total_files):
+        """先回報快取中的結果，回傳 (快取中的重啟次數, 需要從設備讀取的檔案路徑)"""
+        cached = {}
+        if self.scan_cache and self.host_key:
+            cached = self.scan_cache.get_many(self.host_key, candidates)
+        
+        restart_count = 0
+        for file_path, size, mtime in candidates:
+            if self.is_cancelled():
+                break
+            if cached.get(file_path):
+                self.emit_build_version(file_path, cached[file_path])
+                restart_count += 1
+        
+        pending = [file_path for file_path, size, mtime in candidates if file_path not in cached]
+        self.file_stats = dict((file_path, (size, mtime)) for file_path, size, mtime in candidates)
+        self.scanned_records = []
+        
+        done = total_files - len(pending)
+        if done:
+            self.report_progress(done, total_files)
+        return restart_count, pending
+    
+    def emit_build_version(self, file_path, content):
+        """提取build version資訊並以BootRecord回報（不傳遞檔案內容）"""
+        with scan_trace.span("scan.extract"):
+            build_version = self.extract_build_version(content)
+        self.on_found(BootRecord.from_build_version(file_path, build_version))
+        return build_version
+    
+    def report_progress(self, done, total_files):
+        """回報進度，間隔太短的進度會略過，最後一筆一定回報"""
+        now = time.monotonic()
+        if done < total_files and now - self._last_progress < self.progress_interval:
+            return
+        self._last_progress = now
+        self.on_progress(done, total_files)
+    
+    def report_file(self, file_path, content):
+        """回報單一檔案的讀取結果並記錄至快取，回傳是否包含build version"""
+        line = ""
+        if BUILD_VERSION_MARKER in content.lower():
+            line = self.emit_build_version(file_path, content)['full_line']
+        self.scanned_records.append((file_path, line))
+        return bool(line)
+    
+    def save_to_cache(self):
+        """將本次從設備讀取的結果寫入快取"""
+        if not self.scan_cache or not self.host_key or not self.scanned_records:
+            return
+        records = []
+        for file_path, line in self.scanned_records:
+            size, mtime = self.file_stats.get(file_path, (-1, -1))
+            records.append((file_path, size, mtime, line))
+        self.scan_cache.put_many(self.host_key, records)
+    
+    def in_time_range(self, filename):
+        """檢查檔名時間是否在任一過濾範圍內，未啟用時間過濾時一律通過"""
+        if not self.time_ranges:
+            return True
+        
+        file_datetime = parse_filename_datetime(filename)
+        if not file_datetime:
+            # 無法解析時間的檔案，如果啟用時間過濾則跳過
+            return False
+        for start_time, end_time in self.time_ranges:
+            if (start_time is None or file_datetime >= start_time) and (end_time is None or file_datetime <= end_time):
+                return True
+        return False
+    
+    def prepare_device_helper(self):
+        """檢查設備上的輔助程式，需要時上傳，回傳是否可以使用（失敗時改用一般的批次命令）"""
+        success, output = self.ssh_client.execute_command(build_helper_probe_command(),
+                                                          cancel_event=self.cancel_event)
+        if success and parse_helper_probe_output(output) == HELPER_VERSION:
+            return True
+        if not self.install_helper or self.is_cancelled():
+            return False
+        
+        success, lines = self.ssh_client.stream_command(build_helper_install_command(), build_helper_script(),
+                                                        cancel_event=self.cancel_event)
+        return success and is_helper_installed(lines)
+    
+    def build_batch_input(self, file_paths):
+        """批次掃描命令的stdin內容，輔助程式另外需要檔案大小與修改時間作為設備端快取的鍵"""
+        if self.helper_ready:
+            return build_helper_input((path,) + self.file_stats.get(path, (-1, -1)) for path in file_paths)
+        return build_batch_scan_input(file_paths)
+    
+    def build_batch_command(self):
+        """依讀取模式產生批次掃描命令"""
+        if self.helper_ready:
+            return build_helper_scan_command(self.read_mode, self.read_limit, BUILD_VERSION_MARKER)
+        if self.read_mode == READ_MODE_LINES:
+            return build_batch_scan_command(header_lines=self.read_limit, marker=BUILD_VERSION_MARKER)
+        if self.read_mode == READ_MODE_BYTES:
+            return build_batch_scan_command(header_bytes=self.read_limit, marker=BUILD_VERSION_MARKER)
+        return build_batch_scan_command(marker=BUILD_VERSION_MARKER)
+    
+    def scan_batch(self, candidates, done, total_files):
+        """以批次遠端命令掃描所有候選檔案，回傳重啟次數
+        
+        檔案數量多時切成多個批次，在同一個Transport的多個通道上並行執行，
+        結果仍依原本的檔案順序回報。
+        """
+        if not candidates:
+            return 0
+        
+        chunk_count = min(self.channels, (len(candidates) + BATCH_CHUNK_MIN_FILES - 1) // BATCH_CHUNK_MIN_FILES)
+        if chunk_count <= 1:
+            success, lines = self.ssh_client.stream_command(self.build_batch_command(), self.build_batch_input(candidates),
+                                                            cancel_event=self.cancel_event)
+            if not success:
+                self.on_error("Failed to scan files: {}".format(lines))
+                return None
+            restart_count = self.report_batch_lines(lines, done, total_files)
+            if lines.error and not self.is_cancelled():
+                self.on_error("Failed to scan files: {}".format(lines.error))
+                return None
+            return restart_count
+        
+        chunk_size = (len(candidates) + chunk_count - 1) // chunk_count
+        chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+        outputs = [queue.Queue(BATCH_QUEUE_LINES) for _ in chunks]
+        # 本次掃描的批次共用的停止旗標，取消或任一批次失敗時關閉其他批次的通道並釋放通道名額
+        stop_chunks = threading.Event()
+        for chunk, output in zip(chunks, outputs):
+            threading.Thread(target=self.stream_batch, args=(chunk, output, stop_chunks), daemon=True).start()
+        
+        restart_count = 0
+        try:
+            for chunk, output in zip(chunks, outputs):
+                errors = []
+                restart_count += self.report_batch_lines(self.iter_batch_output(output, errors), done, total_files)
+                if self.is_cancelled():
+                    break
+                if errors:
+                    self.on_error("Failed to scan files: {}".format(errors[0]))
+                    return None
+                done += len(chunk)
+        finally:
+            stop_chunks.set()
+        
+        return restart_count
+    
+    def stream_batch(self, chunk, output, stop_event):
+        """在背景執行緒中執行一個批次命令，將輸出逐行放入佇列，結束時放入None；stop_event被設定時停止"""
+        def put(item):
+            while not stop_event.is_set():
+                try:
+                    output.put(item, timeout=BATCH_QUEUE_POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        
+        try:
+            success, lines = self.ssh_client.stream_command(self.build_batch_command(), self.build_batch_input(chunk),
+                                                            cancel_event=stop_event)
+            if not success:
+                put((False, lines))
+                return
+            try:
+                for line in lines:
+                    if not put((True, line)):
+                        return
+                if lines.error and not stop_event.is_set():
+                    put((False, lines.error))
+            finally:
+                lines.close()
+        except Exception as e:
+            put((False, str(e)))
+        finally:
+            put(None)
+    
+    def iter_batch_output(self, output, errors):
+        """依序取出批次命令的輸出，錯誤訊息加入errors；掃描被取消時結束"""
+        while True:
+            try:
+                item = output.get(timeout=BATCH_QUEUE_POLL_INTERVAL)
+            except queue.Empty:
+                if self.is_cancelled():
+                    return
+                continue
+            if item is None:
+                return
+            success, text = item
+            if success:
+                yield text
+            else:
+                errors.append(text)
+    
+    def report_batch_lines(self, lines, done, total_files):
+        """處理批次掃描的輸出紀錄，回傳重啟次數"""
+        restart_count = 0
+        for line in lines:
+            if self.is_cancelled():
+                break
+            record = parse_batch_record(line)
+            if not record:
+                continue
+            
+            if self.report_file(record['path'], record['line']):
+                restart_count += 1
+            
+            done += 1
+            self.report_progress(done, total_files)
+        
+        return restart_count
+    
+    def scan_sftp(self, candidates, done, total_files):
+        """以SFTP並行讀取候選檔案的檔頭，回傳重啟次數"""
+        fetcher = self.ssh_client.open_sftp_fetcher(self.channels)
+        if not fetcher:
+            self.on_error("Failed to open SFTP session")
+            return None
+        
+        # SFTP只能以位元組範圍讀取，以行數模式時先讀取預設大小的檔頭再截取行數
+        if self.read_mode == READ_MODE_FULL:
+            length = None
+        elif self.read_mode == READ_MODE_BYTES:
+            length = int(self.read_limit)
+        else:
+            length = DEFAULT_HEADER_BYTES
+        
+        restart_count = 0
+        try:
+            for file_path, success, data in fetcher.fetch_many(candidates, length=length):
+                if self.is_cancelled():
+                    break
+                if success:
+                    content = data.decode(errors="replace")
+                    if length is not None:
+                        content, truncated = self.trim_header(content, len(data) >= length)
+                        if BUILD_VERSION_MARKER not in content.lower() and truncated:
+                            # 檔頭中沒有build version標記，讀取整個檔案
+                            success, data = fetcher.read_range(file_path)
+                            content = data.decode(errors="replace") if success else data
+                
+                if success:
+                    if self.report_file(file_path, content):
+                        restart_count += 1
+                else:
+                    self.on_error("Failed to read file {}: {}".format(file_path, data))
+                
+                done += 1
+                self.report_progress(done, total_files)
+        finally:
+            fetcher.close()
+        
+        return restart_count
+    
+    def trim_header(self, content, truncated):
+        """截取檔頭內容，回傳 (檔頭內容, 是否未讀完整個檔案)"""
+        if self.read_mode == READ_MODE_LINES:
+            lines = content.split('\n')
+            if len(lines) > self.read_limit:
+                return '\n'.join(lines[:self.read_limit]) + '\n', True
+            return content, truncated
+        
+        # 以位元組讀取時，最後一行可能被截斷，捨棄不完整的行避免解析錯誤
+        if truncated:
+            last_newline = content.rfind('\n')
+            content = content[:last_newline + 1] if last_newline >= 0 else ""
+        return content, truncated
+    
+    def scan_per_file(self, candidates, done, total_files):
+        """逐檔讀取候選檔案（每個檔案一次遠端往返，多個通道並行），回傳重啟次數"""
+        restart_count = 0
+        for file_path, (success, content) in self.map_ordered(self.read_log_file, candidates):
+            if self.is_cancelled():
+                break
+            if success:
+                # 檢查是否包含build version並提取資訊
+                if self.report_file(file_path, content):
+                    restart_count += 1
+            else:
+                self.on_error("Failed to read file {}: {}".format(file_path, content))
+            
+            done += 1
+            self.report_progress(done, total_files)
+        
+        return restart_count
+    
+    def map_ordered(self, func, items):
+        """以多個執行緒並行處理，依輸入順序逐一回傳 (項目, 結果)，取消後不再排入新的工作"""
+        if self.channels <= 1:
+            for item in items:
+                if self.is_cancelled():
+                    return
+                yield item, func(item)
+            return
+        
+        # 只預先排入有限數量的工作，避免讀取大量檔案時佔用過多記憶體
+        window = self.channels * 2
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.channels) as executor:
+            try:
+                for item in items:
+                    if self.is_cancelled():
+                        return
+                    pending.append((item, executor.submit(func, item)))
+                    if len(pending) >= window:
+                        done_item, future = pending.popleft()
+                        yield done_item, future.result()
+                
+                while pending:
+                    done_item, future = pending.popleft()
+                    yield done_item, future.result()
+            finally:
+                # 提前結束時，尚未開始的工作不再執行
+                for item, future in pending:
+                    future.cancel()
+    
+    def read_log_file(self, file_path):
+        """讀取日誌檔案，檔頭找不到build version時才回退為讀取整個檔案"""
+        with scan_trace.span("scan.read_file") as span:
+            success, content = self._read_log_file(file_path)
+            if success:
+                span.add_bytes(len(content))
+            return success, content
+    
+    def _read_log_file(self, file_path):
+        """以目前的讀取模式讀取檔頭，需要時再讀取整個檔案"""
+        if self.read_mode == READ_MODE_FULL:
+            return self.ssh_client.execute_command("cat '{}'".format(file_path), cancel_event=self.cancel_event)
+        
+        if self.read_mode == READ_MODE_LINES:
+            command = "head -n {} '{}'".format(int(self.read_limit), file_path)
+        else:
+            command = "head -c {} '{}'".format(int(self.read_limit), file_path)
+        
+        success, content = self.ssh_client.execute_command(command, cancel_event=self.cancel_event)
+        if not success:
+            return success, content
+        
+        if self.read_mode == READ_MODE_BYTES:
+            truncated = len(content.encode()) >= self.read_limit
+        else:
+            truncated = content.count('\n') >= self.read_limit
+        content, truncated = self.trim_header(content, truncated)
+        
+        # 找到標記，或檔案本身比讀取上限短（已讀完整個檔案）
+        if BUILD_VERSION_MARKER in content.lower() or not truncated:
+            return True, content
+        
+        # 檔頭中沒有build version標記，讀取整個檔案
+        return self.ssh_client.execute_command("cat '{}'".format(file_path), cancel_event=self.cancel_event)
+    
+    def extract_build_version(self, content):
+        """從檔案內容中提取build version資訊（單次掃描，找到即停止）"""
+        return extract_build_version(content)
@@ -0,0 +1,212 @@
+import re
+
+
+# 擷取規則名稱
+RULE_BUILD_VERSION = "build_version"
+RULE_CONSTRUCT = "construct"
+RULE_POLLING = "polling"
+RULE_ERROR = "error"
+
+# 串流讀取時每次處理的字元數
+DEFAULT_CHUNK_SIZE = 1 << 20
+
+_TIME_PATTERN = re.compile(r'(\d{2}:\d{2}:\d{2}\.\d{3})')
+_VERSION_PATTERN = re.compile(r'build version :(\d+\.\d+\.\d+)')
+_VERSION_TIME_PATTERN = re.compile(r'(\d{12})')
+_CONSTRUCT_PATTERN = re.compile(r'construct "([^"]+)"\.\.\.\s*([^\t\x00]*)')
+_POLLING_PATTERN = re.compile(r'adding "polling"\.\.\.\s*([^\t\x00]*)')
+_LEVEL_PATTERN = re.compile(r'^(\d{2}:\d{2}:\d{2}\.\d{3})\t(ERROR|FATAL|CRITICAL)\t(.*)$', re.IGNORECASE)
+
+
+def _line_time(line):
+    """取出行首的時間 HH:MM:SS.mmm"""
+    match = _TIME_PATTERN.search(line)
+    return match.group(1) if match else "Unknown"
+
+
+def parse_build_version(line):
+    """解析build version行：開機時間、版本號、版本時間"""
+    version_match = _VERSION_PATTERN.search(line)
+    version_time_match = _VERSION_TIME_PATTERN.search(line)
+    return {
+        'time': _line_time(line),
+        'version': version_match.group(1) if version_match else "Unknown",
+        'version_time': version_time_match.group(1) if version_time_match else "Unknown",
+        # 與批次掃描（tr -d '\\000'）一致，各種掃描模式保存相同的行
+        'full_line': line.replace('\x00', '').strip()
+    }
+
+
+def parse_construct(line):
+    """解析元件建構行：類別與元件名稱"""
+    match = _CONSTRUCT_PATTERN.search(line)
+    if not match:
+        return None
+    return {'time': _line_time(line), 'category': match.group(1), 'component': match.group(2).strip()}
+
+
+def parse_polling(line):
+    """解析polling註冊行"""
+    match = _POLLING_PATTERN.search(line)
+    if not match:
+        return None
+    return {'time': _line_time(line), 'name': match.group(1).strip()}
+
+
+def parse_error(line):
+    """解析錯誤等級的日誌行"""
+    match = _LEVEL_PATTERN.search(line)
+    if not match:
+        return None
+    return {'time': match.group(1), 'level': match.group(2).upper(), 'message': match.group(3).strip()}
+
+
+class ExtractRule:
+    """單一事件的擷取規則：以關鍵字快速篩選行，再以解析函式取出欄位"""
+    __slots__ = ('name', 'keyword', 'parse', 'max_matches')
+
+    def __init__(self, name, keyword, parse, max_matches=None):
+        self.name = name
+        self.keyword = keyword
+        self.parse = parse
+        self.max_matches = max_matches
+
+
+DEFAULT_RULES = (
+    ExtractRule(RULE_BUILD_VERSION, "build version", parse_build_version, max_matches=1),
+    ExtractRule(RULE_CONSTRUCT, 'construct "', parse_construct),
+    ExtractRule(RULE_POLLING, 'adding "polling"', parse_polling),
+    ExtractRule(RULE_ERROR, "\terror\t", parse_error),
+    ExtractRule(RULE_ERROR, "\tfatal\t", parse_error),
+    ExtractRule(RULE_ERROR, "\tcritical\t", parse_error),
+)
+
+
+class LogExtractor:
+    """單次掃描日誌並同時擷取多種事件
+
+    每個區塊只轉一次小寫，以str.find直接定位含有關鍵字的行，不需要逐行在Python中
+    轉小寫或比對；所有有上限的規則都滿足後立即停止。
+    """
+
+    def __init__(self, rules=DEFAULT_RULES):
+        self.rules = tuple(rules)
+        self._compiled = {}
+
+    def _prepare(self, names):
+        """取得指定規則與合併後的關鍵字正規表示式（依規則組合快取）"""
+        key = None if names is None else tuple(sorted(set(names)))
+        prepared = self._compiled.get(key)
+        if prepared is None:
+            active = [rule for rule in self.rules if names is None or rule.name in names]
+            keywords = sorted(set(rule.keyword for rule in active), key=len, reverse=True)
+            combined = re.compile("|".join(re.escape(keyword) for keyword in keywords), re.IGNORECASE) if keywords else None
+            by_keyword = {}
+            for rule in active:
+                by_keyword.setdefault(rule.keyword.lower(), []).append(rule)
+            prepared = (active, combined, by_keyword)
+            self._compiled[key] = prepared
+        return prepared
+
+    def extract(self, content, names=None):
+        """從完整內容擷取事件，回傳 {規則名稱: [事件]}"""
+        return self.extract_chunks((content,), names)
+
+    def extract_stream(self, stream, names=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """從檔案物件串流擷取事件，擷取完成即停止讀取"""
+        def chunks():
+            while True:
+                data = stream.read(chunk_size)
+                if not data:
+                    return
+                yield data.decode(errors="replace") if isinstance(data, bytes) else data
+        return self.extract_chunks(chunks(), names)
+
+    def extract_chunks(self, chunks, names=None):
+        """從依序傳入的文字區塊擷取事件，區塊之間的行會正確接合"""
+        active, combined, by_keyword = self._prepare(names)
+        results = dict((rule.name, []) for rule in active)
+        if combined is None:
+            return results
+
+        # 只有全部規則都有數量上限時才可能提早結束
+        limited = all(rule.max_matches is not None for rule in active)
+        state = {'pending': set(rule.name for rule in active)}
+
+        carry = ""
+        for chunk in chunks:
+            text = carry + chunk if carry else chunk
+            end = text.rfind('\n')
+            if end < 0:
+                carry = text
+                continue
+            carry = text[end + 1:]
+            if self._scan_block(text[:end + 1], combined, by_keyword, results, state) and limited:
+                return results
+
+        if carry:
+            self._scan_block(carry, combined, by_keyword, results, state)
+        return results
+
+    def _find_line_starts(self, block, combined, by_keyword):
+        """找出含有任一關鍵字的行首位置（已排序、不重複）"""
+        lowered = block.lower()
+        if len(lowered) == len(block):
+            # 整塊轉小寫後以str.find搜尋各關鍵字，速度遠高於忽略大小寫的正規表示式
+            positions = set()
+            for keyword in by_keyword:
+                position = lowered.find(keyword)
+                while position >= 0:
+                    positions.add(lowered.rfind('\n', 0, position) + 1)
+                    position = lowered.find('\n', position)
+                    if position < 0:
+                        break
+                    position = lowered.find(keyword, position)
+            return sorted(positions)
+
+        # 少數Unicode字元轉小寫後長度會改變，此時改用正規表示式定位
+        positions = set()
+        for match in combined.finditer(block):
+            positions.add(block.rfind('\n', 0, match.start()) + 1)
+        return sorted(positions)
+
+    def _scan_block(self, block, combined, by_keyword, results, state):
+        """掃描一段完整行組成的文字，所有規則都已滿足時回傳True"""
+        for line_start in self._find_line_starts(block, combined, by_keyword):
+            line_end = block.find('\n', line_start)
+            line = block[line_start:line_end if line_end >= 0 else len(block)]
+            lowered = line.lower()
+
+            for keyword, rules in by_keyword.items():
+                if keyword not in lowered:
+                    continue
+                for rule in rules:
+                    events = results[rule.name]
+                    if rule.max_matches is not None and len(events) >= rule.max_matches:
+                        continue
+                    event = rule.parse(line)
+                    if event is None:
+                        continue
+                    events.append(event)
+                    if rule.max_matches is not None and len(events) >= rule.max_matches:
+                        state['pending'].discard(rule.name)
+                        if not state['pending']:
+                            return True
+        return False
+
+
+# 預設的擷取器實例
+log_extractor = LogExtractor()
+
+
+def extract_build_version(content):
+    """從檔案內容中提取build version資訊，找不到時各欄位為Unknown"""
+    events = log_extractor.extract(content, (RULE_BUILD_VERSION,))[RULE_BUILD_VERSION]
+    if events:
+        return events[0]
+    return {
+        'time': "Unknown",
+        'version': "Unknown",
+        'version_time': "Unknown",
+        'full_line': "build version not found"
+    }
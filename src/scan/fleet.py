@@ -0,0 +1,71 @@
+import time
+
+from ssh import build_listing_command, parse_listing_output, build_batch_scan_input
+from .core import LogScanner, DEFAULT_LOG_DIRECTORY
+
+
+def get_host_key(connection):
+    """取得設備的識別字串，與SearchWindow的掃描快取共用"""
+    return "{}@{}:{}".format(connection.get('username', ''), connection.get('ip', ''), connection.get('port', 22))
+
+
+async def scan_fleet_host(engine, session_key, profile_name, connection, start_time=None, end_time=None,
+                          log_directory=DEFAULT_LOG_DIRECTORY, scan_cache=None):
+    """以非同步SSH引擎掃描單一設備的開機紀錄，回傳該設備的掃描結果
+
+    有scan_cache時只從設備讀取新增或變更的檔案，scanned_files為本次實際讀取的檔案數；
+    error_stage記錄失敗的階段（connect、listing或scan），成功時為None。
+    """
+    host_key = get_host_key(connection)
+    result = {
+        'profile': profile_name,
+        'host': host_key,
+        'records': [],
+        'restart_count': 0,
+        'scanned_files': 0,
+        'error': None,
+        'error_stage': None,
+        'duration': 0.0
+    }
+
+    started = time.time()
+    try:
+        password = "" if connection.get('allow_no_password') else connection.get('password', '')
+        success, message = await engine.connect(session_key, connection.get('ip', ''), connection.get('port', 22),
+                                                connection.get('username', ''), password)
+        if not success:
+            result['error'] = message
+            result['error_stage'] = "connect"
+            return result
+
+        # 沿用LogScanner的時間過濾、快取與紀錄解析，只將遠端命令改為非同步執行
+        scanner = LogScanner(None, log_directory, start_time, end_time,
+                             scan_cache=scan_cache, host_key=host_key,
+                             on_found=result['records'].append)
+
+        success, output = await engine.execute(session_key, build_listing_command(log_directory))
+        if not success:
+            result['error'] = "Failed to list files in directory: {}".format(output)
+            result['error_stage'] = "listing"
+            return result
+
+        entries = parse_listing_output(output)
+        candidates = scanner.select_candidates(entries)
+        restart_count, pending = scanner.report_cached(candidates, len(entries))
+        result['cached_records'] = len(result['records'])
+
+        if pending:
+            success, output = await engine.execute(session_key, scanner.build_batch_command(),
+                                                   build_batch_scan_input(pending))
+            if not success:
+                result['error'] = "Failed to scan files: {}".format(output)
+                result['error_stage'] = "scan"
+                return result
+            restart_count += scanner.report_batch_lines(output.split('\n'), 0, len(entries))
+            scanner.save_to_cache()
+
+        result['restart_count'] = restart_count
+        result['scanned_files'] = len(pending)
+        return result
+    finally:
+        result['duration'] = time.time() - started
@@ -0,0 +1,213 @@
+import calendar
+import posixpath
+from array import array
+from datetime import datetime
+
+from .core import BootRecord, UNKNOWN_FILE_TIME
+
+
+# 數值欄位的特殊值：-1 表示Unknown，-2 表示無法轉換為數值（原字串另外保存）
+UNKNOWN_VALUE = -1
+OVERFLOW_VALUE = -2
+
+UNKNOWN_TEXT = "Unknown"
+
+
+class StringColumn:
+    """字串欄位，所有字串以UTF-8連續存放在同一個bytearray中，不需要每筆建立字串物件"""
+    __slots__ = ('_data', '_offsets')
+
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array('Q', [0])
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def append(self, text):
+        self._data += text.encode()
+        self._offsets.append(len(self._data))
+
+    def __getitem__(self, index):
+        return self._data[self._offsets[index]:self._offsets[index + 1]].decode()
+
+
+class InternColumn:
+    """重複值很多的字串欄位（版本號、目錄），每個不同的值只保存一次，每筆只存編號"""
+    __slots__ = ('_values', '_ids', '_codes')
+
+    def __init__(self):
+        self._values = []
+        self._ids = {}
+        self._codes = array('I')
+
+    def __len__(self):
+        return len(self._codes)
+
+    def append(self, text):
+        code = self._ids.get(text)
+        if code is None:
+            code = len(self._values)
+            self._values.append(text)
+            self._ids[text] = code
+        self._codes.append(code)
+
+    def __getitem__(self, index):
+        return self._values[self._codes[index]]
+
+
+def _encode_file_time(text):
+    """檔案時間 YYYY-MM-DD HH:MM:SS 轉為epoch秒數（視為UTC，只用於保存與排序）"""
+    if text == UNKNOWN_FILE_TIME:
+        return UNKNOWN_VALUE
+    if len(text) != 19 or text[4] != '-' or text[7] != '-' or text[10] != ' ' or text[13] != ':' or text[16] != ':':
+        return None
+    try:
+        return calendar.timegm((int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                                int(text[11:13]), int(text[14:16]), int(text[17:19])))
+    except ValueError:
+        return None
+
+
+def _decode_file_time(value):
+    if value == UNKNOWN_VALUE:
+        return UNKNOWN_FILE_TIME
+    return datetime.utcfromtimestamp(value).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _encode_clock(text):
+    """開機時間 HH:MM:SS.mmm 轉為當日的毫秒數"""
+    if text == UNKNOWN_TEXT:
+        return UNKNOWN_VALUE
+    if len(text) != 12 or text[2] != ':' or text[5] != ':' or text[8] != '.':
+        return None
+    try:
+        return ((int(text[0:2]) * 60 + int(text[3:5])) * 60 + int(text[6:8])) * 1000 + int(text[9:12])
+    except ValueError:
+        return None
+
+
+def _decode_clock(value):
+    if value == UNKNOWN_VALUE:
+        return UNKNOWN_TEXT
+    seconds, millis = divmod(value, 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return "{:02d}:{:02d}:{:02d}.{:03d}".format(hours, minutes, seconds, millis)
+
+
+def _encode_version_time(text):
+    """版本時間 YYYYMMDDhhmm 轉為整數"""
+    if text == UNKNOWN_TEXT:
+        return UNKNOWN_VALUE
+    if len(text) != 12 or not text.isdigit():
+        return None
+    return int(text)
+
+
+def _decode_version_time(value):
+    if value == UNKNOWN_VALUE:
+        return UNKNOWN_TEXT
+    return "{:012d}".format(value)
+
+
+# 數值欄位：(欄位, array型別, 轉換函式, 還原函式)
+_NUMERIC_FIELDS = (
+    ('file_time', 'q', _encode_file_time, _decode_file_time),
+    ('boot_time', 'l', _encode_clock, _decode_clock),
+    ('version_time', 'q', _encode_version_time, _decode_version_time),
+)
+
+
+class BootRecordStore:
+    """以欄位方式保存大量開機紀錄
+
+    時間欄位以整數陣列保存，版本號、目錄與build version行中重複的部分只保存一次，
+    檔名連續存放，每筆紀錄不需要建立dict或字串物件；需要時才以索引還原為BootRecord。
+    """
+
+    def __init__(self, records=()):
+        self.clear()
+        self.extend(records)
+
+    def clear(self):
+        """清除所有紀錄"""
+        self._directories = InternColumn()
+        self._filenames = StringColumn()
+        self._versions = InternColumn()
+        # build version行以開機時間開頭，其後的內容同一版本都相同，只保存一次
+        self._line_suffixes = InternColumn()
+        self._line_prefixed = array('b')
+        self._numbers = dict((field, array(typecode)) for field, typecode, encode, decode in _NUMERIC_FIELDS)
+        self._overflow = {}  # (欄位, 索引) -> 無法轉為數值的原字串
+
+    def __len__(self):
+        return len(self._filenames)
+
+    def append(self, record):
+        """加入一筆BootRecord，回傳其索引"""
+        index = len(self)
+        self._directories.append(posixpath.dirname(record.path))
+        self._filenames.append(record.filename)
+        self._versions.append(record.version)
+        prefixed = record.full_line.startswith(record.boot_time)
+        self._line_suffixes.append(record.full_line[len(record.boot_time):] if prefixed else record.full_line)
+        self._line_prefixed.append(prefixed)
+        for field, typecode, encode, decode in _NUMERIC_FIELDS:
+            text = getattr(record, field)
+            value = encode(text)
+            if value is None:
+                value = OVERFLOW_VALUE
+                self._overflow[(field, index)] = text
+            self._numbers[field].append(value)
+        return index
+
+    def extend(self, records):
+        """加入多筆紀錄"""
+        for record in records:
+            self.append(record)
+
+    def value(self, index, field):
+        """取得單一欄位的顯示字串（與BootRecord的屬性相同）"""
+        if field == 'filename':
+            return self._filenames[index]
+        if field == 'version':
+            return self._versions[index]
+        if field == 'full_line':
+            if self._line_prefixed[index]:
+                return self.value(index, 'boot_time') + self._line_suffixes[index]
+            return self._line_suffixes[index]
+        if field == 'path':
+            return posixpath.join(self._directories[index], self._filenames[index])
+        for numeric_field, typecode, encode, decode in _NUMERIC_FIELDS:
+            if numeric_field == field:
+                value = self._numbers[field][index]
+                if value == OVERFLOW_VALUE:
+                    return self._overflow[(field, index)]
+                return decode(value)
+        raise KeyError(field)
+
+    def sort_key(self, index, field):
+        """取得排序用的值：時間欄位為整數（Unknown排在最前面），其他欄位為字串"""
+        numbers = self._numbers.get(field)
+        if numbers is not None:
+            return numbers[index]
+        return self.value(index, field)
+
+    def sorted_indices(self, field, reverse=False):
+        """依欄位排序後的索引陣列，同值時依檔案時間排列"""
+        file_times = self._numbers['file_time']
+        order = sorted(range(len(self)), key=lambda index: (self.sort_key(index, field), file_times[index]),
+                       reverse=reverse)
+        return array('l', order)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("record index out of range")
+        return BootRecord(*(self.value(index, field) for field in BootRecord.__slots__))
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
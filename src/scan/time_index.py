@@ -0,0 +1,137 @@
+import calendar
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from .record_store import BootRecordStore
+
+
+# 未指定開始/結束時間時使用的邊界（epoch秒數）
+MIN_EPOCH = -(2 ** 62)
+MAX_EPOCH = 2 ** 62
+
+
+def to_epoch(value):
+    """將檔名時間（無時區的datetime）轉為epoch秒數，與BootRecordStore的file_time欄位相同"""
+    return calendar.timegm(value.timetuple())
+
+
+def from_epoch(value):
+    """將epoch秒數還原為datetime，邊界值回傳None"""
+    if value <= MIN_EPOCH or value >= MAX_EPOCH:
+        return None
+    return datetime.utcfromtimestamp(value)
+
+
+class ScanTimeIndex:
+    """已掃描結果的時間索引
+
+    紀錄依檔名時間（epoch秒數）排序，以二分搜尋取出任意時間範圍內的紀錄；同時記錄哪些
+    時間範圍已經從設備掃描過，重新篩選時只需要掃描尚未涵蓋的部分。
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        """清除所有紀錄與已掃描範圍"""
+        self._store = BootRecordStore()
+        self._times = array('q')  # 依時間遞增排列的epoch秒數
+        self._positions = array('l')  # 與_times對應的紀錄索引
+        self._unknown = []  # 檔名無法解析時間的紀錄索引
+        self._paths = set()
+        self._covered = []  # 已掃描的時間範圍 [(開始, 結束)]，包含兩端且互不重疊
+        self._unknown_covered = False
+
+    def __len__(self):
+        return len(self._store)
+
+    def add(self, record):
+        """加入一筆紀錄，已存在相同路徑的紀錄時回傳False"""
+        if record.path in self._paths:
+            return False
+        self._paths.add(record.path)
+        index = self._store.append(record)
+        epoch = self._store.sort_key(index, 'file_time')
+        if epoch < 0:
+            self._unknown.append(index)
+        else:
+            position = bisect_right(self._times, epoch)
+            self._times.insert(position, epoch)
+            self._positions.insert(position, index)
+        return True
+
+    def _bounds(self, start_time, end_time):
+        """時間範圍轉為epoch秒數，未指定時為邊界值"""
+        start = MIN_EPOCH if start_time is None else to_epoch(start_time)
+        end = MAX_EPOCH if end_time is None else to_epoch(end_time)
+        return start, end
+
+    def query(self, start_time=None, end_time=None):
+        """取出時間範圍內（包含兩端）的紀錄，未指定範圍時也包含無法解析時間的紀錄"""
+        start, end = self._bounds(start_time, end_time)
+        low = bisect_left(self._times, start)
+        high = bisect_right(self._times, end)
+        records = [self._store[index] for index in self._positions[low:high]]
+        if start_time is None and end_time is None:
+            records.extend(self._store[index] for index in self._unknown)
+        return records
+
+    def count(self, start_time=None, end_time=None):
+        """時間範圍內的紀錄數（重啟次數），不需要還原紀錄"""
+        start, end = self._bounds(start_time, end_time)
+        count = bisect_right(self._times, end) - bisect_left(self._times, start)
+        if start_time is None and end_time is None:
+            count += len(self._unknown)
+        return count
+
+    def epochs(self, start_time=None, end_time=None):
+        """時間範圍內（包含兩端）的開機時間epoch秒數，遞增排列，不含無法解析時間的紀錄"""
+        start, end = self._bounds(start_time, end_time)
+        return self._times[bisect_left(self._times, start):bisect_right(self._times, end)]
+
+    def mark_covered(self, start_time=None, end_time=None, until=None):
+        """記錄時間範圍已完整掃描；until之後設備可能還會產生新檔案，不算已涵蓋"""
+        start, end = self._bounds(start_time, end_time)
+        if until is not None:
+            end = min(end, to_epoch(until))
+        if start_time is None and end_time is None:
+            self._unknown_covered = True
+        if start > end:
+            return
+
+        merged = []
+        for covered_start, covered_end in self._covered:
+            if covered_end + 1 < start or covered_start > end + 1:
+                merged.append((covered_start, covered_end))
+            else:
+                start = min(start, covered_start)
+                end = max(end, covered_end)
+        merged.append((start, end))
+        merged.sort()
+        self._covered = merged
+
+    def missing_ranges(self, start_time=None, end_time=None):
+        """回傳時間範圍中尚未掃描的部分 [(開始, 結束)]（datetime，None表示不限）
+
+        未指定範圍時需要包含無法解析時間的檔案，只要這類檔案未掃描過就回傳整個範圍。
+        """
+        if start_time is None and end_time is None and not self._unknown_covered:
+            return [(None, None)]
+
+        start, end = self._bounds(start_time, end_time)
+        missing = []
+        cursor = start
+        for covered_start, covered_end in self._covered:
+            if covered_end < cursor:
+                continue
+            if covered_start > end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start - 1))
+            cursor = covered_end + 1
+            if cursor > end:
+                break
+        if cursor <= end:
+            missing.append((cursor, end))
+        return [(from_epoch(range_start), from_epoch(range_end)) for range_start, range_end in missing]
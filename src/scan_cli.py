@@ -0,0 +1,207 @@
+import sys
+import os
+import csv
+import json
+import argparse
+from datetime import datetime
+
+import scan_trace
+from config import config_manager, scan_cache, version_inventory
+from scan import LogScanner, analyze_reboots, filename_epochs
+from scan.analytics import DEFAULT_BURST_BOOTS, DEFAULT_BURST_MINUTES, write_analysis
+from scan.core import (UNKNOWN_FILE_TIME, DEFAULT_LOG_DIRECTORY, DEFAULT_SCAN_CHANNELS, READ_MODE_BYTES, READ_MODE_LINES,
+                       READ_MODE_FULL, DEFAULT_READ_MODE, SCAN_MODE_BATCH, SCAN_MODE_PER_FILE, SCAN_MODE_SFTP, DEFAULT_SCAN_MODE)
+
+
+# 命令列掃描工具：不載入Qt，可在cron或沒有圖形介面的跳板機上執行
+
+OUTPUT_JSON = "json"
+OUTPUT_CSV = "csv"
+
+CSV_FIELDS = ['filename', 'path', 'file_time', 'boot_time', 'version', 'version_time', 'full_line']
+
+TIME_FORMATS = ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d")
+
+
+def parse_time_argument(value):
+    """解析命令列的時間參數，支援 YYYY-MM-DD [HH:MM[:SS]]"""
+    for time_format in TIME_FORMATS:
+        try:
+            return datetime.strptime(value, time_format)
+        except ValueError:
+            continue
+    raise argparse.ArgumentTypeError("Invalid time '{}', expected YYYY-MM-DD [HH:MM[:SS]]".format(value))
+
+
+def build_parser():
+    """建立命令列參數解析器"""
+    parser = argparse.ArgumentParser(description="Scan AGV logs for build version records without a GUI.")
+    target = parser.add_argument_group("connection")
+    target.add_argument("--profile", help="saved connection profile name (from ssh_config.json)")
+    target.add_argument("--host", help="AGV IP address")
+    target.add_argument("--port", type=int, default=22, help="SSH port (default: 22)")
+    target.add_argument("--user", help="SSH username")
+    target.add_argument("--password", default=None,
+                        help="SSH password (default: $AGV_SSH_PASSWORD, empty tries SSH keys)")
+
+    options = parser.add_argument_group("scan")
+    options.add_argument("--log-dir", default=DEFAULT_LOG_DIRECTORY, help="remote log directory")
+    options.add_argument("--start", type=parse_time_argument, help="only files booted at or after this time")
+    options.add_argument("--end", type=parse_time_argument, help="only files booted at or before this time")
+    options.add_argument("--scan-mode", choices=(SCAN_MODE_BATCH, SCAN_MODE_PER_FILE, SCAN_MODE_SFTP),
+                         default=DEFAULT_SCAN_MODE)
+    options.add_argument("--read-mode", choices=(READ_MODE_BYTES, READ_MODE_LINES, READ_MODE_FULL),
+                         default=DEFAULT_READ_MODE)
+    options.add_argument("--read-limit", type=int, default=None, help="header size in bytes or lines")
+    options.add_argument("--channels", type=int, default=DEFAULT_SCAN_CHANNELS, help="parallel channels per connection")
+    options.add_argument("--no-cache", action="store_true", help="do not read or write the local scan cache")
+    options.add_argument("--no-inventory", action="store_true",
+                         help="do not add the found records to the local version inventory")
+    options.add_argument("--device-helper", action="store_true",
+                         help="use the on-device helper script if it is installed (batch mode)")
+    options.add_argument("--install-helper", action="store_true",
+                         help="upload the on-device helper script if missing, then use it (batch mode)")
+
+    analytics = parser.add_argument_group("analytics")
+    analytics.add_argument("--burst-boots", type=int, default=DEFAULT_BURST_BOOTS,
+                           help="boots that count as a crash loop (default: {})".format(DEFAULT_BURST_BOOTS))
+    analytics.add_argument("--burst-minutes", type=float, default=DEFAULT_BURST_MINUTES,
+                           help="crash loop window in minutes (default: {})".format(DEFAULT_BURST_MINUTES))
+    analytics.add_argument("--stats", metavar="FILE",
+                           help="also write reboot statistics to FILE (.csv for CSV, otherwise JSON)")
+
+    parser.add_argument("--trace", metavar="FILE",
+                        help="record per-phase timings, write them as a Chrome trace to FILE and print a summary")
+    parser.add_argument("--format", choices=(OUTPUT_JSON, OUTPUT_CSV), default=OUTPUT_JSON, help="output format")
+    parser.add_argument("--output", "-o", default="-", help="output file (default: stdout)")
+    return parser
+
+
+def resolve_connection(args):
+    """依命令列參數或已儲存的profile取得連線資訊，回傳 (成功與否, 連線資訊或錯誤訊息)"""
+    connection = {}
+    if args.profile:
+        connection = config_manager.load_connection_by_name(args.profile)
+        if not connection:
+            return False, "Profile not found: {}".format(args.profile)
+        if connection.get('allow_no_password'):
+            connection['password'] = ""
+
+    if args.host:
+        connection['ip'] = args.host
+    if args.user:
+        connection['username'] = args.user
+    if args.host or 'port' not in connection:
+        connection['port'] = args.port
+    if args.password is not None:
+        connection['password'] = args.password
+    elif 'password' not in connection:
+        connection['password'] = os.environ.get("AGV_SSH_PASSWORD", "")
+
+    if not connection.get('ip') or not connection.get('username'):
+        return False, "Either --profile or both --host and --user are required"
+    return True, connection
+
+
+def run_scan(ssh_client, connection, args):
+    """執行掃描，回傳掃描結果"""
+    result = {
+        'host': "{}@{}:{}".format(connection['username'], connection['ip'], connection['port']),
+        'log_directory': args.log_dir,
+        'start': args.start.strftime("%Y-%m-%d %H:%M:%S") if args.start else None,
+        'end': args.end.strftime("%Y-%m-%d %H:%M:%S") if args.end else None,
+        'restart_count': None,
+        'records': [],
+        'errors': []
+    }
+
+    found = []
+
+    def on_found(record):
+        found.append(record)
+        row = record.to_dict()
+        if row['file_time'] == UNKNOWN_FILE_TIME:
+            row['file_time'] = None
+        result['records'].append(row)
+
+    scanner = LogScanner(ssh_client, args.log_dir, args.start, args.end,
+                         read_mode=args.read_mode, read_limit=args.read_limit, scan_mode=args.scan_mode,
+                         scan_cache=None if args.no_cache else scan_cache, host_key=result['host'],
+                         channels=args.channels, on_found=on_found, on_error=result['errors'].append,
+                         device_helper=args.device_helper, install_helper=args.install_helper)
+    result['restart_count'] = scanner.scan()
+    if found and not args.no_inventory:
+        version_inventory.add_records(result['host'], found)
+    result['records'].sort(key=lambda record: record['file_time'] or "")
+    epochs = filename_epochs(record['filename'] for record in result['records'])
+    result['analytics'] = analyze_reboots([(result['host'], epochs)], args.burst_boots, args.burst_minutes)
+    return result
+
+
+def write_result(result, output_format, stream):
+    """以JSON或CSV格式輸出掃描結果"""
+    if output_format == OUTPUT_JSON:
+        json.dump(result, stream, indent=2, ensure_ascii=False)
+        stream.write("\n")
+        return
+
+    writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS)
+    writer.writeheader()
+    for record in result['records']:
+        writer.writerow(record)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    success, connection = resolve_connection(args)
+    if not success:
+        print("Error: {}".format(connection), file=sys.stderr)
+        return 2
+    if args.trace:
+        scan_trace.enable()
+
+    # paramiko只在真正連線時才載入
+    from ssh import SSHClient
+    ssh_client = SSHClient()
+    try:
+        success, message = ssh_client.connect(connection['ip'], connection['port'], connection['username'],
+                                              connection.get('password', ""))
+        if not success:
+            print("Error: {}".format(message), file=sys.stderr)
+            return 1
+
+        result = run_scan(ssh_client, connection, args)
+    finally:
+        ssh_client.close()
+
+    if args.output == "-":
+        write_result(result, args.format, sys.stdout)
+    else:
+        with open(args.output, 'w', encoding='utf-8', newline='') as f:
+            write_result(result, args.format, f)
+
+    if args.stats:
+        with open(args.stats, 'w', encoding='utf-8', newline='') as f:
+            write_analysis(result['analytics'], f, OUTPUT_CSV if args.stats.lower().endswith(".csv") else OUTPUT_JSON)
+
+    if args.trace:
+        with open(args.trace, 'w', encoding='utf-8') as f:
+            scan_trace.write_trace(f)
+        scan_trace.report()
+
+    for error in result['errors']:
+        print("Error: {}".format(error), file=sys.stderr)
+    if result['restart_count'] is None:
+        return 1
+    if args.format == OUTPUT_CSV:
+        print("Restart count: {}".format(result['restart_count']), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        print("Program interrupted by user", file=sys.stderr)
+        sys.exit(130)
@@ -0,0 +1,206 @@
+import json
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+
+
+# 掃描追蹤：記錄連線、遠端命令、列出檔案、讀取檔案、擷取與UI更新各階段的耗時與傳輸量。
+# 設定環境變數 AGV_SCAN_TRACE=1 或呼叫enable()啟用；未啟用時span()回傳共用的空物件，幾乎沒有額外負擔
+ENABLED = os.environ.get("AGV_SCAN_TRACE", "") not in ("", "0")
+
+# 保留的個別事件上限（Chrome trace用），超過後只累計統計，避免長時間監看時佔用過多記憶體
+MAX_EVENTS = 200000
+
+_origin = time.perf_counter()
+_lock = threading.Lock()
+_events = []  # (名稱, 開始秒數, 持續秒數, 執行緒id, 位元組數, 參數)
+_stats = {}  # 名稱 -> [次數, 位元組數, 持續秒數array]
+_threads = {}  # 執行緒id -> 執行緒名稱
+_state = {'dropped': 0}
+
+
+class _NullSpan:
+    """追蹤未啟用時使用的空物件"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def add_bytes(self, count):
+        pass
+
+    def set(self, key, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """一段追蹤區間，以with使用，結束時記錄耗時、位元組數與參數"""
+    __slots__ = ('name', 'args', 'bytes', 'start')
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+        self.bytes = 0
+        self.start = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        record(self.name, self.start, time.perf_counter(), self.bytes, self.args)
+        return False
+
+    def add_bytes(self, count):
+        """累計這段區間傳輸的位元組數"""
+        self.bytes += count
+
+    def set(self, key, value):
+        """設定顯示在Chrome trace中的參數"""
+        if self.args is None:
+            self.args = {}
+        self.args[key] = value
+
+
+def enable(enabled=True):
+    """啟用或停用追蹤（已記錄的資料保留，需要時以reset()清除）"""
+    global ENABLED
+    ENABLED = bool(enabled)
+
+
+def is_enabled():
+    """追蹤是否已啟用"""
+    return ENABLED
+
+
+def span(name, **args):
+    """建立追蹤區間，未啟用時回傳空物件"""
+    if not ENABLED:
+        return _NULL_SPAN
+    return Span(name, args or None)
+
+
+def start():
+    """手動計時的開始時間，未啟用時回傳None，搭配record()用於跨越多個函式的區間"""
+    return time.perf_counter() if ENABLED else None
+
+
+def record(name, started, ended=None, byte_count=0, args=None):
+    """記錄一段已結束的區間，started為start()或time.perf_counter()的回傳值，為None時不記錄"""
+    if started is None or not ENABLED:
+        return
+    if ended is None:
+        ended = time.perf_counter()
+    duration = ended - started
+    thread = threading.current_thread()
+    with _lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = [0, 0, array('d')]
+        stats[0] += 1
+        stats[1] += byte_count
+        stats[2].append(duration)
+        if len(_events) < MAX_EVENTS:
+            _events.append((name, started - _origin, duration, thread.ident, byte_count, args))
+            _threads[thread.ident] = thread.name
+        else:
+            _state['dropped'] += 1
+
+
+def reset():
+    """清除所有已記錄的資料"""
+    with _lock:
+        del _events[:]
+        _stats.clear()
+        _threads.clear()
+        _state['dropped'] = 0
+
+
+def _percentile(ordered, fraction):
+    """已排序資料的百分位數（最近排名法）"""
+    if not ordered:
+        return 0.0
+    rank = max(1, int(math.ceil(fraction * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def summary():
+    """各區間名稱的統計，依總耗時由大到小排列"""
+    with _lock:
+        items = [(name, stats[0], stats[1], sorted(stats[2])) for name, stats in _stats.items()]
+    result = []
+    for name, count, byte_count, durations in items:
+        total = sum(durations)
+        result.append({
+            'name': name,
+            'count': count,
+            'total_ms': round(total * 1000, 3),
+            'p50_ms': round(_percentile(durations, 0.5) * 1000, 3),
+            'p95_ms': round(_percentile(durations, 0.95) * 1000, 3),
+            'max_ms': round(durations[-1] * 1000, 3) if durations else 0.0,
+            'bytes': byte_count,
+        })
+    result.sort(key=lambda item: item['total_ms'], reverse=True)
+    return result
+
+
+def format_bytes(count):
+    """以KB/MB顯示位元組數"""
+    if count >= 1024 * 1024:
+        return "{:.1f} MB".format(count / 1024.0 / 1024.0)
+    if count >= 1024:
+        return "{:.1f} KB".format(count / 1024.0)
+    return "{} B".format(count)
+
+
+def format_summary(items=None):
+    """以文字表格顯示統計"""
+    items = summary() if items is None else items
+    if not items:
+        return "No trace data recorded"
+    lines = ["{:<22} {:>7} {:>11} {:>9} {:>9} {:>9} {:>10}".format(
+        "phase", "count", "total ms", "p50 ms", "p95 ms", "max ms", "bytes")]
+    for item in items:
+        lines.append("{:<22} {:>7} {:>11.1f} {:>9.2f} {:>9.2f} {:>9.2f} {:>10}".format(
+            item['name'], item['count'], item['total_ms'], item['p50_ms'], item['p95_ms'], item['max_ms'],
+            format_bytes(item['bytes']) if item['bytes'] else "-"))
+    if _state['dropped']:
+        lines.append("({} events beyond {} were counted but not kept for the trace file)".format(
+            _state['dropped'], MAX_EVENTS))
+    return "\n".join(lines)
+
+
+def write_trace(stream):
+    """以Chrome trace格式（chrome://tracing、Perfetto可開啟）輸出所有事件，summary欄位另含統計"""
+    with _lock:
+        events = list(_events)
+        threads = dict(_threads)
+    pid = os.getpid()
+    trace_events = [{'name': "thread_name", 'ph': "M", 'pid': pid, 'tid': tid, 'args': {'name': name}}
+                    for tid, name in threads.items()]
+    for name, started, duration, tid, byte_count, args in events:
+        event = {'name': name, 'cat': name.split(".")[0], 'ph': "X", 'pid': pid, 'tid': tid,
+                 'ts': round(started * 1e6, 1), 'dur': round(duration * 1e6, 1)}
+        if byte_count or args:
+            event['args'] = dict(args or {})
+            if byte_count:
+                event['args']['bytes'] = byte_count
+        trace_events.append(event)
+    json.dump({'traceEvents': trace_events, 'displayTimeUnit': "ms", 'summary': summary(),
+               'dropped_events': _state['dropped']}, stream, indent=1, default=str)
+    stream.write("\n")
+
+
+def report(title="Scan trace"):
+    """在stderr輸出統計表"""
+    if _stats:
+        print("[{}]\n{}".format(title, format_summary()), file=sys.stderr)
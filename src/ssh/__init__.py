@@ -1,3 +1,37 @@
-from .ssh_client import SSHClient, SSHWorker
+import importlib
 
-__all__ = ['SSHClient', 'SSHWorker']
\ No newline at end of file
+# 名稱與所在子模組的對應，第一次使用時才載入子模組：
+# 只需要遠端命令產生函式時不會載入paramiko，不使用SSHWorker時不會載入Qt
+_EXPORTS = {
+    'SSHClient': '.ssh_client',
+    'SSHWorker': '.ssh_worker',
+    'SessionManager': '.session_manager',
+    'session_manager': '.session_manager',
+    'SFTPFetcher': '.sftp_fetcher',
+    'AsyncSSHEngine': '.async_engine',
+    'build_listing_command': '.batch_scan',
+    'parse_listing_output': '.batch_scan',
+    'build_batch_scan_command': '.batch_scan',
+    'build_batch_scan_input': '.batch_scan',
+    'parse_batch_record': '.batch_scan',
+    'HELPER_VERSION': '.device_helper',
+    'build_helper_script': '.device_helper',
+    'build_helper_probe_command': '.device_helper',
+    'parse_helper_probe_output': '.device_helper',
+    'build_helper_install_command': '.device_helper',
+    'is_helper_installed': '.device_helper',
+    'build_helper_scan_command': '.device_helper',
+    'build_helper_input': '.device_helper',
+}
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = ['SSHClient', 'SSHWorker', 'SessionManager', 'session_manager', 'SFTPFetcher', 'AsyncSSHEngine', 'build_listing_command', 'parse_listing_output', 'build_batch_scan_command', 'build_batch_scan_input', 'parse_batch_record', 'HELPER_VERSION', 'build_helper_script', 'build_helper_probe_command', 'parse_helper_probe_output', 'build_helper_install_command', 'is_helper_installed', 'build_helper_scan_command', 'build_helper_input']
\ No newline at end of file
@@ -0,0 +1,179 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import asyncssh
+    ASYNCSSH_AVAILABLE = True
+except ImportError:
+    ASYNCSSH_AVAILABLE = False
+
+from .ssh_client import SSHClient
+
+
+# 同時進行中的設備數上限
+DEFAULT_MAX_SESSIONS = 300
+# 沒有asyncssh時，paramiko阻塞呼叫使用的執行緒池大小，同時連線的設備數也不超過此值
+DEFAULT_EXECUTOR_WORKERS = 32
+DEFAULT_CONNECT_TIMEOUT = 10
+DEFAULT_COMMAND_TIMEOUT = 60
+DEFAULT_HOST_TIMEOUT = 300
+
+
+class AsyncSSHEngine:
+    """以asyncio管理大量設備的SSH連線與命令
+
+    有安裝asyncssh時直接在事件迴圈中以非同步方式連線，不需要每台設備一個執行緒；
+    否則將paramiko的阻塞呼叫交給有上限的執行緒池。paramiko每個連線另有自己的
+    Transport執行緒，因此此時同時連線的設備數限制為執行緒池大小（executor_workers）。
+    每台設備的連線、命令與整體工作都有各自的逾時。
+    """
+
+    def __init__(self, max_sessions=DEFAULT_MAX_SESSIONS, executor_workers=DEFAULT_EXECUTOR_WORKERS,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, command_timeout=DEFAULT_COMMAND_TIMEOUT,
+                 host_timeout=DEFAULT_HOST_TIMEOUT, use_asyncssh=None):
+        self.max_sessions = max(1, int(max_sessions))
+        self.executor_workers = max(1, int(executor_workers))
+        self.connect_timeout = connect_timeout
+        self.command_timeout = command_timeout
+        self.host_timeout = host_timeout
+        self.use_asyncssh = ASYNCSSH_AVAILABLE if use_asyncssh is None else (use_asyncssh and ASYNCSSH_AVAILABLE)
+        if not self.use_asyncssh:
+            # 每個paramiko連線都有一個Transport執行緒，不讓執行緒數隨設備數增加
+            self.max_sessions = min(self.max_sessions, self.executor_workers)
+        self._executor = None
+        self._sessions = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, traceback):
+        await self.close_all()
+
+    def _run_blocking(self, func, *args):
+        """在執行緒池中執行paramiko的阻塞呼叫"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.executor_workers)
+        loop = asyncio.get_event_loop()
+        return loop.run_in_executor(self._executor, functools.partial(func, *args))
+
+    async def connect(self, host_key, ip, port, username, password=""):
+        """連線到設備，回傳 (成功與否, 訊息)"""
+        try:
+            if self.use_asyncssh:
+                connection = await asyncio.wait_for(
+                    self._connect_asyncssh(ip, port, username, password), self.connect_timeout)
+            else:
+                connection = SSHClient()
+                pending = self._run_blocking(connection.connect, ip, port, username, password)
+                try:
+                    success, message = await asyncio.wait_for(asyncio.shield(pending), self.connect_timeout)
+                except asyncio.TimeoutError:
+                    # 執行緒池中的握手可能在逾時後才完成，完成時再關閉一次，避免留下Transport執行緒
+                    pending.add_done_callback(lambda _: connection.close())
+                    connection.close()
+                    raise
+                if not success:
+                    connection.close()
+                    return False, message
+            self._sessions[host_key] = connection
+            return True, "Connection successful"
+        except asyncio.TimeoutError:
+            return False, "Connection timeout. Please check IP address and port."
+        except Exception as e:
+            return False, "Connection failed: {}".format(str(e))
+
+    async def _connect_asyncssh(self, ip, port, username, password):
+        """以asyncssh連線，沒有密碼時依序嘗試SSH金鑰與空密碼（與SSHClient相同）"""
+        if password:
+            return await asyncssh.connect(ip, port=port, username=username, password=password, known_hosts=None)
+        try:
+            return await asyncssh.connect(ip, port=port, username=username, known_hosts=None)
+        except asyncssh.PermissionDenied:
+            return await asyncssh.connect(ip, port=port, username=username, password="",
+                                          client_keys=None, agent_path=None, known_hosts=None)
+
+    async def execute(self, host_key, command, input_data=None, timeout=None):
+        """在設備上執行命令，回傳 (成功與否, 輸出或錯誤訊息)"""
+        connection = self._sessions.get(host_key)
+        if connection is None:
+            return False, "Not connected to SSH server"
+
+        timeout = timeout or self.command_timeout
+        try:
+            if self.use_asyncssh:
+                result = await asyncio.wait_for(connection.run(command, input=input_data, check=False), timeout)
+                if result.stderr:
+                    return False, result.stderr
+                return True, result.stdout or ""
+            return await asyncio.wait_for(
+                self._run_blocking(self._execute_blocking, connection, command, input_data), timeout)
+        except asyncio.TimeoutError:
+            # 關閉連線使仍在執行緒池中阻塞的讀取結束
+            await self.close(host_key)
+            return False, "Command timed out after {}s".format(timeout)
+        except Exception as e:
+            return False, "Command execution failed: {}".format(str(e))
+
+    def _execute_blocking(self, client, command, input_data):
+        """paramiko版本的命令執行（在執行緒池中執行）"""
+        if input_data is None:
+            return client.execute_command(command)
+        success, lines = client.stream_command(command, input_data)
+        if not success:
+            return False, lines
+        output = "\n".join(lines)
+        if lines.error:
+            return False, lines.error
+        return True, output
+
+    async def close(self, host_key):
+        """關閉單一設備的連線"""
+        connection = self._sessions.pop(host_key, None)
+        if connection is None:
+            return
+        try:
+            if self.use_asyncssh:
+                connection.close()
+                await connection.wait_closed()
+            else:
+                await self._run_blocking(connection.close)
+        except Exception:
+            pass
+
+    async def close_all(self):
+        """關閉所有連線並釋放執行緒池"""
+        for host_key in list(self._sessions.keys()):
+            await self.close(host_key)
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    async def run_hosts(self, host_jobs, host_timeout=None):
+        """並行執行多台設備的工作，依完成順序產生 (設備, 結果, 錯誤訊息)
+
+        host_jobs 為 (設備識別, 工作) 的清單，工作是接受 (engine, 設備識別) 的coroutine函式。
+        同時進行的設備數受max_sessions限制，每台設備完成或逾時後即關閉連線。
+        """
+        semaphore = asyncio.Semaphore(self.max_sessions)
+        host_timeout = host_timeout or self.host_timeout
+
+        async def guarded(host_key, job):
+            async with semaphore:
+                try:
+                    result = await asyncio.wait_for(job(self, host_key), host_timeout)
+                    return host_key, result, None
+                except asyncio.TimeoutError:
+                    return host_key, None, "Host timed out after {}s".format(host_timeout)
+                except Exception as e:
+                    return host_key, None, "Host job failed: {}".format(str(e))
+                finally:
+                    await self.close(host_key)
+
+        tasks = [asyncio.ensure_future(guarded(host_key, job)) for host_key, job in host_jobs]
+        try:
+            for future in asyncio.as_completed(tasks):
+                yield await future
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,94 @@
+import os
+
+
+# 每筆紀錄的開頭標記，用來忽略遠端shell可能輸出的其他雜訊
+RECORD_TAG = "R"
+
+# 遠端批次掃描腳本：從stdin逐行讀入檔案路徑，每個檔案輸出一筆紀錄
+#   R<TAB>路徑<TAB>大小<TAB>修改時間<TAB>build version行
+# 日誌中的build version行含有NUL字元，先以tr移除避免grep視為二進位檔；
+# 以位元組讀取檔頭時最後一行可能被截斷，以sed捨棄最後一行
+_BATCH_SCAN_SCRIPT = (
+    "while IFS= read -r f; do "
+    "s=$(stat -c '%s %Y' \"$f\" 2>/dev/null) || s='-1 -1'; "
+    "l=$({reader} 2>/dev/null | tr -d '\\000'{trim} | grep -i -m 1 '{marker}'); "
+    "{fallback}"
+    "printf '{tag}\\t%s\\t%s\\t%s\\t%s\\n' \"$f\" \"${{s% *}}\" \"${{s#* }}\" \"$l\"; "
+    "done"
+)
+
+_FULL_READ_FALLBACK = (
+    "if [ -z \"$l\" ]; then "
+    "l=$(tr -d '\\000' 2>/dev/null < \"$f\" | grep -i -m 1 '{marker}'); "
+    "fi; "
+)
+
+
+def build_listing_command(log_directory):
+    """產生列出日誌檔案的命令，每行輸出 路徑|大小|修改時間"""
+    return "find {} \\( -name '*.tmp' -o -name 'agvapp_*' \\) -type f -exec stat -c '%n|%s|%Y' {{}} + 2>/dev/null".format(log_directory)
+
+
+def parse_listing_output(output):
+    """解析列出檔案命令的輸出，回傳 [(路徑, 大小, 修改時間)]，無法解析的大小/時間為-1"""
+    entries = []
+    for line in output.split('\n'):
+        line = line.strip()
+        if not line:
+            continue
+        parts = line.rsplit('|', 2)
+        if len(parts) == 3:
+            try:
+                entries.append((parts[0], int(parts[1]), int(parts[2])))
+                continue
+            except ValueError:
+                pass
+        entries.append((line, -1, -1))
+    return entries
+
+
+def build_batch_scan_command(header_bytes=None, header_lines=None, marker="build version"):
+    """產生批次掃描命令，整批候選檔案只需一次遠端往返
+
+    header_bytes/header_lines 指定只讀取檔頭，檔頭找不到標記時在遠端讀取整個檔案；
+    兩者皆為None時直接在遠端掃描整個檔案。
+    """
+    if header_bytes:
+        reader = "head -c {} \"$f\"".format(int(header_bytes))
+    elif header_lines:
+        reader = "head -n {} \"$f\"".format(int(header_lines))
+    else:
+        reader = "cat \"$f\""
+
+    trim = " | sed '$d'" if header_bytes else ""
+    fallback = _FULL_READ_FALLBACK.format(marker=marker) if (header_bytes or header_lines) else ""
+    script = _BATCH_SCAN_SCRIPT.format(reader=reader, trim=trim, marker=marker, fallback=fallback, tag=RECORD_TAG)
+    return "sh -c '{}'".format(script.replace("'", "'\\''"))
+
+
+def build_batch_scan_input(file_paths):
+    """將候選檔案清單轉為批次掃描命令的stdin內容"""
+    return "".join("{}\n".format(path) for path in file_paths)
+
+
+def parse_batch_record(line):
+    """解析批次掃描輸出的一行紀錄，格式不符時回傳None"""
+    parts = line.rstrip("\r\n").split("\t", 4)
+    if len(parts) < 4 or parts[0] != RECORD_TAG:
+        return None
+
+    path = parts[1]
+    try:
+        size = int(parts[2])
+        mtime = int(parts[3])
+    except ValueError:
+        size = -1
+        mtime = -1
+
+    return {
+        'path': path,
+        'filename': os.path.basename(path),
+        'size': size,
+        'mtime': mtime,
+        'line': parts[4] if len(parts) > 4 else ""
+    }
@@ -0,0 +1,164 @@
+import posixpath
+
+
+# 設備端輔助程式：上傳到AGV後在設備上讀取日誌檔頭，只回傳build version行，
+# 並以檔案大小與修改時間為鍵在設備上快取結果，重複查詢時不需要再讀取檔案
+HELPER_VERSION = 2
+HELPER_NAME = "agv-boot-helper"
+# 放在日誌所在的記憶卡上，設備重開機後仍保留（/tmp會被清除）
+HELPER_DIRECTORY = "/run/media/mmcblk1p1/.agv_boot_helper"
+
+_INSTALL_OK = "installed"
+
+# 只使用POSIX sh與awk；輸入每行為 路徑<TAB>大小<TAB>修改時間，輸出與批次掃描相同的紀錄：
+#   R<TAB>路徑<TAB>大小<TAB>修改時間<TAB>build version行
+_HELPER_SCRIPT = r'''#!/bin/sh
+# @NAME@ @VERSION@
+# usage: helper.sh [bytes|lines|full] [limit] [marker] < "path<TAB>size<TAB>mtime" lines
+VERSION=@VERSION@
+if [ "$1" = "--version" ]; then
+    echo "@NAME@ $VERSION"
+    exit 0
+fi
+mode=${1:-bytes}
+limit=${2:-16384}
+marker=${3:-build version}
+cache="$(dirname "$0")/cache_v$VERSION.tsv"
+exec awk -F '\t' -v mode="$mode" -v limit="$limit" -v marker="$marker" -v cache="$cache" -v tmp="$cache.$$" '
+function quote(s,   n, i, parts, out) {
+    n = split(s, parts, SQ)
+    out = SQ parts[1]
+    for (i = 2; i <= n; i++)
+        out = out SQ "\\" SQ SQ parts[i]
+    return out SQ
+}
+function first_line(cmd,   line, found) {
+    found = ""
+    while ((cmd | getline line) > 0)
+        if (found == "")
+            found = line
+    close(cmd)
+    return found
+}
+function extract(f,   q, m, nul, reader, l) {
+    q = quote(f)
+    m = quote(marker)
+    nul = SQ "\\000" SQ
+    if (mode == "lines")
+        reader = "head -n " limit " " q " 2>/dev/null | tr -d " nul
+    else if (mode == "bytes")
+        reader = "head -c " limit " " q " 2>/dev/null | tr -d " nul " | sed " SQ "$d" SQ
+    else
+        reader = "tr -d " nul " < " q " 2>/dev/null"
+    l = first_line(reader " | grep -i -m 1 " m)
+    if (l == "" && mode != "full")
+        l = first_line("tr -d " nul " < " q " 2>/dev/null | grep -i -m 1 " m)
+    return l
+}
+BEGIN {
+    SQ = sprintf("%c", 39)
+    while ((getline entry < cache) > 0) {
+        n = split(entry, p, "\t")
+        sig[p[1]] = p[2] "\t" p[3]
+        found[p[1]] = p[4]
+        for (i = 5; i <= n; i++)
+            found[p[1]] = found[p[1]] "\t" p[i]
+    }
+    close(cache)
+}
+$1 != "" {
+    s = $2 "\t" $3
+    if (!($1 in sig) || sig[$1] != s || $2 < 0) {
+        sig[$1] = s
+        found[$1] = extract($1)
+        changed = 1
+    }
+    seen[$1] = 1
+    printf "R\t%s\t%s\t%s\t%s\n", $1, $2, $3, found[$1]
+    fflush()
+}
+END {
+    # 輸入只包含部分檔案（其他批次或客戶端已快取的檔案不會送來），其餘項目只保留設備上仍存在的檔案
+    unseen = 0
+    for (f in sig)
+        if (!(f in seen)) {
+            print f > (tmp ".unseen")
+            unseen++
+        }
+    if (unseen) {
+        close(tmp ".unseen")
+        cmd = "while IFS= read -r f; do [ -e \"$f\" ] && echo \"$f\"; done < " quote(tmp ".unseen")
+        while ((cmd | getline f) > 0)
+            if (f in sig && !(f in seen)) {
+                seen[f] = 1
+                unseen--
+            }
+        close(cmd)
+        system("rm -f " quote(tmp ".unseen"))
+    }
+    # 已刪除或更名的日誌從快取中移除
+    if (!changed && !unseen)
+        exit 0
+    for (f in seen)
+        printf "%s\t%s\t%s\n", f, sig[f], found[f] > tmp
+    close(tmp)
+    system("mv -f " quote(tmp) " " quote(cache) " 2>/dev/null")
+}
+'
+'''
+
+
+def _quote(value):
+    """以單引號包住shell參數"""
+    return "'{}'".format(value.replace("'", "'\\''"))
+
+
+def helper_script_path(directory=HELPER_DIRECTORY):
+    """設備上輔助程式的路徑，版本號包含在檔名中，新舊版本不會互相覆蓋"""
+    return posixpath.join(directory, "agv_boot_helper_v{}.sh".format(HELPER_VERSION))
+
+
+def build_helper_script():
+    """產生要上傳到設備的輔助程式內容"""
+    return _HELPER_SCRIPT.replace("@NAME@", HELPER_NAME).replace("@VERSION@", str(HELPER_VERSION))
+
+
+def build_helper_probe_command(directory=HELPER_DIRECTORY):
+    """檢查設備上是否已有輔助程式的命令，輸出其版本字串，不存在時沒有輸出"""
+    return "sh {} --version 2>/dev/null || true".format(_quote(helper_script_path(directory)))
+
+
+def parse_helper_probe_output(output):
+    """解析版本檢查的輸出，回傳設備上輔助程式的版本，不存在時回傳None"""
+    for line in output.split('\n'):
+        parts = line.strip().split()
+        if len(parts) == 2 and parts[0] == HELPER_NAME:
+            try:
+                return int(parts[1])
+            except ValueError:
+                return None
+    return None
+
+
+def build_helper_install_command(directory=HELPER_DIRECTORY):
+    """從stdin寫入輔助程式的命令，先寫入暫存檔再更名並移除舊版本與其快取，成功時輸出installed"""
+    path = helper_script_path(directory)
+    return ("mkdir -p {dir} && cat > {tmp} && chmod 755 {tmp} && "
+            "rm -f {dir}/agv_boot_helper_v*.sh {dir}/cache_v*.tsv && mv -f {tmp} {path} && echo {ok}").format(
+        dir=_quote(directory), tmp=_quote(path + ".tmp"), path=_quote(path), ok=_INSTALL_OK)
+
+
+def is_helper_installed(output_lines):
+    """安裝命令的輸出中是否包含成功訊息"""
+    return any(line.strip() == _INSTALL_OK for line in output_lines)
+
+
+def build_helper_scan_command(read_mode, read_limit, marker="build version", directory=HELPER_DIRECTORY):
+    """以輔助程式掃描檔案的命令，read_mode為bytes、lines或full"""
+    return "sh {} {} {} {}".format(_quote(helper_script_path(directory)), read_mode, int(read_limit or 0),
+                                   _quote(marker))
+
+
+def build_helper_input(entries):
+    """將 [(路徑, 大小, 修改時間)] 轉為輔助程式的stdin內容"""
+    return "".join("{}\t{}\t{}\n".format(path, size, mtime) for path, size, mtime in entries)
@@ -0,0 +1,74 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+
+# 閒置中（未被視窗使用）的連線最多保留數量，超過時關閉最舊的連線
+DEFAULT_MAX_IDLE_SESSIONS = 4
+
+
+class SessionManager:
+    """保存已通過認證的SSH連線，在登入頁面與搜尋頁面之間傳遞，避免重新握手與認證"""
+
+    def __init__(self, max_idle_sessions=DEFAULT_MAX_IDLE_SESSIONS):
+        self.max_idle_sessions = max_idle_sessions
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(ip, port, username):
+        """產生連線識別字串"""
+        return "{}@{}:{}".format(username, ip, port)
+
+    @staticmethod
+    def _fingerprint(password):
+        """密碼的雜湊值，只有輸入相同密碼時才沿用已認證的連線"""
+        return hashlib.sha256((password or "").encode()).hexdigest()
+
+    def release(self, key, client, password=""):
+        """將連線交給管理器保存，供下一個視窗或下一次登入使用"""
+        if client is None or not client.is_active():
+            return
+
+        evicted = []
+        with self._lock:
+            previous = self._sessions.pop(key, None)
+            if previous is not None and previous[0] is not client:
+                evicted.append(previous[0])
+            self._sessions[key] = (client, self._fingerprint(password))
+            while len(self._sessions) > self.max_idle_sessions:
+                evicted.append(self._sessions.popitem(last=False)[1][0])
+
+        for old_client in evicted:
+            old_client.close()
+
+    def acquire(self, key, password=""):
+        """取出仍然有效的連線（取出後由呼叫端負責關閉或歸還），沒有時回傳None"""
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is None or session[1] != self._fingerprint(password):
+                return None
+            del self._sessions[key]
+        client = session[0]
+        if not client.is_active():
+            client.close()
+            return None
+        return client
+
+    def has_session(self, key, password=""):
+        """檢查是否有相同認證資訊且可重複使用的連線"""
+        with self._lock:
+            session = self._sessions.get(key)
+        return session is not None and session[1] == self._fingerprint(password) and session[0].is_active()
+
+    def close_all(self):
+        """關閉所有保存中的連線"""
+        with self._lock:
+            clients = [session[0] for session in self._sessions.values()]
+            self._sessions.clear()
+        for client in clients:
+            client.close()
+
+
+# 創建全域實例
+session_manager = SessionManager()
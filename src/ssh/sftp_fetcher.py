@@ -0,0 +1,140 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import paramiko
+
+import scan_trace
+
+
+# 同時開啟的SFTP通道數（通道共用同一個Transport，每次讀取時借用一個閒置的通道）
+DEFAULT_SFTP_WORKERS = 4
+# 等待閒置通道或通道名額時每次等待的秒數
+SLOT_POLL_INTERVAL = 0.05
+
+
+class SFTPFetcher:
+    """在現有的paramiko Transport上以SFTP並行讀取遠端檔案
+
+    不需要在設備上啟動shell或cat，讀取時以readv管線化送出多個讀取請求，
+    高延遲連線下仍能維持傳輸量。
+    指定channel_slots（SSHClient的通道名額）時，每個開啟的SFTP通道都佔用一個名額，
+    與同一連線上的其他命令合計不超過伺服器的MaxSessions。
+    """
+
+    def __init__(self, transport, max_workers=DEFAULT_SFTP_WORKERS, channel_slots=None):
+        self.transport = transport
+        self.max_workers = max(1, int(max_workers))
+        self.channel_slots = channel_slots
+        self._clients = []
+        self._idle = []
+        self._opening = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _acquire_sftp(self):
+        """借用一個閒置的SFTP通道，沒有閒置通道且未達上限時取得通道名額並開啟新的通道"""
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise IOError("SFTP fetcher is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if (len(self._clients) + self._opening < self.max_workers
+                        and (self.channel_slots is None or self.channel_slots.acquire(blocking=False))):
+                    self._opening += 1
+                    break
+                # 通道名額可能由其他命令釋放，不會通知此條件變數，因此定期重新檢查
+                self._condition.wait(SLOT_POLL_INTERVAL)
+
+        sftp = None
+        try:
+            sftp = paramiko.SFTPClient.from_transport(self.transport)
+        finally:
+            with self._condition:
+                self._opening -= 1
+                if sftp is not None and not self._closed:
+                    self._clients.append(sftp)
+                else:
+                    self._release_slot()
+                self._condition.notify()
+        if sftp is None:
+            raise IOError("Failed to open SFTP channel")
+        if sftp not in self._clients:
+            sftp.close()
+            raise IOError("SFTP fetcher is closed")
+        return sftp
+
+    def _return_sftp(self, sftp):
+        """歸還借用的SFTP通道"""
+        with self._condition:
+            if sftp in self._clients:
+                self._idle.append(sftp)
+                self._condition.notify()
+
+    def _release_slot(self):
+        """釋放一個通道名額"""
+        if self.channel_slots is not None:
+            self.channel_slots.release()
+
+    def read_range(self, path, offset=0, length=None):
+        """讀取檔案指定範圍的位元組，length為None時讀到檔案結尾"""
+        try:
+            with scan_trace.span("sftp.read") as span:
+                sftp = self._acquire_sftp()
+                try:
+                    with sftp.open(path, 'rb') as remote_file:
+                        size = remote_file.stat().st_size
+                        available = max(0, size - offset)
+                        length = available if length is None else min(length, available)
+                        if length <= 0:
+                            return True, b""
+                        # readv會將範圍切成多個請求並以prefetch管線化讀取
+                        data = b"".join(remote_file.readv([(offset, length)]))
+                finally:
+                    self._return_sftp(sftp)
+                span.add_bytes(len(data))
+            return True, data
+        except IOError as e:
+            return False, "SFTP read failed: {}".format(str(e))
+        except Exception as e:
+            return False, "SFTP error: {}".format(str(e))
+
+    def fetch_many(self, paths, offset=0, length=None):
+        """並行讀取多個檔案，依輸入順序逐一回傳 (路徑, 成功與否, 資料或錯誤訊息)"""
+        # 只預先排入有限數量的請求，避免讀取大量檔案時佔用過多記憶體
+        window = self.max_workers * 2
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            try:
+                for path in paths:
+                    pending.append((path, executor.submit(self.read_range, path, offset, length)))
+                    if len(pending) >= window:
+                        done_path, future = pending.popleft()
+                        success, data = future.result()
+                        yield done_path, success, data
+
+                while pending:
+                    done_path, future = pending.popleft()
+                    success, data = future.result()
+                    yield done_path, success, data
+            finally:
+                # 呼叫端提前結束（例如取消掃描）時，尚未開始的請求不再執行
+                for path, future in pending:
+                    future.cancel()
+
+    def close(self):
+        """關閉所有SFTP通道並釋放通道名額（不會關閉底層Transport）"""
+        with self._condition:
+            self._closed = True
+            clients = self._clients
+            self._clients = []
+            self._idle = []
+            self._condition.notify_all()
+        for sftp in clients:
+            try:
+                sftp.close()
+            except Exception:
+                pass
+            finally:
+                self._release_slot()
@@ -1,115 +1,137 @@
 import sys
 import paramiko
 import socket
+import threading
+import time
+from collections import deque
 
-try:
-    from PyQt5.QtCore import QThread, pyqtSignal
-    QT_AVAILABLE = True
-except ImportError:
-    try:
-        from PySide2.QtCore import QThread, Signal as pyqtSignal
-        QT_AVAILABLE = True
-    except ImportError:
-        import threading
-        QT_AVAILABLE = False
-
-if QT_AVAILABLE:
-    class SSHWorker(QThread):
-        """SSH連線工作執行緒，用於Qt介面"""
-        success = pyqtSignal()
-        error = pyqtSignal(str)
-        
-        def __init__(self, ip, port, username, password=""):
-            super().__init__()
-            self.ip = ip
-            self.port = port
-            self.username = username
-            self.password = password
-            
-        def run(self):
+import scan_trace
+from .sftp_fetcher import SFTPFetcher, DEFAULT_SFTP_WORKERS
+
+
+# 同一個連線上同時開啟的通道數上限，需低於伺服器的MaxSessions（OpenSSH預設為10）
+DEFAULT_MAX_CHANNELS = 8
+# 單一命令的預設執行期限（秒），None表示不限
+DEFAULT_COMMAND_TIMEOUT = 300
+# 等待通道資料時每次阻塞的上限（秒），決定取消與逾時的反應時間
+CHANNEL_POLL_INTERVAL = 0.05
+# 逐行讀取時保留的標準錯誤輸出上限（位元組），超過的部分仍會讀取但捨棄
+STDERR_LIMIT = 32768
+
+COMMAND_CANCELLED = "Command cancelled"
+
+
+def command_deadline(timeout):
+    """將執行期限（秒）轉為time.monotonic()的截止時間，None表示不限"""
+    return None if timeout is None else time.monotonic() + timeout
+
+
+def check_command_state(cancel_event, deadline, timeout):
+    """檢查命令是否已取消或逾時，回傳錯誤訊息，仍可繼續時回傳None"""
+    if cancel_event is not None and cancel_event.is_set():
+        return COMMAND_CANCELLED
+    if deadline is not None and time.monotonic() > deadline:
+        return "Command timed out after {} seconds".format(timeout)
+    return None
+
+
+class ChannelLineReader:
+    """逐行讀取通道輸出的迭代器，收到資料即回傳不等待命令結束，讀完或關閉時釋放通道名額
+    
+    取消或逾時時關閉通道並結束迭代，已讀到的行仍會回傳，原因記錄在error。
+    標準錯誤輸出與標準輸出同時讀取（避免通道視窗被佔滿而停住），命令有錯誤輸出時也記錄在error。
+    """
+    
+    def __init__(self, channel, channel_slots, chunk_size=32768, cancel_event=None, timeout=None):
+        self.channel = channel
+        self.channel_slots = channel_slots
+        self.chunk_size = chunk_size
+        self.cancel_event = cancel_event
+        self.timeout = timeout
+        self.error = None
+        self.bytes_read = 0
+        self._trace_started = scan_trace.start()
+        self._deadline = command_deadline(timeout)
+        self._buffer = b""
+        self._stderr = b""
+        self._lines = deque()
+        self._eof = False
+        self._closed = False
+        channel.settimeout(CHANNEL_POLL_INTERVAL)
+    
+    def __iter__(self):
+        return self
+    
+    def __next__(self):
+        while not self._lines:
+            if self._eof:
+                self.close()
+                raise StopIteration
+            error = check_command_state(self.cancel_event, self._deadline, self.timeout)
+            if error:
+                self.error = error
+                self.close()
+                raise StopIteration
+            self._read_stderr()
             try:
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                
-                if self.password:
-                    ssh.connect(
-                        hostname=self.ip,
-                        port=self.port,
-                        username=self.username,
-                        password=self.password,
-                        timeout=10
-                    )
-                else:
-                    # 嘗試多種認證方式
-                    connection_successful = False
-                    last_error = None
-                    
-                    # 方式1: 嘗試SSH金鑰認證
-                    try:
-                        ssh.connect(
-                            hostname=self.ip,
-                            port=self.port,
-                            username=self.username,
-                            timeout=10,
-                            look_for_keys=True,
-                            allow_agent=True
-                        )
-                        connection_successful = True
-                    except paramiko.AuthenticationException as e:
-                        last_error = e
-                        # 方式2: 嘗試空密碼
-                        try:
-                            ssh.connect(
-                                hostname=self.ip,
-                                port=self.port,
-                                username=self.username,
-                                password="",
-                                timeout=10,
-                                look_for_keys=False,
-                                allow_agent=False
-                            )
-                            connection_successful = True
-                        except paramiko.AuthenticationException:
-                            pass
-                    
-                    if not connection_successful:
-                        raise last_error if last_error else paramiko.AuthenticationException("All authentication methods failed")
-                
-                stdin, stdout, stderr = ssh.exec_command('echo "SSH connection successful"')
-                result = stdout.read().decode()
-                
-                ssh.close()
-                
-                self.success.emit()
-                
-            except paramiko.AuthenticationException:
-                if self.password:
-                    self.error.emit("Authentication failed. Please check username and password.")
-                else:
-                    self.error.emit("Authentication failed. Tried multiple methods:\n• SSH key authentication\n• Empty password\n\nPlease:\n1. Provide a password, or\n2. Set up SSH key authentication, or\n3. Check if the server allows passwordless login\n4. Verify the username is correct")
-            except paramiko.SSHException as e:
-                self.error.emit("SSH connection error: {}".format(str(e)))
+                data = self.channel.recv(self.chunk_size)
             except socket.timeout:
-                self.error.emit("Connection timeout. Please check IP address and port.")
-            except socket.gaierror:
-                self.error.emit("Invalid hostname or IP address.")
-            except Exception as e:
-                self.error.emit("Connection failed: {}".format(str(e)))
-else:
-    class SSHWorker:
-        """空的SSHWorker類，用於沒有Qt的環境"""
-        def __init__(self, *args, **kwargs):
-            raise ImportError("SSHWorker requires PyQt5 or PySide2")
+                continue
+            if not data:
+                self._eof = True
+                if self._buffer:
+                    self._lines.append(self._buffer.decode(errors="replace"))
+                    self._buffer = b""
+                # 通道的EOF同時結束標準輸出與標準錯誤輸出，剩餘的錯誤輸出都已在緩衝區中
+                self._read_stderr()
+                if self._stderr:
+                    self.error = self._stderr.decode(errors="replace")
+                continue
+            self.bytes_read += len(data)
+            self._buffer += data
+            lines = self._buffer.split(b"\n")
+            self._buffer = lines.pop()
+            self._lines.extend(line.decode(errors="replace") for line in lines)
+        return self._lines.popleft()
+    
+    def _read_stderr(self):
+        """讀取已到達的標準錯誤輸出，只保留前STDERR_LIMIT位元組"""
+        while self.channel.recv_stderr_ready():
+            data = self.channel.recv_stderr(self.chunk_size)
+            if len(self._stderr) < STDERR_LIMIT:
+                self._stderr += data[:STDERR_LIMIT - len(self._stderr)]
+    
+    def close(self):
+        """關閉通道並釋放通道名額"""
+        if self._closed:
+            return
+        self._closed = True
+        scan_trace.record("ssh.stream", self._trace_started, byte_count=self.bytes_read)
+        try:
+            self.channel.close()
+        finally:
+            self.channel_slots.release()
+    
+    def __del__(self):
+        self.close()
 
 
 class SSHClient:
-    """SSH客戶端類，提供SSH連線功能"""
+    """SSH客戶端類，提供SSH連線功能（可由多個執行緒共用，以通道名額限制同時開啟的通道數）"""
     
-    def __init__(self):
+    def __init__(self, max_channels=DEFAULT_MAX_CHANNELS, command_timeout=DEFAULT_COMMAND_TIMEOUT):
         self.ssh = None
+        self.max_channels = max_channels
+        self.command_timeout = command_timeout
+        self._channel_slots = threading.BoundedSemaphore(max_channels)
         
     def connect(self, ip, port, username, password=""):
         """連線到SSH伺服器"""
+        with scan_trace.span("ssh.connect", host=ip):
+            return self._connect(ip, port, username, password)
+    
+    def _connect(self, ip, port, username, password):
+        """建立SSH連線，密碼為空時依序嘗試金鑰與空密碼"""
         try:
             self.ssh = paramiko.SSHClient()
             self.ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
@@ -174,15 +196,58 @@ class SSHClient:
         except Exception as e:
             return False, "Connection failed: {}".format(str(e))
     
-    def execute_command(self, command):
-        """執行SSH命令"""
-        if not self.ssh:
+    def execute_command(self, command, timeout=None, cancel_event=None):
+        """執行SSH命令
+        
+        timeout為執行期限（秒，預設為command_timeout），cancel_event（threading.Event）被設定時
+        立即關閉通道；兩者都以CHANNEL_POLL_INTERVAL為間隔檢查，不會長時間阻塞在讀取上。
+        """
+        with scan_trace.span("ssh.execute") as span:
+            success, output = self._execute_command(command, timeout, cancel_event, span)
+            if not success:
+                span.set('error', output)
+            return success, output
+    
+    def _execute_command(self, command, timeout, cancel_event, span):
+        """在一個新的通道上執行命令並讀取全部輸出，讀取的位元組數計入追蹤區間"""
+        ssh = self.ssh
+        if not ssh:
             return False, "Not connected to SSH server"
+        if timeout is None:
+            timeout = self.command_timeout
         
+        deadline = command_deadline(timeout)
+        error = self._acquire_channel_slot(cancel_event, deadline, timeout)
+        if error:
+            return False, error
+        channel = None
         try:
-            stdin, stdout, stderr = self.ssh.exec_command(command)
-            output = stdout.read().decode()
-            error = stderr.read().decode()
+            channel = ssh.get_transport().open_session()
+            channel.settimeout(CHANNEL_POLL_INTERVAL)
+            channel.exec_command(command)
+            
+            output = []
+            errors = []
+            while True:
+                error = check_command_state(cancel_event, deadline, timeout)
+                if error:
+                    return False, error
+                while channel.recv_stderr_ready():
+                    errors.append(channel.recv_stderr(32768))
+                try:
+                    data = channel.recv(32768)
+                except socket.timeout:
+                    continue
+                if not data:
+                    break
+                span.add_bytes(len(data))
+                output.append(data)
+            # 通道的EOF同時結束標準輸出與標準錯誤輸出，剩餘的錯誤輸出都已在緩衝區中
+            while channel.recv_stderr_ready():
+                errors.append(channel.recv_stderr(32768))
+            
+            output = b"".join(output).decode(errors="replace")
+            error = b"".join(errors).decode(errors="replace")
             
             if error:
                 return False, error
@@ -191,6 +256,58 @@ class SSHClient:
                 
         except Exception as e:
             return False, "Command execution failed: {}".format(str(e))
+        finally:
+            try:
+                if channel is not None:
+                    channel.close()
+            finally:
+                self._channel_slots.release()
+    
+    def _acquire_channel_slot(self, cancel_event, deadline, timeout):
+        """等待通道名額，每CHANNEL_POLL_INTERVAL檢查一次取消與逾時，取得名額時回傳None，否則回傳錯誤訊息"""
+        while True:
+            error = check_command_state(cancel_event, deadline, timeout)
+            if error:
+                return error
+            if self._channel_slots.acquire(timeout=CHANNEL_POLL_INTERVAL):
+                return None
+    
+    def stream_command(self, command, input_data=None, timeout=None, cancel_event=None):
+        """執行SSH命令並以迭代器逐行回傳輸出，整個命令只使用一個通道"""
+        ssh = self.ssh
+        if not ssh:
+            return False, "Not connected to SSH server"
+        if timeout is None:
+            timeout = self.command_timeout
+        
+        error = self._acquire_channel_slot(cancel_event, command_deadline(timeout), timeout)
+        if error:
+            return False, error
+        try:
+            stdin, stdout, stderr = ssh.exec_command(command)
+            if input_data:
+                stdin.write(input_data)
+            stdin.channel.shutdown_write()
+            return True, ChannelLineReader(stdout.channel, self._channel_slots,
+                                           cancel_event=cancel_event, timeout=timeout)
+        except Exception as e:
+            self._channel_slots.release()
+            return False, "Command execution failed: {}".format(str(e))
+    
+    def open_sftp_fetcher(self, max_workers=DEFAULT_SFTP_WORKERS):
+        """在目前連線的Transport上建立SFTP批次讀取器，未連線時回傳None"""
+        ssh = self.ssh
+        if not ssh or not ssh.get_transport():
+            return None
+        # SFTP通道同樣計入伺服器的MaxSessions，與其他命令共用通道名額
+        return SFTPFetcher(ssh.get_transport(), min(max_workers, self.max_channels), self._channel_slots)
+    
+    def is_active(self):
+        """檢查連線是否仍然有效"""
+        if not self.ssh:
+            return False
+        transport = self.ssh.get_transport()
+        return transport is not None and transport.is_active()
     
     def close(self):
         """關閉SSH連線"""
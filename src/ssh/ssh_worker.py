@@ -0,0 +1,57 @@
+try:
+    from PyQt5.QtCore import QThread, pyqtSignal
+    QT_AVAILABLE = True
+except ImportError:
+    try:
+        from PySide2.QtCore import QThread, Signal as pyqtSignal
+        QT_AVAILABLE = True
+    except ImportError:
+        QT_AVAILABLE = False
+
+import startup_timing
+from .session_manager import session_manager
+
+
+if QT_AVAILABLE:
+    class SSHWorker(QThread):
+        """SSH連線工作執行緒，用於Qt介面"""
+        success = pyqtSignal()
+        error = pyqtSignal(str)
+        
+        def __init__(self, ip, port, username, password=""):
+            super().__init__()
+            self.ip = ip
+            self.port = port
+            self.username = username
+            self.password = password
+            
+        def run(self):
+            try:
+                # 已有同一主機的有效連線時直接沿用，不需要再次握手與認證
+                key = session_manager.make_key(self.ip, self.port, self.username)
+                if session_manager.has_session(key, self.password):
+                    self.success.emit()
+                    return
+                
+                # paramiko與加密套件在此工作執行緒中才載入，不會延遲登入視窗顯示
+                from .ssh_client import SSHClient
+                startup_timing.mark("paramiko imported")
+                
+                client = SSHClient()
+                success, message = client.connect(self.ip, self.port, self.username, self.password)
+                if not success:
+                    self.error.emit(message)
+                    return
+                
+                # 保留已認證的連線交給搜尋頁面使用，而不是關閉後再重新連線
+                session_manager.release(key, client, self.password)
+                startup_timing.mark("SSH authenticated")
+                self.success.emit()
+                
+            except Exception as e:
+                self.error.emit("Connection failed: {}".format(str(e)))
+else:
+    class SSHWorker:
+        """空的SSHWorker類，用於沒有Qt的環境"""
+        def __init__(self, *args, **kwargs):
+            raise ImportError("SSHWorker requires PyQt5 or PySide2")
@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+
+# 設定環境變數 AGV_STARTUP_TIMING=1 時，在stderr輸出啟動與連線各階段的耗時
+ENABLED = os.environ.get("AGV_STARTUP_TIMING", "") not in ("", "0")
+
+# 報告中會列出是否已載入的耗時模組
+HEAVY_MODULES = ("paramiko", "cryptography", "numpy", "ui.search", "ui.fleet")
+
+_origin = time.perf_counter()
+_marks = []
+# 第一次報告從程式啟動開始計算，之後的報告從該報告的第一個階段開始計算
+_state = {'reported': False}
+
+
+def mark(label):
+    """記錄一個階段完成的時間點（可在任何執行緒中呼叫）"""
+    if ENABLED:
+        _marks.append((label, time.perf_counter()))
+
+
+def report(title):
+    """輸出自上次報告以來各階段的耗時，並列出已載入的耗時模組"""
+    if not ENABLED or not _marks:
+        return
+    marks = list(_marks)
+    del _marks[:len(marks)]
+
+    lines = ["[{}]".format(title)]
+    previous = marks[0][1] if _state['reported'] else _origin
+    _state['reported'] = True
+    for label, timestamp in marks:
+        lines.append("  {:<36} {:9.1f} ms  (+{:.1f} ms)".format(
+            label, (timestamp - _origin) * 1000, (timestamp - previous) * 1000))
+        previous = timestamp
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+    lines.append("  loaded heavy modules: {}".format(", ".join(loaded) if loaded else "none"))
+    print("\n".join(lines), file=sys.stderr)
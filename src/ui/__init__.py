@@ -1,4 +1,20 @@
-from .login import SSHConnectionApp
-from .search import SearchWindow
+import importlib
 
-__all__ = ['SSHConnectionApp', 'SearchWindow']
\ No newline at end of file
+# 名稱與所在子模組的對應，第一次使用時才載入，啟動時只需要載入登入視窗
+_EXPORTS = {
+    'SSHConnectionApp': '.login',
+    'SearchWindow': '.search',
+    'FleetScanWindow': '.fleet',
+}
+
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError("module '{}' has no attribute '{}'".format(__name__, name))
+    value = getattr(importlib.import_module(module_name, __name__), name)
+    globals()[name] = value
+    return value
+
+
+__all__ = ['SSHConnectionApp', 'SearchWindow', 'FleetScanWindow']
\ No newline at end of file
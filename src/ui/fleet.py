@@ -0,0 +1,398 @@
+try:
+    from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QMessageBox, QProgressBar, QDateTimeEdit, QGroupBox, QGridLayout, QCheckBox, QListWidget, QListWidgetItem, QTableWidget, QTableWidgetItem, QSpinBox, QHeaderView, QAbstractItemView, QFileDialog
+    from PyQt5.QtCore import Qt, QThread, pyqtSignal, QDateTime
+    from PyQt5.QtGui import QFont
+    QT_AVAILABLE = True
+except ImportError:
+    try:
+        from PySide2.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QMessageBox, QProgressBar, QDateTimeEdit, QGroupBox, QGridLayout, QCheckBox, QListWidget, QListWidgetItem, QTableWidget, QTableWidgetItem, QSpinBox, QHeaderView, QAbstractItemView, QFileDialog
+        from PySide2.QtCore import Qt, QThread, Signal as pyqtSignal, QDateTime
+        from PySide2.QtGui import QFont
+        QT_AVAILABLE = True
+    except ImportError:
+        print("Error: PyQt5 or PySide2 is required to run this application.")
+        raise ImportError("Qt library not found")
+
+import sys
+import os
+import time
+import asyncio
+import functools
+from datetime import datetime
+# 添加父目錄到Python路徑，以便導入其他模組
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import config_manager, scan_cache, version_inventory
+from ssh import AsyncSSHEngine
+from scan import analyze_reboots, filename_epochs
+from scan.fleet import get_host_key, scan_fleet_host
+from scan.analytics import summarize, write_analysis, format_duration
+from scan.core import UNKNOWN_FILE_TIME
+
+
+# 同時掃描的設備數上限
+DEFAULT_FLEET_SESSIONS = 64
+MAX_FLEET_SESSIONS = 500
+# 關閉窗口時等待掃描停止的時間（毫秒）
+WORKER_STOP_TIMEOUT = 2000
+
+LOG_DIRECTORY = "/run/media/mmcblk1p1/log/agvapp/"
+
+
+def to_datetime(qdatetime):
+    """將QDateTime轉換為datetime"""
+    date = qdatetime.date()
+    clock = qdatetime.time()
+    return datetime(date.year(), date.month(), date.day(), clock.hour(), clock.minute(), clock.second())
+
+
+class FleetScanWorker(QThread):
+    """車隊掃描工作執行緒，在單一執行緒中以asyncio引擎並行掃描所有設備"""
+    finished = pyqtSignal()
+    host_finished = pyqtSignal(dict)  # 單一設備的掃描結果
+    progress = pyqtSignal(int, int)  # 已完成設備數, 總數
+    
+    def __init__(self, profiles, start_time=None, end_time=None, max_sessions=DEFAULT_FLEET_SESSIONS):
+        super().__init__()
+        self.profiles = profiles
+        self.start_time = start_time
+        self.end_time = end_time
+        self.max_sessions = max(1, min(max_sessions, MAX_FLEET_SESSIONS))
+        self._stop_requested = False
+        self._loop = None
+        self._scan_task = None
+        self._host_started = {}
+    
+    def stop(self):
+        """停止車隊掃描，在事件迴圈中取消掃描工作，尚未完成的設備會被取消"""
+        self._stop_requested = True
+        loop, task = self._loop, self._scan_task
+        if loop is not None and task is not None:
+            try:
+                loop.call_soon_threadsafe(task.cancel)
+            except RuntimeError:
+                pass  # 事件迴圈已結束
+    
+    def run(self):
+        try:
+            asyncio.run(self.scan_all())
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print("Fleet scan failed: {}".format(e))
+        finally:
+            self._loop = None
+            self._scan_task = None
+        self.finished.emit()
+    
+    async def scan_all(self):
+        """並行掃描所有設備，每完成一台即發送結果"""
+        self._loop = asyncio.get_event_loop()
+        self._scan_task = asyncio.current_task()
+        if self._stop_requested:
+            return
+        total = len(self.profiles)
+        done = 0
+        jobs = []
+        for profile_name, connection in self.profiles:
+            job = functools.partial(self.scan_host, profile_name=profile_name, connection=connection)
+            jobs.append((profile_name, job))
+        
+        async with AsyncSSHEngine(max_sessions=self.max_sessions) as engine:
+            async for profile_name, result, error in engine.run_hosts(jobs):
+                if error:
+                    # 實際耗費的時間，逾時的設備即為host_timeout
+                    started = self._host_started.get(profile_name)
+                    connection = dict(self.profiles).get(profile_name, {})
+                    result = {'profile': profile_name, 'host': get_host_key(connection), 'records': [],
+                              'restart_count': 0, 'error': error,
+                              'duration': time.time() - started if started else 0.0}
+                done += 1
+                self.host_finished.emit(result)
+                self.progress.emit(done, total)
+                if self._stop_requested:
+                    break
+    
+    async def scan_host(self, engine, session_key, profile_name, connection):
+        """單一設備的掃描工作"""
+        self._host_started[profile_name] = time.time()
+        return await scan_fleet_host(engine, session_key, profile_name, connection, self.start_time, self.end_time,
+                                     LOG_DIRECTORY, scan_cache)
+
+
+class FleetScanWindow(QMainWindow):
+    def __init__(self):
+        super().__init__()
+        self.fleet_worker = None
+        self.scan_started = 0.0
+        self.failed_hosts = 0
+        self.host_results = []
+        self.analysis = None
+
+        self.setWindowTitle("AGV 車隊版本掃描")
+        self.setGeometry(150, 150, 1100, 750)
+
+        self.create_widgets()
+        self.load_profiles()
+
+    def closeEvent(self, event):
+        """處理窗口關閉事件"""
+        if self.fleet_worker and self.fleet_worker.isRunning():
+            self.fleet_worker.stop()
+            # 仍在執行緒池中阻塞的paramiko呼叫可能無法立即結束，不無限期等待
+            self.fleet_worker.wait(WORKER_STOP_TIMEOUT)
+        event.accept()
+
+    def create_widgets(self):
+        central_widget = QWidget()
+        self.setCentralWidget(central_widget)
+
+        main_layout = QVBoxLayout()
+        central_widget.setLayout(main_layout)
+
+        # 標題
+        title_label = QLabel("AGV車隊版本掃描")
+        title_font = QFont("Arial", 16, QFont.Bold)
+        title_label.setFont(title_font)
+        title_label.setAlignment(Qt.AlignCenter)
+        main_layout.addWidget(title_label)
+
+        top_layout = QHBoxLayout()
+
+        # 設備清單
+        profile_group = QGroupBox("設備")
+        profile_layout = QVBoxLayout()
+        profile_group.setLayout(profile_layout)
+
+        self.profile_list = QListWidget()
+        profile_layout.addWidget(self.profile_list)
+
+        select_layout = QHBoxLayout()
+        select_all_button = QPushButton("全選")
+        select_all_button.clicked.connect(lambda: self.set_all_checked(True))
+        select_layout.addWidget(select_all_button)
+        select_none_button = QPushButton("全不選")
+        select_none_button.clicked.connect(lambda: self.set_all_checked(False))
+        select_layout.addWidget(select_none_button)
+        profile_layout.addLayout(select_layout)
+
+        top_layout.addWidget(profile_group, 1)
+
+        # 掃描設定
+        option_group = QGroupBox("掃描設定")
+        option_layout = QGridLayout()
+        option_group.setLayout(option_layout)
+
+        self.enable_time_filter = QCheckBox("使用時間過濾進行篩選(未勾選為全部搜尋)")
+        self.enable_time_filter.setChecked(True)
+        self.enable_time_filter.toggled.connect(self.on_time_filter_toggled)
+        option_layout.addWidget(self.enable_time_filter, 0, 0, 1, 2)
+
+        option_layout.addWidget(QLabel("Start:"), 1, 0)
+        self.start_edit = QDateTimeEdit(QDateTime.currentDateTime().addDays(-1))
+        self.start_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.start_edit.setCalendarPopup(True)
+        option_layout.addWidget(self.start_edit, 1, 1)
+
+        option_layout.addWidget(QLabel("End:"), 2, 0)
+        self.end_edit = QDateTimeEdit(QDateTime.currentDateTime())
+        self.end_edit.setDisplayFormat("yyyy-MM-dd HH:mm:ss")
+        self.end_edit.setCalendarPopup(True)
+        option_layout.addWidget(self.end_edit, 2, 1)
+
+        option_layout.addWidget(QLabel("並行數:"), 3, 0)
+        self.worker_spin = QSpinBox()
+        self.worker_spin.setRange(1, MAX_FLEET_SESSIONS)
+        self.worker_spin.setValue(DEFAULT_FLEET_SESSIONS)
+        option_layout.addWidget(self.worker_spin, 3, 1)
+
+        top_layout.addWidget(option_group, 1)
+        main_layout.addLayout(top_layout)
+
+        # 控制按鈕
+        button_layout = QHBoxLayout()
+        self.scan_button = QPushButton("開始車隊掃描")
+        self.scan_button.clicked.connect(self.start_scan)
+        button_layout.addWidget(self.scan_button)
+
+        self.stop_button = QPushButton("停止")
+        self.stop_button.clicked.connect(self.stop_scan)
+        self.stop_button.setEnabled(False)
+        button_layout.addWidget(self.stop_button)
+        main_layout.addLayout(button_layout)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        main_layout.addWidget(self.progress_bar)
+
+        # 結果表格：主機 × 開機時間 × 版本 × 重啟次數
+        self.result_table = QTableWidget(0, 6)
+        self.result_table.setHorizontalHeaderLabels(["主機", "開機時間", "版本號", "版本時間", "重啟次數", "狀態"])
+        self.result_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.result_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        main_layout.addWidget(self.result_table)
+
+        # 車隊重啟統計：所有設備的開機時間以一次運算求得
+        analytics_layout = QHBoxLayout()
+        self.analytics_label = QLabel("")
+        analytics_layout.addWidget(self.analytics_label, 1)
+        self.export_stats_button = QPushButton("匯出統計")
+        self.export_stats_button.setEnabled(False)
+        self.export_stats_button.clicked.connect(self.export_analysis)
+        analytics_layout.addWidget(self.export_stats_button)
+        main_layout.addLayout(analytics_layout)
+
+        self.status_label = QLabel("Ready to scan fleet")
+        self.status_label.setStyleSheet("color: blue;")
+        main_layout.addWidget(self.status_label)
+
+    def load_profiles(self):
+        """載入所有已儲存的連線設定"""
+        self.profile_list.clear()
+        for profile_name in config_manager.get_profile_names():
+            item = QListWidgetItem(profile_name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.profile_list.addItem(item)
+
+    def set_all_checked(self, checked):
+        """全選或全不選設備"""
+        state = Qt.Checked if checked else Qt.Unchecked
+        for i in range(self.profile_list.count()):
+            self.profile_list.item(i).setCheckState(state)
+
+    def on_time_filter_toggled(self):
+        """時間過濾開關狀態改變時的處理"""
+        enabled = self.enable_time_filter.isChecked()
+        self.start_edit.setEnabled(enabled)
+        self.end_edit.setEnabled(enabled)
+
+    def start_scan(self):
+        """開始掃描所選設備"""
+        connections = config_manager.get_all_connections()
+        profiles = []
+        for i in range(self.profile_list.count()):
+            item = self.profile_list.item(i)
+            if item.checkState() == Qt.Checked and item.text() in connections:
+                profiles.append((item.text(), connections[item.text()]))
+
+        if not profiles:
+            QMessageBox.warning(self, "Warning", "Please select at least one connection profile")
+            return
+
+        start_time = None
+        end_time = None
+        if self.enable_time_filter.isChecked():
+            start_time = to_datetime(self.start_edit.dateTime())
+            end_time = to_datetime(self.end_edit.dateTime())
+            if start_time > end_time:
+                QMessageBox.warning(self, "Warning", "Start time must be earlier than end time")
+                return
+
+        self.result_table.setRowCount(0)
+        self.failed_hosts = 0
+        self.host_results = []
+        self.analysis = None
+        self.analytics_label.setText("")
+        self.export_stats_button.setEnabled(False)
+        self.scan_started = time.time()
+        self.scan_button.setEnabled(False)
+        self.stop_button.setEnabled(True)
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setValue(0)
+        self.status_label.setText("Scanning {} hosts...".format(len(profiles)))
+        self.status_label.setStyleSheet("color: orange;")
+
+        self.fleet_worker = FleetScanWorker(profiles, start_time, end_time, self.worker_spin.value())
+        self.fleet_worker.host_finished.connect(self.on_host_finished)
+        self.fleet_worker.progress.connect(self.on_progress_update)
+        self.fleet_worker.finished.connect(self.on_scan_finished)
+        self.fleet_worker.start()
+
+    def stop_scan(self):
+        """停止車隊掃描"""
+        if self.fleet_worker and self.fleet_worker.isRunning():
+            self.fleet_worker.stop()
+            self.stop_button.setEnabled(False)
+            self.status_label.setText("Stopping...")
+
+    def on_host_finished(self, result):
+        """單一設備掃描完成，將結果加入表格"""
+        self.result_table.setSortingEnabled(False)
+        self.host_results.append(result)
+        if result['records']:
+            version_inventory.add_records(result['host'], result['records'])
+
+        if result['error']:
+            self.failed_hosts += 1
+            self.add_row([result['host'], "", "", "", "", result['error'].split('\n')[0]])
+        elif not result['records']:
+            self.add_row([result['host'], "", "", "", "0", "OK ({:.1f}s)".format(result['duration'])])
+        else:
+            records = sorted(result['records'], key=lambda record: record.filename)
+            for record in records:
+                boot_time = record.file_time if record.file_time != UNKNOWN_FILE_TIME else record.boot_time
+                self.add_row([result['host'], boot_time, record.version, record.version_time,
+                              str(result['restart_count']), "OK ({:.1f}s)".format(result['duration'])])
+
+        self.result_table.setSortingEnabled(True)
+
+    def add_row(self, values):
+        """新增一列結果"""
+        row = self.result_table.rowCount()
+        self.result_table.insertRow(row)
+        for column, value in enumerate(values):
+            self.result_table.setItem(row, column, QTableWidgetItem(value))
+
+    def on_progress_update(self, current, total):
+        """更新進度條"""
+        if total > 0:
+            self.progress_bar.setValue(int((current / total) * 100))
+            self.status_label.setText("Scanned hosts: {}/{}".format(current, total))
+
+    def on_scan_finished(self):
+        """車隊掃描完成"""
+        self.scan_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
+        self.progress_bar.setVisible(False)
+
+        self.update_analytics()
+
+        elapsed = time.time() - self.scan_started
+        if self.failed_hosts:
+            self.status_label.setText("Fleet scan finished in {:.1f}s, {} host(s) failed".format(elapsed, self.failed_hosts))
+            self.status_label.setStyleSheet("color: orange;")
+        else:
+            self.status_label.setText("Fleet scan finished in {:.1f}s".format(elapsed))
+            self.status_label.setStyleSheet("color: green;")
+
+    def update_analytics(self):
+        """計算成功掃描的設備的重啟統計"""
+        hosts = [(result['host'], filename_epochs(record.filename for record in result['records']))
+                 for result in self.host_results if not result['error']]
+        if not hosts:
+            return
+        self.analysis = analyze_reboots(hosts)
+        self.analytics_label.setText(summarize(self.analysis))
+        looping = [host for host in self.analysis['hosts'] if host['crash_loops']]
+        tooltip = ["{}: 連續重啟 {} 次，平均重啟間隔 {}".format(host['host'], len(host['crash_loops']),
+                                                        format_duration(host['mtbf_seconds'])) for host in looping]
+        self.analytics_label.setToolTip("\n".join(tooltip))
+        self.export_stats_button.setEnabled(True)
+
+    def export_analysis(self):
+        """將車隊重啟統計匯出為JSON或CSV"""
+        if not self.analysis:
+            return
+        path, selected = QFileDialog.getSaveFileName(self, "匯出重啟統計", "fleet_reboot_stats.json",
+                                                     "JSON (*.json);;CSV (*.csv)")
+        if not path:
+            return
+        output_format = "csv" if path.lower().endswith(".csv") else "json"
+        try:
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                write_analysis(self.analysis, f, output_format)
+            self.status_label.setText("Exported reboot statistics to {}".format(path))
+        except (IOError, OSError) as e:
+            QMessageBox.critical(self, "Error", "Failed to export reboot statistics: {}".format(str(e)))
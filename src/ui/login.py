@@ -1,13 +1,13 @@
 try:
-    from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QFrame, QCheckBox, QComboBox
-    from PyQt5.QtCore import Qt, QThread, pyqtSignal
-    from PyQt5.QtGui import QFont
+    from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QFrame, QCheckBox, QComboBox, QCompleter, QFileDialog
+    from PyQt5.QtCore import Qt, QThread, QTimer, QSortFilterProxyModel, pyqtSignal
+    from PyQt5.QtGui import QFont, QStandardItemModel, QStandardItem
     QT_AVAILABLE = True
 except ImportError:
     try:
-        from PySide2.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QFrame, QCheckBox, QComboBox
-        from PySide2.QtCore import Qt, QThread, Signal as pyqtSignal
-        from PySide2.QtGui import QFont
+        from PySide2.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QLabel, QLineEdit, QPushButton, QMessageBox, QFrame, QCheckBox, QComboBox, QCompleter, QFileDialog
+        from PySide2.QtCore import Qt, QThread, QTimer, QSortFilterProxyModel, Signal as pyqtSignal
+        from PySide2.QtGui import QFont, QStandardItemModel, QStandardItem
         QT_AVAILABLE = True
     except ImportError:
         print("Error: PyQt5 or PySide2 is required to run this application.")
@@ -22,15 +22,22 @@ import os
 # 添加父目錄到Python路徑，以便導入其他模組
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
+import startup_timing
 from ssh import SSHWorker
-from config import config_manager
+from config import config_manager, normalize_tags
+
+
+# 快速選取清單中供搜尋的文字（名稱、IP與標籤）
+PROFILE_SEARCH_ROLE = Qt.UserRole + 1
+# 輸入搜尋文字後更新篩選前的等待毫秒數
+PROFILE_SEARCH_DELAY_MS = 150
 
 
 class SSHConnectionApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("SSH Connection Manager")
-        self.setGeometry(100, 100, 400, 350)
+        self.setGeometry(100, 100, 400, 400)
         
         self.create_widgets()
         self.load_last_config()
@@ -65,10 +72,35 @@ class SSHConnectionApp(QMainWindow):
         profile_label = QLabel("快速選取:")
         profile_layout.addWidget(profile_label)
         
+        # 可輸入的下拉式選單：輸入名稱、IP或標籤時以篩選模型即時列出符合的設定
+        self.profile_model = QStandardItemModel(self)
+        self.profile_model.appendRow(QStandardItem("-- Select a saved connection --"))
         self.profile_combo = QComboBox()
-        self.profile_combo.addItem("-- Select a saved connection --")
-        self.profile_combo.currentTextChanged.connect(self.on_profile_selected)
-        profile_layout.addWidget(self.profile_combo)
+        self.profile_combo.setModel(self.profile_model)
+        self.profile_combo.setEditable(True)
+        self.profile_combo.setInsertPolicy(QComboBox.NoInsert)
+        self.profile_combo.setMaxVisibleItems(20)
+        self.profile_combo.view().setUniformItemSizes(True)
+        self.profile_combo.lineEdit().setPlaceholderText("輸入名稱、IP或標籤搜尋")
+        self.profile_combo.currentIndexChanged.connect(self.on_profile_index_changed)
+        
+        self.profile_filter = QSortFilterProxyModel(self)
+        self.profile_filter.setSourceModel(self.profile_model)
+        self.profile_filter.setFilterRole(PROFILE_SEARCH_ROLE)
+        self.profile_filter.setFilterCaseSensitivity(Qt.CaseInsensitive)
+        self.profile_completer = QCompleter(self.profile_filter, self)
+        self.profile_completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.profile_completer.setMaxVisibleItems(15)
+        self.profile_completer.popup().setUniformItemSizes(True)
+        self.profile_completer.activated[str].connect(self.select_profile)
+        self.profile_combo.setCompleter(self.profile_completer)
+        
+        self.profile_search_timer = QTimer(self)
+        self.profile_search_timer.setSingleShot(True)
+        self.profile_search_timer.setInterval(PROFILE_SEARCH_DELAY_MS)
+        self.profile_search_timer.timeout.connect(self.apply_profile_search)
+        self.profile_combo.lineEdit().textEdited.connect(lambda text: self.profile_search_timer.start())
+        profile_layout.addWidget(self.profile_combo, 1)
         
         self.delete_profile_button = QPushButton("刪除")
         self.delete_profile_button.clicked.connect(self.delete_selected_profile)
@@ -77,6 +109,19 @@ class SSHConnectionApp(QMainWindow):
         
         main_layout.addLayout(profile_layout)
         
+        inventory_layout = QHBoxLayout()
+        inventory_layout.addStretch()
+        
+        self.import_profiles_button = QPushButton("匯入設備清單")
+        self.import_profiles_button.clicked.connect(self.import_profiles)
+        inventory_layout.addWidget(self.import_profiles_button)
+        
+        self.export_profiles_button = QPushButton("匯出設備清單")
+        self.export_profiles_button.clicked.connect(self.export_profiles)
+        inventory_layout.addWidget(self.export_profiles_button)
+        
+        main_layout.addLayout(inventory_layout)
+        
         form_layout = QGridLayout()
         
         ip_label = QLabel("IP Address:")
@@ -102,9 +147,15 @@ class SSHConnectionApp(QMainWindow):
         self.password_entry.setEchoMode(QLineEdit.Password)
         form_layout.addWidget(self.password_entry, 3, 1)
         
+        tags_label = QLabel("標籤:")
+        form_layout.addWidget(tags_label, 4, 0)
+        self.tags_entry = QLineEdit()
+        self.tags_entry.setPlaceholderText("例如 site:Taipei; line:L1")
+        form_layout.addWidget(self.tags_entry, 4, 1)
+        
         self.allow_no_password = QCheckBox("不須設定密碼進行登入")
         self.allow_no_password.stateChanged.connect(self.on_allow_no_password_changed)
-        form_layout.addWidget(self.allow_no_password, 4, 0, 1, 2)
+        form_layout.addWidget(self.allow_no_password, 5, 0, 1, 2)
         
         main_layout.addLayout(form_layout)
         
@@ -118,6 +169,10 @@ class SSHConnectionApp(QMainWindow):
         self.save_button.clicked.connect(self.save_config)
         button_layout.addWidget(self.save_button)
         
+        self.fleet_button = QPushButton("車隊掃描")
+        self.fleet_button.clicked.connect(self.open_fleet_window)
+        button_layout.addWidget(self.fleet_button)
+        
         main_layout.addLayout(button_layout)
         
         self.status_label = QLabel("Ready to connect")
@@ -164,11 +219,20 @@ class SSHConnectionApp(QMainWindow):
         self.status_label.setText("連線中...")
         self.status_label.setStyleSheet("color: orange;")
         
+        startup_timing.mark("connect requested")
         self.ssh_worker = SSHWorker(ip, port, username, password)
         self.ssh_worker.success.connect(self.connection_success)
         self.ssh_worker.error.connect(self.connection_failed)
         self.ssh_worker.start()
         
+        # 等待SSH握手期間先載入搜尋視窗模組，連線成功後即可直接開啟
+        QTimer.singleShot(0, self.preload_search_module)
+        
+    def preload_search_module(self):
+        """預先載入搜尋視窗模組"""
+        from . import search
+        startup_timing.mark("search module imported")
+        
     def connection_success(self):
         self.connect_button.setEnabled(True)
         self.status_label.setText("連線成功!")
@@ -200,7 +264,8 @@ class SSHConnectionApp(QMainWindow):
         
         try:
             port_int = int(port)
-            if config_manager.save_config(ip, port_int, username, password, allow_no_password):
+            if config_manager.save_config(ip, port_int, username, password, allow_no_password,
+                                          tags=normalize_tags(self.tags_entry.text())):
                 QMessageBox.information(self, "Success", "Configuration saved successfully!")
                 self.status_label.setText("配置已儲存")
                 self.status_label.setStyleSheet("color: green;")
@@ -228,6 +293,7 @@ class SSHConnectionApp(QMainWindow):
             self.port_entry.setText(str(config.get("port", 22)))
             self.username_entry.setText(config.get("username", ""))
             self.password_entry.setText(config.get("password", ""))
+            self.tags_entry.setText("; ".join(config.get("tags", [])))
             self.allow_no_password.setChecked(config.get("allow_no_password", False))
             
             # 觸發checkbox狀態變化
@@ -253,27 +319,56 @@ class SSHConnectionApp(QMainWindow):
         
         try:
             port_int = int(port)
-            config_manager.save_config(ip, port_int, username, password, allow_no_password)
+            config_manager.save_config(ip, port_int, username, password, allow_no_password,
+                                       tags=normalize_tags(self.tags_entry.text()))
             # 刷新下拉式選單
             self.refresh_profile_combo()
         except:
             pass  # 靜默失敗，不影響連線成功的顯示
     
     def refresh_profile_combo(self):
-        """刷新下拉式選單內容"""
-        current_text = self.profile_combo.currentText()
-        self.profile_combo.clear()
-        self.profile_combo.addItem("-- Select a saved connection --")
-        
-        connections = config_manager.get_all_connections()
-        for profile_name in sorted(connections.keys()):
-            self.profile_combo.addItem(profile_name)
-        
-        # 恢復之前的選擇
-        if current_text and current_text != "-- Select a saved connection --":
-            index = self.profile_combo.findText(current_text)
-            if index >= 0:
-                self.profile_combo.setCurrentIndex(index)
+        """刷新下拉式選單內容，一次建立所有項目再加入模型，數千筆設定也能立即完成"""
+        current_text = self.profile_combo.itemText(self.profile_combo.currentIndex())
+        
+        items = [QStandardItem("-- Select a saved connection --")]
+        for summary in config_manager.get_profile_summaries():
+            item = QStandardItem(summary["profile_name"])
+            item.setData(" ".join([summary["profile_name"], summary["ip"]] + summary["tags"]), PROFILE_SEARCH_ROLE)
+            item.setToolTip("{}:{}  {}".format(summary["ip"], summary["port"], ", ".join(summary["tags"])).strip())
+            items.append(item)
+        
+        # 重建期間不觸發選擇事件，避免重新載入表單
+        self.profile_combo.blockSignals(True)
+        try:
+            self.profile_model.clear()
+            self.profile_model.invisibleRootItem().appendRows(items)
+            
+            # 恢復之前的選擇
+            index = 0
+            if current_text and current_text != "-- Select a saved connection --":
+                index = max(0, self.profile_combo.findText(current_text))
+            self.profile_combo.setCurrentIndex(index)
+        finally:
+            self.profile_combo.blockSignals(False)
+        self.delete_profile_button.setEnabled(self.profile_combo.currentIndex() > 0)
+    
+    def apply_profile_search(self):
+        """依輸入的文字篩選快速選取清單（名稱、IP或標籤包含該文字）並顯示候選清單"""
+        text = self.profile_combo.lineEdit().text().strip()
+        self.profile_filter.setFilterFixedString(text)
+        if text and self.profile_filter.rowCount() > 0:
+            self.profile_completer.complete()
+    
+    def select_profile(self, profile_name):
+        """從搜尋候選清單選擇profile"""
+        index = self.profile_combo.findText(profile_name)
+        if index >= 0:
+            self.profile_combo.setCurrentIndex(index)
+            self.on_profile_selected(profile_name)
+    
+    def on_profile_index_changed(self, index):
+        """下拉式選單選擇的項目改變時觸發"""
+        self.on_profile_selected(self.profile_combo.itemText(index) if index >= 0 else "")
     
     def on_profile_selected(self, profile_name):
         """當選擇下拉式選單項目時觸發"""
@@ -291,6 +386,7 @@ class SSHConnectionApp(QMainWindow):
             self.port_entry.setText(str(config.get("port", 22)))
             self.username_entry.setText(config.get("username", ""))
             self.password_entry.setText(config.get("password", ""))
+            self.tags_entry.setText("; ".join(config.get("tags", [])))
             self.allow_no_password.setChecked(config.get("allow_no_password", False))
             
             # 觸發checkbox狀態變化
@@ -301,7 +397,7 @@ class SSHConnectionApp(QMainWindow):
     
     def delete_selected_profile(self):
         """刪除選擇的profile"""
-        current_profile = self.profile_combo.currentText()
+        current_profile = self.profile_combo.itemText(self.profile_combo.currentIndex())
         if current_profile == "-- Select a saved connection --" or not current_profile:
             return
         
@@ -319,6 +415,7 @@ class SSHConnectionApp(QMainWindow):
                 self.port_entry.setText("22")
                 self.username_entry.setText("root")
                 self.password_entry.setText("")
+                self.tags_entry.setText("")
                 self.allow_no_password.setChecked(False)
                 self.on_allow_no_password_changed(Qt.Unchecked)
                 
@@ -327,6 +424,37 @@ class SSHConnectionApp(QMainWindow):
             else:
                 QMessageBox.critical(self, "Error", "Failed to delete profile")
     
+    def import_profiles(self):
+        """從CSV或JSON設備清單匯入多筆連線設定"""
+        path, _ = QFileDialog.getOpenFileName(self, "Import Profiles", "",
+                                              "Profile inventories (*.csv *.json);;All files (*)")
+        if not path:
+            return
+    
+        success, message = config_manager.import_profiles(path)
+        if success:
+            self.refresh_profile_combo()
+            QMessageBox.information(self, "Import Profiles", message)
+            self.status_label.setText("已匯入設備清單")
+            self.status_label.setStyleSheet("color: green;")
+        else:
+            QMessageBox.critical(self, "Error", message)
+    
+    def export_profiles(self):
+        """將所有連線設定匯出為CSV或JSON"""
+        path, _ = QFileDialog.getSaveFileName(self, "Export Profiles", "profiles.csv", "CSV (*.csv);;JSON (*.json)")
+        if not path:
+            return
+    
+        reply = QMessageBox.question(self, "Export Profiles",
+                                     "Include passwords in the exported file?\n(Passwords are written in plain text)",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        success, message = config_manager.export_profiles(path, include_passwords=reply == QMessageBox.Yes)
+        if success:
+            QMessageBox.information(self, "Export Profiles", message)
+        else:
+            QMessageBox.critical(self, "Error", message)
+    
     def open_search_window(self):
         """開啟搜尋視窗"""
         from .search import SearchWindow
@@ -342,6 +470,15 @@ class SSHConnectionApp(QMainWindow):
         # 開啟搜尋視窗
         self.search_window = SearchWindow(connection_info)
         self.search_window.show()
+        startup_timing.mark("search window shown")
+        startup_timing.report("Connect timing")
         
         # 隱藏登入視窗
-        self.hide()
\ No newline at end of file
+        self.hide()
+    
+    def open_fleet_window(self):
+        """開啟車隊掃描視窗"""
+        from .fleet import FleetScanWindow
+        
+        self.fleet_window = FleetScanWindow()
+        self.fleet_window.show()
\ No newline at end of file
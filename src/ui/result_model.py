@@ -0,0 +1,163 @@
+try:
+    from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+    QT_AVAILABLE = True
+except ImportError:
+    try:
+        from PySide2.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer
+        QT_AVAILABLE = True
+    except ImportError:
+        print("Error: PyQt5 or PySide2 is required to run this application.")
+        raise ImportError("Qt library not found")
+
+import sys
+import os
+from array import array
+# 添加父目錄到Python路徑，以便導入其他模組
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import scan_trace
+from scan import BootRecordStore
+
+
+# 表格欄位：(標題, BootRecord屬性)
+BOOT_RECORD_COLUMNS = (
+    ("檔案時間", 'file_time'),
+    ("開機時間", 'boot_time'),
+    ("版本號", 'version'),
+    ("版本時間", 'version_time'),
+)
+
+# 收到紀錄後延遲多久一次插入（毫秒），連續大量的紀錄會合併成一次更新
+DEFAULT_FLUSH_INTERVAL = 50
+# 單次插入的紀錄數超過現有列數的比例時，改為整批排序後重設模型
+BULK_INSERT_RATIO = 0.1
+
+
+class BootRecordModel(QAbstractTableModel):
+    """開機紀錄表格模型
+
+    紀錄保存在欄位式的BootRecordStore中，另以索引陣列記錄排序後的順序；新紀錄以二分搜尋
+    插入到正確位置，只通知新增的列，不需要每筆都重新排序與重繪整個表格；短時間內收到的
+    紀錄先暫存，由計時器合併成一次插入。
+    """
+
+    def __init__(self, parent=None, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        super().__init__(parent)
+        self._store = BootRecordStore()
+        self._order = array('l')  # 依排序鍵遞增排列的紀錄索引
+        self._pending = []
+        self._sort_column = 0
+        self._sort_order = Qt.AscendingOrder
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(flush_interval)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def _sort_key(self, index):
+        """排序鍵：排序欄位相同時依檔案時間排列"""
+        field = BOOT_RECORD_COLUMNS[self._sort_column][1]
+        return (self._store.sort_key(index, field), self._store.sort_key(index, 'file_time'))
+
+    def _store_index(self, row):
+        """畫面上的列號對應的紀錄索引（遞減排序時由尾端取出）"""
+        if self._sort_order == Qt.AscendingOrder:
+            return self._order[row]
+        return self._order[len(self._order) - 1 - row]
+
+    def record_at(self, row):
+        """依畫面上的列號取得BootRecord"""
+        return self._store[self._store_index(row)]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(BOOT_RECORD_COLUMNS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        store_index = self._store_index(index.row())
+        if role == Qt.DisplayRole:
+            return self._store.value(store_index, BOOT_RECORD_COLUMNS[index.column()][1])
+        if role == Qt.ToolTipRole:
+            return "{}\n{}\n雙擊開啟日誌內容".format(self._store.value(store_index, 'filename'),
+                                                 self._store.value(store_index, 'full_line'))
+        return None
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return BOOT_RECORD_COLUMNS[section][0]
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """依欄位排序，只有排序欄位改變時才需要重新排序，反向排序只改變讀取方向"""
+        self.flush()
+        self.beginResetModel()
+        if column != self._sort_column:
+            self._sort_column = column
+            self._rebuild()
+        self._sort_order = order
+        self.endResetModel()
+
+    def _rebuild(self):
+        """依目前排序欄位重新排序所有紀錄"""
+        self._order = self._store.sorted_indices(BOOT_RECORD_COLUMNS[self._sort_column][1])
+
+    def _bisect_right(self, key):
+        """在排序後的索引陣列中找出key的插入位置"""
+        low, high = 0, len(self._order)
+        while low < high:
+            middle = (low + high) // 2
+            if key < self._sort_key(self._order[middle]):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+    def add_record(self, record):
+        """加入一筆紀錄，實際插入延遲到計時器觸發時合併處理"""
+        self._pending.append(record)
+        if not self._flush_timer.isActive():
+            self._flush_timer.start()
+
+    def flush(self):
+        """將暫存的紀錄插入表格"""
+        self._flush_timer.stop()
+        if not self._pending:
+            return
+        records, self._pending = self._pending, []
+        with scan_trace.span("ui.render", rows=len(records)):
+            self._insert(records)
+
+    def _insert(self, records):
+        """插入一批紀錄並通知表格"""
+        if len(records) > len(self._order) * BULK_INSERT_RATIO:
+            # 大量紀錄時整批排序，比逐筆插入與通知快
+            self.beginResetModel()
+            self._store.extend(records)
+            self._rebuild()
+            self.endResetModel()
+            return
+
+        ascending = self._sort_order == Qt.AscendingOrder
+        for record in records:
+            index = self._store.append(record)
+            position = self._bisect_right(self._sort_key(index))
+            row = position if ascending else len(self._order) - position
+            self.beginInsertRows(QModelIndex(), row, row)
+            self._order.insert(position, index)
+            self.endInsertRows()
+
+    def clear(self):
+        """清除所有紀錄"""
+        self._flush_timer.stop()
+        self.beginResetModel()
+        self._store.clear()
+        self._order = array('l')
+        self._pending = []
+        self.endResetModel()
+
+    def record_count(self):
+        """紀錄總數（包含尚未插入的紀錄）"""
+        return len(self._store) + len(self._pending)
@@ -1,12 +1,12 @@
 try:
-    from PyQt5.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit, QMessageBox, QProgressBar, QDateEdit, QComboBox, QGroupBox, QGridLayout, QCheckBox
-    from PyQt5.QtCore import Qt, QThread, pyqtSignal, QDate
+    from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView, QHeaderView, QAbstractItemView, QDialog, QPlainTextEdit, QFileDialog, QMessageBox, QProgressBar, QDateEdit, QComboBox, QGroupBox, QGridLayout, QCheckBox
+    from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal, QDate
     from PyQt5.QtGui import QFont
     QT_AVAILABLE = True
 except ImportError:
     try:
-        from PySide2.QtWidgets import QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTextEdit, QMessageBox, QProgressBar, QDateEdit, QComboBox, QGroupBox, QGridLayout, QCheckBox
-        from PySide2.QtCore import Qt, QThread, Signal as pyqtSignal, QDate
+        from PySide2.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableView, QHeaderView, QAbstractItemView, QDialog, QPlainTextEdit, QFileDialog, QMessageBox, QProgressBar, QDateEdit, QComboBox, QGroupBox, QGridLayout, QCheckBox
+        from PySide2.QtCore import Qt, QThread, QTimer, Signal as pyqtSignal, QDate
         from PySide2.QtGui import QFont
         QT_AVAILABLE = True
     except ImportError:
@@ -15,148 +15,262 @@ except ImportError:
 
 import sys
 import os
-import re
+import posixpath
+import threading
+import time
 from datetime import datetime
 # 添加父目錄到Python路徑，以便導入其他模組
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from ssh import SSHClient
+import scan_trace
+from config import scan_cache, version_inventory
+from scan import LogScanner, ScanTimeIndex, analyze_reboots
+from scan.analytics import summarize, write_analysis, format_duration, UPTIME_BUCKET_LABELS
+from .result_model import BootRecordModel
+from scan.core import UNKNOWN_FILE_TIME, DEFAULT_READ_MODE, DEFAULT_HEADER_BYTES, DEFAULT_SCAN_MODE, DEFAULT_SCAN_CHANNELS, BUILD_VERSION_MARKER
+from ssh import session_manager, build_batch_scan_command, build_batch_scan_input, parse_batch_record
 
 
-def parse_filename_datetime(filename):
-    """從檔案名稱中解析時間
-    支援格式: agvapp_25_07_04_09_55_31.tmp 或 agvapp_YY_MM_DD_HH_MM_SS.*
-    """
-    # 匹配檔案名稱中的時間格式
-    pattern = r'agvapp_(\d{2})_(\d{2})_(\d{2})_(\d{2})_(\d{2})_(\d{2})'
-    match = re.search(pattern, filename)
-    
-    if match:
-        year, month, day, hour, minute, second = match.groups()
-        # 假設年份為20XX
-        year = int("20" + year)
-        month = int(month)
-        day = int(day)
-        hour = int(hour)
-        minute = int(minute)
-        second = int(second)
-        
-        try:
-            return datetime(year, month, day, hour, minute, second)
-        except ValueError:
-            # 如果日期無效，返回None
-            return None
-    
-    return None
+# 即時監看：inotifywait最長等待秒數、無inotifywait時的輪詢間隔秒數，
+# 以及新檔案尚未寫入build version時的最多重試次數
+WATCH_INOTIFY_TIMEOUT = 2
+WATCH_POLL_INTERVAL = 3
+WATCH_MAX_ATTEMPTS = 30
+
+# 開啟單一日誌時最多讀取的位元組數
+LOG_VIEW_MAX_BYTES = 4 * 1024 * 1024
+
+# 要求工作執行緒停止後最多等待的毫秒數，遠端命令每隔CHANNEL_POLL_INTERVAL檢查一次取消
+WORKER_STOP_TIMEOUT = 500
 
 
 class FileReadWorker(QThread):
     """檔案讀取工作執行緒"""
     finished = pyqtSignal()
-    build_version_found = pyqtSignal(str, str, dict)  # 檔案名, 檔案內容, build version info
+    build_version_found = pyqtSignal(object)  # BootRecord（不含檔案內容）
     error = pyqtSignal(str)
     progress = pyqtSignal(int, int)  # 當前進度, 總數
     restart_count = pyqtSignal(int)  # 重啟次數
+    cancelled = pyqtSignal(int)  # 掃描被停止，目前為止的重啟次數
     
-    def __init__(self, ssh_client, log_directory="/run/media/mmcblk1p1/log/agvapp/", start_time=None, end_time=None):
+    def __init__(self, ssh_client, log_directory="/run/media/mmcblk1p1/log/agvapp/", start_time=None, end_time=None,
+                 read_mode=DEFAULT_READ_MODE, read_limit=None, scan_mode=DEFAULT_SCAN_MODE,
+                 scan_cache=None, host_key=None, channels=DEFAULT_SCAN_CHANNELS, time_ranges=None,
+                 device_helper=True, install_helper=False):
         super().__init__()
         self.ssh_client = ssh_client
         self.log_directory = log_directory
-        self.start_time = start_time
-        self.end_time = end_time
+        # 設備上已有輔助程式時由設備擷取build version行，install_helper時沒有會先上傳
+        self.scanner = LogScanner(ssh_client, log_directory, start_time, end_time,
+                                  read_mode=read_mode, read_limit=read_limit, scan_mode=scan_mode,
+                                  scan_cache=scan_cache, host_key=host_key, channels=channels, time_ranges=time_ranges,
+                                  device_helper=device_helper, install_helper=install_helper,
+                                  on_found=self.build_version_found.emit,
+                                  on_progress=self.progress.emit,
+                                  on_error=self.error.emit)
+        
+    def stop(self):
+        """要求停止掃描，已開啟的通道會被關閉，已找到的結果保留"""
+        self.scanner.cancel()
+    
+    def is_stopped(self):
+        """是否已要求停止"""
+        return self.scanner.is_cancelled()
+    
+    def run(self):
+        with scan_trace.span("worker.run"):
+            restart_count = self.scanner.scan()
+        if self.is_stopped():
+            self.cancelled.emit(restart_count or 0)
+            self.finished.emit()
+            return
+        if restart_count is None:
+            return
         
+        # 計算重啟次數並發送信號
+        self.restart_count.emit(restart_count)
+        self.finished.emit()
+    
+    def extract_build_version(self, content):
+        """從檔案內容中提取build version資訊"""
+        return self.scanner.extract_build_version(content)
+
+
+class LogWatchWorker(FileReadWorker):
+    """即時監看工作執行緒，偵測新產生的agvapp日誌並只解析新檔案"""
+    watch_started = pyqtSignal(str)  # 監看方式: inotifywait 或 polling
+    
+    def __init__(self, ssh_client, log_directory="/run/media/mmcblk1p1/log/agvapp/",
+                 poll_interval=WATCH_POLL_INTERVAL, inotify_timeout=WATCH_INOTIFY_TIMEOUT):
+        super().__init__(ssh_client, log_directory)
+        self.poll_interval = poll_interval
+        self.inotify_timeout = inotify_timeout
+        self._stop_requested = False
+    
+    def stop(self):
+        """要求停止監看，執行中的遠端命令會立即被取消"""
+        self._stop_requested = True
+        super().stop()
+    
     def run(self):
         try:
-            # 列出目錄中的所有.tmp檔案和agvapp日誌檔案
-            success, result = self.ssh_client.execute_command("find {} \( -name '*.tmp' -o -name 'agvapp_*' \) -type f 2>/dev/null".format(self.log_directory))
+            use_inotify = self.detect_inotify()
             
-            if not success:
-                self.error.emit("Failed to list files in directory: {}".format(result))
+            success, output = self.ssh_client.execute_command(self.build_list_command(),
+                                                              cancel_event=self.scanner.cancel_event)
+            if self._stop_requested:
                 return
-            
-            files = result.strip().split('\n') if result.strip() else []
-            files = [f for f in files if f.strip()]  # 移除空行
-            
-            if not files:
-                self.error.emit("No .tmp or agvapp log files found in directory: {}".format(self.log_directory))
+            if not success:
+                self.error.emit("Failed to list files in directory: {}".format(output))
                 return
             
-            total_files = len(files)
-            restart_count = 0
+            # 以目前的檔案作為基準，之後只處理新出現的檔案
+            known = set(self.boot_key(name) for name in self.parse_names(output))
+            pending = {}  # 開機識別 -> [目前檔名, 已嘗試次數]
+            self.watch_started.emit("inotifywait" if use_inotify else "polling")
             
-            for i, file_path in enumerate(files):
-                filename = os.path.basename(file_path)
-                
-                # 如果啟用了時間過濾，檢查檔案時間
-                if self.start_time or self.end_time:
-                    file_datetime = parse_filename_datetime(filename)
-                    if file_datetime:
-                        # 檢查是否在時間範圍內
-                        if self.start_time and file_datetime < self.start_time:
-                            self.progress.emit(i + 1, total_files)
-                            continue
-                        if self.end_time and file_datetime > self.end_time:
-                            self.progress.emit(i + 1, total_files)
-                            continue
-                    else:
-                        # 無法解析時間的檔案，如果啟用時間過濾則跳過
-                        self.progress.emit(i + 1, total_files)
-                        continue
+            while not self._stop_requested:
+                if use_inotify:
+                    # inotifywait等到有新檔案或逾時後立即列出目錄，等待與列出只需一次往返
+                    timeout = 1 if pending else self.inotify_timeout
+                    command = "inotifywait -q -t {} -e create -e moved_to {} >/dev/null 2>&1; {}".format(
+                        timeout, self.log_directory, self.build_list_command())
+                else:
+                    if not self.sleep_interruptible(1 if pending else self.poll_interval):
+                        break
+                    command = self.build_list_command()
                 
-                # 讀取檔案內容
-                success, content = self.ssh_client.execute_command("cat '{}'".format(file_path))
+                success, output = self.ssh_client.execute_command(command, cancel_event=self.scanner.cancel_event)
+                if self._stop_requested:
+                    break
+                if not success:
+                    self.error.emit("Failed to watch directory: {}".format(output))
+                    break
                 
-                if success:
-                    # 檢查是否包含build version
-                    if "build version" in content.lower():
-                        # 提取build version資訊
-                        build_version = self.extract_build_version(content)
-                        self.build_version_found.emit(filename, content, build_version)
-                        restart_count += 1
-                else:
-                    self.error.emit("Failed to read file {}: {}".format(file_path, content))
+                for name in self.parse_names(output):
+                    key = self.boot_key(name)
+                    if key in pending:
+                        # .tmp檔可能已被更名，以最新檔名讀取
+                        pending[key][0] = name
+                    elif key not in known:
+                        known.add(key)
+                        pending[key] = [name, 0]
                 
-                self.progress.emit(i + 1, total_files)
+                if pending:
+                    self.check_pending(pending)
             
-            # 計算重啟次數並發送信號
-            self.restart_count.emit(restart_count)
             self.finished.emit()
-            
+        
         except Exception as e:
-            self.error.emit("Error during file reading: {}".format(str(e)))
+            self.error.emit("Error during log watching: {}".format(str(e)))
     
-    def extract_build_version(self, content):
-        """從檔案內容中提取build version資訊"""
-        lines = content.split('\n')
+    def detect_inotify(self):
+        """檢查設備上是否有inotifywait可用"""
+        success, output = self.ssh_client.execute_command("command -v inotifywait 2>/dev/null || true",
+                                                          cancel_event=self.scanner.cancel_event)
+        return success and bool(output.strip())
+    
+    def build_list_command(self):
+        """列出目錄檔名的命令"""
+        return "ls -1 {} 2>/dev/null".format(self.log_directory)
+    
+    def parse_names(self, output):
+        """從ls輸出中取出日誌檔名"""
+        names = []
+        for name in output.split('\n'):
+            name = name.strip()
+            if name and (name.startswith('agvapp_') or name.endswith('.tmp')):
+                names.append(name)
+        return names
+    
+    def boot_key(self, filename):
+        """同一次開機的.tmp檔與更名後的檔案視為同一筆"""
+        return filename[:-4] if filename.endswith('.tmp') else filename
+    
+    def check_pending(self, pending):
+        """批次讀取新檔案的檔頭，找到build version即回報，超過嘗試次數則放棄"""
+        paths = [posixpath.join(self.log_directory, name) for name, attempts in pending.values()]
+        command = build_batch_scan_command(header_bytes=DEFAULT_HEADER_BYTES, marker=BUILD_VERSION_MARKER)
+        success, lines = self.ssh_client.stream_command(command, build_batch_scan_input(paths),
+                                                        cancel_event=self.scanner.cancel_event)
+        if not success:
+            return
+        
+        found = set()
         for line in lines:
-            if 'build version' in line.lower():
-                # 提取開機時間、版本號和版本時間
-                import re
-                
-                # 匹配時間格式 HH:MM:SS.mmm
-                time_match = re.search(r'(\d{2}:\d{2}:\d{2}\.\d{3})', line)
-                time_str = time_match.group(1) if time_match else "Unknown"
-                
-                # 匹配版本號格式 X.X.X
-                version_match = re.search(r'build version :(\d+\.\d+\.\d+)', line)
-                version_str = version_match.group(1) if version_match else "Unknown"
-                
-                # 匹配版本時間格式 YYYYMMDDHHMMSS
-                version_time_match = re.search(r'(\d{12})', line)
-                version_time_str = version_time_match.group(1) if version_time_match else "Unknown"
-                
-                return {
-                    'time': time_str,
-                    'version': version_str,
-                    'version_time': version_time_str,
-                    'full_line': line.strip()
-                }
-        return {
-            'time': "Unknown",
-            'version': "Unknown", 
-            'version_time': "Unknown",
-            'full_line': "build version not found"
-        }
+            if self._stop_requested:
+                return
+            record = parse_batch_record(line)
+            if record and BUILD_VERSION_MARKER in record['line'].lower():
+                self.scanner.emit_build_version(record['path'], record['line'])
+                found.add(self.boot_key(record['filename']))
+        
+        for key in list(pending.keys()):
+            if key in found:
+                del pending[key]
+            else:
+                # 新檔案剛建立時可能尚未寫入build version，下次再試
+                pending[key][1] += 1
+                if pending[key][1] >= WATCH_MAX_ATTEMPTS:
+                    del pending[key]
+    
+    def sleep_interruptible(self, seconds):
+        """可被stop()中斷的等待，回傳是否應繼續監看"""
+        remaining = int(seconds * 1000)
+        while remaining > 0 and not self._stop_requested:
+            self.msleep(min(100, remaining))
+            remaining -= 100
+        return not self._stop_requested
+
+
+class LogContentWorker(QThread):
+    """讀取單一日誌內容的工作執行緒，只在使用者開啟日誌時才從設備讀取"""
+    loaded = pyqtSignal(str, str, bool)  # 檔案名, 檔案內容, 是否因超過上限而截斷
+    error = pyqtSignal(str)
+    
+    def __init__(self, ssh_client, record, max_bytes=LOG_VIEW_MAX_BYTES):
+        super().__init__()
+        self.ssh_client = ssh_client
+        self.record = record
+        self.max_bytes = max_bytes
+        self.cancel_event = threading.Event()
+    
+    def stop(self):
+        """要求停止讀取，執行中的遠端命令會立即被取消"""
+        self.cancel_event.set()
+    
+    def run(self):
+        try:
+            success, content = self.ssh_client.execute_command(
+                "head -c {} '{}'".format(int(self.max_bytes), self.record.path), cancel_event=self.cancel_event)
+            if self.cancel_event.is_set():
+                return
+            if not success:
+                self.error.emit("Failed to read file {}: {}".format(self.record.path, content))
+                return
+            truncated = len(content.encode()) >= self.max_bytes
+            self.loaded.emit(self.record.filename, content.replace('\x00', ''), truncated)
+        except Exception as e:
+            self.error.emit("Error reading file {}: {}".format(self.record.path, str(e)))
+
+
+class LogViewerDialog(QDialog):
+    """顯示單一日誌內容的視窗"""
+    
+    def __init__(self, filename, content, truncated, parent=None):
+        super().__init__(parent)
+        title = filename if not truncated else "{} (first {} MB)".format(filename, LOG_VIEW_MAX_BYTES // (1024 * 1024))
+        self.setWindowTitle(title)
+        self.resize(900, 600)
+        
+        layout = QVBoxLayout()
+        viewer = QPlainTextEdit()
+        viewer.setReadOnly(True)
+        viewer.setLineWrapMode(QPlainTextEdit.NoWrap)
+        viewer.setFont(QFont("Consolas", 10))
+        viewer.setPlainText(content)
+        layout.addWidget(viewer)
+        self.setLayout(layout)
 
 
 class SearchWindow(QMainWindow):
@@ -165,6 +279,17 @@ class SearchWindow(QMainWindow):
         self.ssh_connection_info = ssh_connection_info
         self.ssh_client = None
         self.file_worker = None
+        self.watch_worker = None
+        self.content_workers = []
+        self.restart_total = 0
+        # 已掃描結果的時間索引，重新篩選時只需要向設備掃描尚未涵蓋的時間範圍
+        self.scan_index = ScanTimeIndex()
+        self.scan_window = (None, None)
+        self.scan_ranges = []
+        self.scan_started_at = None
+        self.analysis = None
+        # 尚未寫入版本清冊的新紀錄，掃描結束時一次寫入
+        self.inventory_pending = []
         
         self.setWindowTitle("AGV 版本查詢工具")
         self.setGeometry(200, 200, 1000, 700)
@@ -174,12 +299,16 @@ class SearchWindow(QMainWindow):
         
     def closeEvent(self, event):
         """處理窗口關閉事件"""
-        if self.file_worker and self.file_worker.isRunning():
-            self.file_worker.terminate()
-            self.file_worker.wait(3000)
+        self.stop_watch()
+        running = self.stop_workers()
         
         if self.ssh_client:
             self.ssh_client.close()
+            self.ssh_client = None
+        
+        # 連線關閉後仍在執行的遠端命令會立即失敗，再給工作執行緒一次結束的時間
+        if running:
+            running = self.wait_workers(running)
         
         # 檢查是否有login_window，如果有則不退出應用程式
         if hasattr(self, 'login_window') and self.login_window:
@@ -188,9 +317,45 @@ class SearchWindow(QMainWindow):
         else:
             # 如果是直接關閉（點擊X），則退出整個應用程式
             import sys
+            session_manager.close_all()
             event.accept()
+            if running:
+                # 執行中的QThread被銷毀會使程式異常終止，等工作執行緒結束後再離開事件迴圈
+                self.quit_when_stopped(running)
+                return
             sys.exit(0)
     
+    def stop_workers(self):
+        """以協作方式停止所有工作執行緒，不使用terminate()避免通道與鎖停留在不確定的狀態
+
+        回傳等待WORKER_STOP_TIMEOUT後仍在執行的工作執行緒。
+        """
+        workers = [worker for worker in [self.watch_worker, self.file_worker] + list(self.content_workers)
+                   if worker is not None and worker.isRunning()]
+        for worker in workers:
+            worker.stop()
+        return self.wait_workers(workers)
+    
+    def wait_workers(self, workers):
+        """等待工作執行緒結束，總共最多WORKER_STOP_TIMEOUT毫秒，回傳仍在執行的工作執行緒"""
+        deadline = time.monotonic() + WORKER_STOP_TIMEOUT / 1000.0
+        for worker in workers:
+            remaining = int((deadline - time.monotonic()) * 1000)
+            worker.wait(max(remaining, 1))
+        return [worker for worker in workers if worker.isRunning()]
+    
+    def quit_when_stopped(self, workers):
+        """所有工作執行緒結束後結束應用程式"""
+        timer = QTimer(QApplication.instance())
+        
+        def check():
+            if not any(worker.isRunning() for worker in workers):
+                timer.stop()
+                QApplication.instance().quit()
+        
+        timer.timeout.connect(check)
+        timer.start(100)
+    
     def create_widgets(self):
         central_widget = QWidget()
         self.setCentralWidget(central_widget)
@@ -400,8 +565,72 @@ class SearchWindow(QMainWindow):
                 border-color: #e9ecef;
             }
         """)
+        # 勾選時將輔助程式上傳到設備，之後的搜尋由設備直接擷取build version行
+        self.install_helper_check = QCheckBox("設備端擷取")
+        self.install_helper_check.setToolTip("上傳輔助程式到設備，由設備擷取build version並快取結果")
+        button_layout.addWidget(self.install_helper_check)
+        # 勾選時記錄掃描各階段的耗時，掃描結束後顯示於追蹤面板
+        self.trace_check = QCheckBox("掃描追蹤")
+        self.trace_check.setToolTip("記錄連線、列出檔案、讀取、擷取與表格更新各階段的耗時與傳輸量")
+        self.trace_check.setChecked(scan_trace.is_enabled())
+        self.trace_check.toggled.connect(self.toggle_trace)
+        button_layout.addWidget(self.trace_check)
+        
         button_layout.addWidget(self.scan_button)
         
+        self.stop_button = QPushButton("停止搜尋")
+        self.stop_button.setEnabled(False)
+        self.stop_button.clicked.connect(self.stop_scan)
+        self.stop_button.setStyleSheet("""
+            QPushButton {
+                background-color: #f8f9fa;
+                border: 1px solid #ddd;
+                color: #495057;
+                padding: 10px 20px;
+                font-size: 13px;
+                border-radius: 4px;
+                min-width: 120px;
+            }
+            QPushButton:hover {
+                background-color: #e9ecef;
+                border-color: #bbb;
+            }
+            QPushButton:pressed {
+                background-color: #dee2e6;
+            }
+            QPushButton:disabled {
+                background-color: #f8f9fa;
+                color: #adb5bd;
+                border-color: #e9ecef;
+            }
+        """)
+        button_layout.addWidget(self.stop_button)
+        
+        self.watch_button = QPushButton("即時監看")
+        self.watch_button.setCheckable(True)
+        self.watch_button.toggled.connect(self.toggle_watch)
+        self.watch_button.setStyleSheet("""
+            QPushButton {
+                background-color: #f8f9fa;
+                border: 1px solid #ddd;
+                color: #495057;
+                padding: 10px 20px;
+                font-size: 13px;
+                border-radius: 4px;
+                min-width: 120px;
+            }
+            QPushButton:hover {
+                background-color: #e9ecef;
+                border-color: #bbb;
+            }
+            QPushButton:checked {
+                background-color: #d4edda;
+                border-color: #28a745;
+                color: #155724;
+            }
+        """)
+        button_layout.addWidget(self.watch_button)
+        
         self.back_button = QPushButton("回到ssh登入頁面")
         self.back_button.clicked.connect(self.back_to_login)
         self.back_button.setStyleSheet("""
@@ -459,7 +688,40 @@ class SearchWindow(QMainWindow):
             }
         """)
         self.restart_count_label.setAlignment(Qt.AlignCenter)
-        main_layout.addWidget(self.restart_count_label)
+        
+        # 重啟統計（平均重啟間隔、運行時間、連續重啟）顯示在重啟次數旁，可匯出
+        restart_layout = QHBoxLayout()
+        restart_layout.addWidget(self.restart_count_label, 1)
+        self.analytics_label = QLabel("")
+        self.analytics_label.setStyleSheet("color: #495057; font-size: 12px; padding: 8px;")
+        restart_layout.addWidget(self.analytics_label, 2)
+        self.export_stats_button = QPushButton("匯出統計")
+        self.export_stats_button.setEnabled(False)
+        self.export_stats_button.clicked.connect(self.export_analysis)
+        restart_layout.addWidget(self.export_stats_button)
+        main_layout.addLayout(restart_layout)
+        
+        # 掃描追蹤面板：各階段的次數、總耗時、p50/p95與傳輸量，只在啟用追蹤時顯示
+        self.trace_group = QGroupBox("掃描追蹤")
+        trace_layout = QHBoxLayout()
+        self.trace_text = QPlainTextEdit()
+        self.trace_text.setReadOnly(True)
+        self.trace_text.setFont(QFont("Consolas", 10))
+        self.trace_text.setMaximumHeight(160)
+        trace_layout.addWidget(self.trace_text, 1)
+        trace_buttons = QVBoxLayout()
+        self.export_trace_button = QPushButton("匯出追蹤")
+        self.export_trace_button.setToolTip("輸出Chrome trace格式，可用chrome://tracing或Perfetto開啟")
+        self.export_trace_button.clicked.connect(self.export_trace)
+        trace_buttons.addWidget(self.export_trace_button)
+        clear_trace_button = QPushButton("清除")
+        clear_trace_button.clicked.connect(self.clear_trace)
+        trace_buttons.addWidget(clear_trace_button)
+        trace_buttons.addStretch()
+        trace_layout.addLayout(trace_buttons)
+        self.trace_group.setLayout(trace_layout)
+        self.trace_group.setVisible(scan_trace.is_enabled())
+        main_layout.addWidget(self.trace_group)
         
         # 簡潔的顯示區域
         main_display_group = QGroupBox("Agv版本訊息")
@@ -480,21 +742,31 @@ class SearchWindow(QMainWindow):
         """)
         main_display_layout = QVBoxLayout()
         
-        # 簡潔的內容顯示區域
-        self.content_display = QTextEdit()
-        self.content_display.setReadOnly(True)
-        self.content_display.setFont(QFont("Consolas", 11))
-        self.content_display.setStyleSheet("""
-            QTextEdit {
+        # 開機紀錄表格，資料由模型逐批插入，不需要每筆都重繪整個表格
+        self.result_model = BootRecordModel(self)
+        self.result_view = QTableView()
+        self.result_view.setModel(self.result_model)
+        self.result_view.setFont(QFont("Consolas", 11))
+        self.result_view.setSortingEnabled(True)
+        self.result_view.sortByColumn(0, Qt.AscendingOrder)
+        self.result_view.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.result_view.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.result_view.setAlternatingRowColors(True)
+        self.result_view.doubleClicked.connect(self.open_log_content)
+        self.result_view.verticalHeader().setVisible(False)
+        # 固定列高與欄寬，大量資料時不需要逐列計算內容大小
+        self.result_view.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.result_view.verticalHeader().setDefaultSectionSize(24)
+        self.result_view.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.result_view.setStyleSheet("""
+            QTableView {
                 border: 1px solid #ddd;
                 border-radius: 4px;
                 background-color: #ffffff;
-                padding: 15px;
-                line-height: 1.4;
             }
         """)
         
-        main_display_layout.addWidget(self.content_display)
+        main_display_layout.addWidget(self.result_view)
         main_display_layout.setContentsMargins(15, 15, 15, 15)
         main_display_group.setLayout(main_display_layout)
         
@@ -505,15 +777,18 @@ class SearchWindow(QMainWindow):
         self.status_label.setStyleSheet("color: blue;")
         main_layout.addWidget(self.status_label)
         
-        # 儲存build version日誌
-        self.build_version_logs = []
-        
         # 初始化時間過濾狀態
         self.on_time_filter_toggled()
     
     def connect_ssh(self):
-        """建立SSH連線"""
+        """建立SSH連線，優先沿用登入頁面已認證的連線"""
         try:
+            self.ssh_client = session_manager.acquire(self.get_host_key(), self.ssh_connection_info.get('password', ''))
+            if self.ssh_client:
+                return
+            
+            # 沒有可沿用的連線時才載入paramiko
+            from ssh import SSHClient
             self.ssh_client = SSHClient()
             success, message = self.ssh_client.connect(
                 self.ssh_connection_info['ip'],
@@ -531,6 +806,14 @@ class SearchWindow(QMainWindow):
             QMessageBox.critical(self, "Error", "Error connecting to SSH: {}".format(str(e)))
             self.close()
     
+    def get_host_key(self):
+        """取得目前連線主機的識別字串，用於掃描快取與連線管理"""
+        return session_manager.make_key(
+            self.ssh_connection_info.get('ip', ''),
+            self.ssh_connection_info.get('port', ''),
+            self.ssh_connection_info.get('username', '')
+        )
+    
     def scan_log_files(self):
         """掃描日誌檔案"""
         if not self.ssh_client:
@@ -540,9 +823,9 @@ class SearchWindow(QMainWindow):
         self.scan_button.setEnabled(False)
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
-        self.content_display.clear()
-        self.build_version_logs.clear()
+        self.result_model.clear()
         self.restart_count_label.setText("")
+        self.analytics_label.setText("")
         if self.enable_time_filter.isChecked():
             start_str = "{} {}:{}:{}".format(
                 self.start_date_edit.date().toString("yyyy-MM-dd"),
@@ -582,39 +865,91 @@ class SearchWindow(QMainWindow):
                 self.progress_bar.setVisible(False)
                 return
         
-        # 啟動檔案讀取工作執行緒
-        self.file_worker = FileReadWorker(self.ssh_client, "/run/media/mmcblk1p1/log/agvapp/", start_time, end_time)
+        # 先從時間索引取出已掃描範圍內的紀錄，重啟次數立即更新
+        self.scan_window = (start_time, end_time)
+        for record in self.scan_index.query(start_time, end_time):
+            self.result_model.add_record(record)
+        self.on_restart_count(self.scan_index.count(start_time, end_time))
+        
+        self.scan_ranges = self.scan_index.missing_ranges(start_time, end_time)
+        if not self.scan_ranges:
+            self.file_worker = None
+            self.on_scan_finished()
+            return
+        
+        # 啟動檔案讀取工作執行緒，只掃描尚未涵蓋的時間範圍
+        self.scan_started_at = datetime.now()
+        time_ranges = None if self.scan_ranges == [(None, None)] else self.scan_ranges
+        self.file_worker = FileReadWorker(self.ssh_client, "/run/media/mmcblk1p1/log/agvapp/", start_time, end_time,
+                                          scan_cache=scan_cache, host_key=self.get_host_key(), time_ranges=time_ranges,
+                                          install_helper=self.install_helper_check.isChecked())
         self.file_worker.build_version_found.connect(self.on_build_version_found)
         self.file_worker.progress.connect(self.on_progress_update)
         self.file_worker.error.connect(self.on_error)
-        self.file_worker.restart_count.connect(self.on_restart_count)
+        self.file_worker.restart_count.connect(self.on_scan_completed)
+        self.file_worker.cancelled.connect(self.on_scan_cancelled)
         self.file_worker.finished.connect(self.on_scan_finished)
         self.file_worker.start()
+        self.stop_button.setEnabled(True)
+    
+    def stop_scan(self):
+        """停止目前的掃描，已找到的結果與重啟次數保留"""
+        if not self.file_worker or not self.file_worker.isRunning():
+            return
+        self.file_worker.stop()
+        self.stop_button.setEnabled(False)
+        self.status_label.setText("Stopping scan...")
+        self.status_label.setStyleSheet("color: orange;")
+    
+    def on_build_version_found(self, record):
+        """當找到包含build version的檔案時的回調，回傳是否為新紀錄（短時間內的多筆紀錄會合併成一次插入）
+        
+        只有落在目前時間範圍內（計入重啟次數）的紀錄才加入結果表格，與時間索引的計數一致。
+        """
+        in_window = self.scan_index.count(*self.scan_window)
+        if not self.scan_index.add(record):
+            return False
+        if self.scan_index.count(*self.scan_window) > in_window:
+            self.result_model.add_record(record)
+        self.inventory_pending.append(record)
+        return True
+    
+    def on_scan_completed(self, count):
+        """設備掃描完成：記錄已涵蓋的時間範圍，重啟次數由時間索引計算"""
+        # 掃描開始之後設備仍可能產生新的日誌，只記錄到掃描開始的時間為止
+        for range_start, range_end in self.scan_ranges:
+            self.scan_index.mark_covered(range_start, range_end, until=self.scan_started_at)
+        self.on_restart_count(self.scan_index.count(*self.scan_window))
+    
+    def on_scan_cancelled(self, count):
+        """掃描被停止：保留已找到的紀錄，不記錄為已涵蓋，下次搜尋時會重新掃描這些範圍"""
+        self.on_restart_count(self.scan_index.count(*self.scan_window), partial=True)
     
-    def on_build_version_found(self, filename, content, build_version_info):
-        """當找到包含build version的檔案時的回調"""
-        # 解析檔案時間
-        file_datetime = parse_filename_datetime(filename)
-        file_time_str = file_datetime.strftime("%Y-%m-%d %H:%M:%S") if file_datetime else "Unknown time"
-        
-        # 格式化日誌條目
-        log_entry = {
-            'filename': filename,
-            'file_time': file_time_str,
-            'boot_time': build_version_info['time'],
-            'version': build_version_info['version'],
-            'version_time': build_version_info['version_time'],
-            'full_line': build_version_info['full_line']
-        }
-        
-        # 添加到日誌列表
-        self.build_version_logs.append(log_entry)
-        
-        # 更新顯示
-        self.update_display()
-    
-    def on_restart_count(self, count):
-        """更新重啟次數顯示"""
+    def open_log_content(self, index):
+        """雙擊表格列時才從設備讀取該日誌的內容"""
+        if not self.ssh_client or not index.isValid():
+            return
+        record = self.result_model.record_at(index.row())
+        worker = LogContentWorker(self.ssh_client, record)
+        worker.loaded.connect(self.on_log_content_loaded)
+        worker.error.connect(self.on_error)
+        worker.finished.connect(lambda: self.content_workers.remove(worker))
+        self.content_workers.append(worker)
+        worker.start()
+        
+        self.status_label.setText("Loading {}...".format(record.filename))
+        self.status_label.setStyleSheet("color: orange;")
+    
+    def on_log_content_loaded(self, filename, content, truncated):
+        """顯示讀取完成的日誌內容"""
+        LogViewerDialog(filename, content, truncated, self).show()
+        self.status_label.setText("Opened {}".format(filename))
+        self.status_label.setStyleSheet("color: green;")
+    
+    def on_restart_count(self, count, partial=False):
+        """更新重啟次數顯示，partial表示掃描被停止，只是目前為止的結果"""
+        self.restart_total = count
+        suffix = "（搜尋已停止，僅部分結果）" if partial else ""
         if self.enable_time_filter.isChecked():
             start_str = "{} {}:{}:{}".format(
                 self.start_date_edit.date().toString("yyyy-MM-dd"),
@@ -628,34 +963,109 @@ class SearchWindow(QMainWindow):
                 self.end_minute_combo.currentText(),
                 self.end_second_combo.currentText()
             )
-            self.restart_count_label.setText("在 {} 到 {} 總共重開 {} 次".format(start_str, end_str, count))
+            self.restart_count_label.setText("在 {} 到 {} 總共重開 {} 次{}".format(start_str, end_str, count, suffix))
         else:
-            self.restart_count_label.setText("總共重開 {} 次".format(count))
-    
-    def update_display(self):
-        """更新顯示內容"""
-        # 按檔案時間排序日誌
-        self.build_version_logs.sort(key=lambda x: x['file_time'])
-        
-        # 準備顯示內容 - 添加標題行和數據
-        display_lines = []
-        
-        # 添加表頭
-        header = "{:<20} {:<15} {:<15}".format("開機時間", "版本號", "版本時間")
-        display_lines.append(header)
-        display_lines.append("=" * 60)  # 分隔線
-        
-        # 添加數據行
-        for log in self.build_version_logs:
-            line = "{:<20} {:<15} {:<15}".format(
-                log['boot_time'][:20],  # 限制長度避免格式錯亂
-                log['version'][:15],
-                log['version_time'][:15]
-            )
-            display_lines.append(line)
+            self.restart_count_label.setText("總共重開 {} 次{}".format(count, suffix))
+        self.update_analytics()
+    
+    def update_analytics(self):
+        """以時間索引中目前時間範圍的開機時間計算重啟統計"""
+        with scan_trace.span("ui.analytics"):
+            self.refresh_analytics()
+    
+    def refresh_analytics(self):
+        """重新計算重啟統計並更新顯示"""
+        epochs = self.scan_index.epochs(*self.scan_window)
+        if not epochs:
+            self.analysis = None
+            self.analytics_label.setText("")
+            self.export_stats_button.setEnabled(False)
+            return
         
-        # 更新單一顯示區域
-        self.content_display.setText("\n".join(display_lines))
+        self.analysis = analyze_reboots([(self.get_host_key(), epochs)])
+        host = self.analysis['hosts'][0]
+        self.analytics_label.setText(summarize(self.analysis))
+        tooltip = ["運行時間 最短/P10/中位數/P90/最長: {}".format(" / ".join(format_duration(host[field]) for field in (
+            'min_uptime', 'p10_uptime', 'median_uptime', 'p90_uptime', 'max_uptime')))]
+        tooltip.extend("  {}: {}".format(label, host['uptime_histogram'][label]) for label in UPTIME_BUCKET_LABELS)
+        tooltip.extend("連續重啟 {} ~ {} ({} 次開機)".format(loop['start'], loop['end'], loop['boots'])
+                       for loop in host['crash_loops'])
+        self.analytics_label.setToolTip("\n".join(tooltip))
+        self.export_stats_button.setEnabled(True)
+    
+    def export_analysis(self):
+        """將重啟統計匯出為JSON或CSV"""
+        if not self.analysis:
+            return
+        path, selected = QFileDialog.getSaveFileName(self, "匯出重啟統計", "reboot_stats.json",
+                                                     "JSON (*.json);;CSV (*.csv)")
+        if not path:
+            return
+        output_format = "csv" if path.lower().endswith(".csv") else "json"
+        try:
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                write_analysis(self.analysis, f, output_format)
+            self.status_label.setText("Exported reboot statistics to {}".format(path))
+            self.status_label.setStyleSheet("color: green;")
+        except (IOError, OSError) as e:
+            self.on_error("Failed to export reboot statistics: {}".format(str(e)))
+    
+    def toggle_watch(self, checked):
+        """切換即時監看模式"""
+        if checked:
+            self.start_watch()
+        else:
+            self.stop_watch()
+    
+    def start_watch(self):
+        """開始監看新產生的日誌檔案"""
+        if not self.ssh_client:
+            QMessageBox.warning(self, "Warning", "No SSH connection available")
+            self.watch_button.setChecked(False)
+            return
+        if self.watch_worker and self.watch_worker.isRunning():
+            return
+        
+        self.watch_worker = LogWatchWorker(self.ssh_client, "/run/media/mmcblk1p1/log/agvapp/")
+        self.watch_worker.watch_started.connect(self.on_watch_started)
+        self.watch_worker.build_version_found.connect(self.on_watch_build_version_found)
+        self.watch_worker.error.connect(self.on_watch_error)
+        self.watch_worker.start()
+        
+        self.status_label.setText("Starting watch mode...")
+        self.status_label.setStyleSheet("color: orange;")
+    
+    def stop_watch(self):
+        """停止即時監看"""
+        if self.watch_worker and self.watch_worker.isRunning():
+            self.watch_worker.stop()
+            self.watch_worker.wait(WORKER_STOP_TIMEOUT)
+        
+        if self.watch_button.isChecked():
+            self.watch_button.blockSignals(True)
+            self.watch_button.setChecked(False)
+            self.watch_button.blockSignals(False)
+    
+    def on_watch_started(self, method):
+        """監看開始"""
+        self.status_label.setText("Watching for new reboots ({})...".format(method))
+        self.status_label.setStyleSheet("color: green;")
+    
+    def on_watch_build_version_found(self, record):
+        """監看到新的開機紀錄時加入結果並更新重啟次數"""
+        if not self.on_build_version_found(record):
+            return
+        self.on_restart_count(self.scan_index.count(*self.scan_window))
+        self.update_inventory()
+        
+        self.status_label.setText("New reboot detected: {}".format(
+            record.file_time if record.file_time != UNKNOWN_FILE_TIME else record.filename))
+        self.status_label.setStyleSheet("color: red;")
+    
+    def on_watch_error(self, error_message):
+        """監看發生錯誤時停止監看"""
+        self.on_error(error_message)
+        self.stop_watch()
     
     def on_progress_update(self, current, total):
         """更新進度條"""
@@ -673,10 +1083,17 @@ class SearchWindow(QMainWindow):
     def on_scan_finished(self):
         """掃描完成"""
         self.scan_button.setEnabled(True)
+        self.stop_button.setEnabled(False)
         self.progress_bar.setVisible(False)
         
-        log_count = len(self.build_version_logs)
-        if log_count > 0:
+        self.result_model.flush()
+        self.update_inventory()
+        self.update_trace_summary()
+        log_count = self.result_model.record_count()
+        if self.file_worker and self.file_worker.is_stopped():
+            self.status_label.setText("Scan stopped, {} build version logs found so far".format(log_count))
+            self.status_label.setStyleSheet("color: orange;")
+        elif log_count > 0:
             self.status_label.setText("Found {} build version logs".format(log_count))
             self.status_label.setStyleSheet("color: green;")
         else:
@@ -684,6 +1101,42 @@ class SearchWindow(QMainWindow):
             self.status_label.setStyleSheet("color: orange;")
     
     
+    def toggle_trace(self, checked):
+        """啟用或停用掃描追蹤"""
+        scan_trace.enable(checked)
+        self.trace_group.setVisible(checked)
+        self.update_trace_summary()
+    
+    def update_trace_summary(self):
+        """在追蹤面板顯示目前為止的統計"""
+        if scan_trace.is_enabled():
+            self.trace_text.setPlainText(scan_trace.format_summary())
+    
+    def clear_trace(self):
+        """清除已記錄的追蹤資料"""
+        scan_trace.reset()
+        self.update_trace_summary()
+    
+    def export_trace(self):
+        """將追蹤資料匯出為Chrome trace JSON（含統計）"""
+        path, selected = QFileDialog.getSaveFileName(self, "匯出掃描追蹤", "scan_trace.json", "Chrome trace (*.json)")
+        if not path:
+            return
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                scan_trace.write_trace(f)
+            self.status_label.setText("Exported scan trace to {}".format(path))
+            self.status_label.setStyleSheet("color: green;")
+        except (IOError, OSError) as e:
+            self.on_error("Failed to export scan trace: {}".format(str(e)))
+    
+    def update_inventory(self):
+        """將新找到的開機紀錄寫入車隊版本清冊"""
+        if not self.inventory_pending:
+            return
+        records, self.inventory_pending = self.inventory_pending, []
+        version_inventory.add_records(self.get_host_key(), records)
+    
     def on_time_filter_toggled(self):
         """時間過濾開關狀態改變時的處理"""
         enabled = self.enable_time_filter.isChecked()
@@ -740,12 +1193,18 @@ class SearchWindow(QMainWindow):
     def back_to_login(self):
         """返回登入頁面"""
         # 清理資源
-        if self.file_worker and self.file_worker.isRunning():
-            self.file_worker.terminate()
-            self.file_worker.wait(3000)
+        self.stop_watch()
+        running = self.stop_workers()
         
         if self.ssh_client:
-            self.ssh_client.close()
+            if running:
+                # 工作執行緒仍在使用這個連線，通道狀態不確定，不交給下一次登入重複使用
+                self.ssh_client.close()
+            else:
+                # 將已認證的連線交還給管理器，重新登入同一台設備時不需再次握手
+                session_manager.release(self.get_host_key(), self.ssh_client,
+                                        self.ssh_connection_info.get('password', ''))
+            self.ssh_client = None
         
         # 重新打開登入頁面
         from .login import SSHConnectionApp